@@ -12,6 +12,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from decouple import config
+
+from LMS.sqlite_backend import production_options
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -55,15 +59,30 @@ AUTH_USER_MODEL = 'labs.User'
 # -----------------------------
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'labs.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Page numbers by default; ?pagination=cursor / ?count=false per request
+    'DEFAULT_PAGINATION_CLASS': 'labs.pagination.HybridPagination',
     'PAGE_SIZE': 50,
 }
 
+# -----------------------------
+# Cache (response cache for catalog list endpoints)
+# -----------------------------
+# Local memory works out of the box; point this at Redis/Memcached when
+# running several worker processes so they share version counters.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lms-default',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+RESPONSE_CACHE_TIMEOUT = 300
+
 # -----------------------------
 # JWT Authentication Settings
 # -----------------------------
@@ -73,10 +92,43 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
     'ROTATE_REFRESH_TOKENS': True,
+    # Adds role / username / user version claims (labs.authentication)
+    'TOKEN_OBTAIN_SERIALIZER': 'labs.authentication.LabsTokenObtainPairSerializer',
+}
+
+# How CachedJWTAuthentication resolves request.user for tokens with claims:
+# 'cache' = in-process LRU+TTL cache, revalidated against the token's user
+# version stamp; 'claims' = build the user from the token, no DB access.
+JWT_USER_RESOLUTION = config('JWT_USER_RESOLUTION', default='cache')
+JWT_USER_CACHE_SIZE = 10000
+JWT_USER_CACHE_TTL = 60
+
+# Login / registration throttle (labs.throttling): per-IP and per-username
+# sliding windows in local memory, checked before any password hashing.
+LOGIN_THROTTLE = {
+    'ENABLED': config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool),
+    'IP_LIMIT': 60,
+    'IP_WINDOW': 60,
+    'USERNAME_LIMIT': 5,
+    'USERNAME_WINDOW': 60,
+    'REGISTER_LIMIT': 10,
+    'REGISTER_WINDOW': 3600,
+    'BACKOFF_MAX': 900,
+}
+
+# Server-Sent Events at /api/events/ (labs.events), served over ASGI only.
+# REPLAY_SIZE bounds how far back a Last-Event-ID reconnect can resume.
+LIVE_EVENTS = {
+    'REPLAY_SIZE': 1000,
+    'QUEUE_SIZE': 500,
+    'KEEPALIVE': 15,
+    'MAX_SUBSCRIBERS': 1000,
 }
 
 
 MIDDLEWARE = [
+    'labs.instrumentation.RequestMetricsMiddleware',
+    'labs.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -87,6 +139,53 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# -----------------------------
+# Per-endpoint SQL query budgets (keyed by URL name)
+# -----------------------------
+# Checked by RequestMetricsMiddleware on every read request and enforced by the
+# test suite (labs.tests.QueryBudgetTests). Counts assume the JWT user is
+# served by CachedJWTAuthentication without a query (user loads on a cache
+# miss are not charged), and include the ETag
+# validator and the pagination COUNT(*). Keys are URL names,
+# or "<url name>:<variant>" for variants a view reports separately. Writes
+# are recorded as "<url name>:<METHOD>" and have no budget unless listed.
+QUERY_BUDGETS = {
+    'user-list': 2,
+    'user-detail': 1,
+    'lab-list': 3,
+    'lab-detail': 2,
+    'lab-detail:expand': 5,
+    'lab-pc-list': 3,
+    'pc-list': 3,
+    'pc-detail': 2,
+    'software-list': 3,
+    'software-detail': 2,
+    'software-expiring': 2,
+    'equipment-list': 3,
+    'equipment-detail': 2,
+    'maintenance-log-list': 3,
+    'maintenance-log-detail': 2,
+    'maintenance-stats': 4,
+    'inventory-list': 1,
+    'inventory-history': 3,
+    'inventory-uptime': 3,
+    'search': 1,
+    'dashboard-summary': 5,
+    'redirect-after-login': 0,
+    'ticket-list': 3,
+    # labs.async_views (no response cache or ETag queries)
+    'async-lab-list': 2,
+    'async-lab-detail': 1,
+    'async-pc-list': 2,
+    'async-pc-detail': 1,
+    'async-equipment-list': 2,
+    'async-equipment-detail': 1,
+    'async-maintenance-log-list': 2,
+    'async-maintenance-log-detail': 1,
+    'async-ticket-list': 2,
+    'async-inventory-list': 1,
+}
+
 ROOT_URLCONF = 'LMS.urls'
 
 # Templates not needed for API-only backend
@@ -110,7 +209,6 @@ WSGI_APPLICATION = 'LMS.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-from decouple import config
 
 # If DB_* env vars are not set, fall back to SQLite for development convenience
 DB_NAME = config('DB_NAME', default=None)
@@ -128,6 +226,20 @@ if DB_NAME:
             }
         }
     }
+elif config('SQLITE_PRODUCTION', default=False, cast=bool):
+    # SQLite serving real traffic: WAL, tuned pragmas, BEGIN IMMEDIATE with retry
+    DATABASES = {
+        'default': {
+            'ENGINE': 'LMS.sqlite_backend',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'OPTIONS': production_options(
+                busy_timeout_ms=config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int),
+                mmap_size=config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+                cache_size_kib=config('SQLITE_CACHE_SIZE_KIB', default=64 * 1024, cast=int),
+                begin_retries=config('SQLITE_BEGIN_RETRIES', default=3, cast=int),
+            ),
+        }
+    }
 else:
     DATABASES = {
         'default': {
@@ -136,6 +248,31 @@ else:
         }
     }
 
+# Read replicas: DB_REPLICA_1_NAME, DB_REPLICA_2_NAME, ... Each replica copies the
+# primary's settings; DB_REPLICA_<n>_HOST/_PORT/_USER/_PASSWORD override them.
+# With SQLite the name is a file path (refresh it with `manage.py sync_replicas`).
+# labs.db_router sends GET/HEAD reads to them; see ReplicaRoutingMiddleware.
+_replica = 1
+while config(f'DB_REPLICA_{_replica}_NAME', default=None):
+    DATABASES[f'replica_{_replica}'] = {
+        **DATABASES['default'],
+        'NAME': config(f'DB_REPLICA_{_replica}_NAME'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    for _key in ('HOST', 'PORT', 'USER', 'PASSWORD'):
+        _value = config(f'DB_REPLICA_{_replica}_{_key}', default=None)
+        if _value is not None:
+            DATABASES[f'replica_{_replica}'][_key] = _value
+    _replica += 1
+
+DATABASE_ROUTERS = ['labs.db_router.ReplicaRouter']
+# 'round_robin' or 'least_recent'
+DB_REPLICA_SELECTION = config('DB_REPLICA_SELECTION', default='round_robin')
+# Reads stay on the primary this long after a client's own write
+DB_READ_YOUR_WRITES_SECONDS = config('DB_READ_YOUR_WRITES_SECONDS', default=5, cast=int)
+# A replica that failed is skipped this long before being tried again
+DB_REPLICA_RETRY_SECONDS = config('DB_REPLICA_RETRY_SECONDS', default=30, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
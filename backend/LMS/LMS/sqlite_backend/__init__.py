@@ -0,0 +1,27 @@
+"""
+SQLite tuned for a small production deployment (ENGINE 'LMS.sqlite_backend').
+
+WAL lets readers run alongside the single writer, BEGIN IMMEDIATE takes the
+write lock when a transaction starts instead of failing mid-way when a read
+lock cannot be upgraded, and busy_timeout makes a blocked writer wait for
+the lock instead of erroring at once.
+"""
+
+
+def production_options(busy_timeout_ms=5000, mmap_size=256 * 1024 * 1024, cache_size_kib=64 * 1024, begin_retries=3):
+    """DATABASES OPTIONS for the production profile."""
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        f'PRAGMA busy_timeout={busy_timeout_ms}',
+        # Durable at checkpoints, not every commit; safe against corruption in WAL mode
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA mmap_size={mmap_size}',
+        # Negative means KiB rather than pages
+        f'PRAGMA cache_size=-{cache_size_kib}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+    return {
+        'init_command': ';'.join(pragmas),
+        'transaction_mode': 'IMMEDIATE',
+        'begin_retries': begin_retries,
+    }
@@ -0,0 +1,53 @@
+import threading
+import time
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+_stats_lock = threading.Lock()
+_stats = {'begin_retries': 0, 'begin_failures': 0}
+
+
+def lock_stats():
+    """BEGIN retries and give-ups of this process."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The stock SQLite backend plus bounded retry of BEGIN. OPTIONS:
+
+    begin_retries      extra BEGIN attempts after busy_timeout ran out (default 3)
+    begin_retry_delay  seconds before the first retry, doubled each time (default 0.05)
+
+    Only the BEGIN is retried, never a statement inside a transaction, so
+    a retry cannot repeat work. Pair with transaction_mode 'IMMEDIATE' so
+    a write transaction waits for the lock up front.
+    """
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.begin_retries = kwargs.pop('begin_retries', 3)
+        self.begin_retry_delay = kwargs.pop('begin_retry_delay', 0.05)
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        delay = self.begin_retry_delay
+        for attempt in range(self.begin_retries + 1):
+            try:
+                return super()._start_transaction_under_autocommit()
+            except OperationalError as exc:
+                if 'locked' not in str(exc) and 'busy' not in str(exc):
+                    raise
+                if attempt == self.begin_retries:
+                    _count('begin_failures')
+                    raise
+                _count('begin_retries')
+                time.sleep(delay)
+                delay *= 2
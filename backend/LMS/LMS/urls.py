@@ -3,11 +3,8 @@ URL configuration for LMS project - API-only backend.
 """
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import (
-    TokenObtainPairView,
-    TokenRefreshView,
-)
-from .views import RegisterView
+from rest_framework_simplejwt.views import TokenRefreshView
+from .views import LoginView, RegisterView
 
 urlpatterns = [
     # App-specific endpoints
@@ -23,6 +20,6 @@ urlpatterns = [
 
     # Authentication endpoints
     path('api/register/', RegisterView.as_view(), name='register'),
-    path('api/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/login/', LoginView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
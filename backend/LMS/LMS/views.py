@@ -1,6 +1,8 @@
 from rest_framework import generics, permissions
+from rest_framework_simplejwt.views import TokenObtainPairView
 from .serializers import UserSerializer
 from labs.models import User
+from labs.throttling import LoginOutcomeMixin, LoginThrottle, RegisterThrottle
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -9,4 +11,13 @@ class RegisterView(generics.CreateAPIView):
     """
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
-    serializer_class = UserSerializer
\ No newline at end of file
+    throttle_classes = (RegisterThrottle,)
+    serializer_class = UserSerializer
+
+
+class LoginView(LoginOutcomeMixin, TokenObtainPairView):
+    """
+    API endpoint for obtaining a JWT pair.
+    Failed attempts count against the submitted username; a success clears it.
+    """
+    throttle_classes = (LoginThrottle,)
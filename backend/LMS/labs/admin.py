@@ -1,6 +1,70 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
 from .models import User, Lab, PC, Equipment, Software, MaintenanceLog, Inventory
 
+
+# --------------------------
+# Estimated counts for large tables
+# --------------------------
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that avoids a full COUNT(*) on unfiltered changelists of big
+    tables. It asks the database for its row estimate (MySQL table stats,
+    PostgreSQL reltuples, SQLite MAX(id)) and only counts exactly when the
+    list is filtered or the estimate is small.
+    """
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if getattr(queryset, 'query', None) is None or queryset.query.where:
+            return super().count
+        estimate = estimate_row_count(queryset.model, queryset.db)
+        if estimate is None or estimate < self.exact_below:
+            return super().count
+        return estimate
+
+
+def estimate_row_count(model, using='default'):
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                [table],
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table])
+        elif connection.vendor == 'sqlite':
+            # Walks the primary key index to its last entry; deletes make it an overestimate
+            cursor.execute(f"SELECT MAX({connection.ops.quote_name(model._meta.pk.column)}) FROM {connection.ops.quote_name(table)}")
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+# Only labs that have rows in the table, read from the indexed lab column,
+# instead of every Lab as a choice
+LAB_FILTER = ('lab', admin.RelatedOnlyFieldListFilter)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist settings for tables with 10^5+ rows."""
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
+    list_per_page = 50
+
+
 # --------------------------
 # Custom User Admin
 # --------------------------
@@ -25,40 +89,49 @@ class LabAdmin(admin.ModelAdmin):
 # PC Admin
 # --------------------------
 @admin.register(PC)
-class PCAdmin(admin.ModelAdmin):
+class PCAdmin(LargeTableAdmin):
     list_display = ('name', 'lab', 'brand', 'status')
-    list_filter = ('lab', 'status')
-    search_fields = ('name', 'lab__name', 'brand')
+    list_select_related = ('lab',)
+    list_filter = (LAB_FILTER, 'status')
+    search_fields = ('name', 'serial_number', 'lab__name', 'brand')
+    autocomplete_fields = ('lab',)
 
 
 # --------------------------
 # Equipment Admin
 # --------------------------
 @admin.register(Equipment)
-class EquipmentAdmin(admin.ModelAdmin):
+class EquipmentAdmin(LargeTableAdmin):
     list_display = ('equipment_type', 'brand', 'model_name', 'serial_number', 'status', 'lab', 'added_on')
-    list_filter = ('equipment_type', 'status', 'lab')
+    list_select_related = ('lab',)
+    list_filter = ('equipment_type', 'status', LAB_FILTER)
     search_fields = ('brand', 'model_name', 'serial_number', 'lab__name')
+    autocomplete_fields = ('lab',)
 
 
 # --------------------------
 # Software Admin
 # --------------------------
 @admin.register(Software)
-class SoftwareAdmin(admin.ModelAdmin):
-    list_display = ('name', 'version', 'pc')
-    list_filter = ('pc',)
-    search_fields = ('name', 'version', 'pc__name')
+class SoftwareAdmin(LargeTableAdmin):
+    list_display = ('name', 'version', 'pc', 'expiry_date')
+    list_select_related = ('pc',)
+    # No PC filter: it would render every PC as a filter choice
+    search_fields = ('name', 'version', 'pc__name', 'pc__serial_number')
+    autocomplete_fields = ('pc',)
 
 
 # --------------------------
 # Maintenance Log Admin
 # --------------------------
 @admin.register(MaintenanceLog)
-class MaintenanceLogAdmin(admin.ModelAdmin):
-    list_display = ('equipment', 'status', 'reported_by', 'fixed_by', 'reported_on', 'fixed_on')
-    list_filter = ('status', 'equipment__lab')
-    search_fields = ('equipment__name', 'reported_by__username', 'fixed_by__username')
+class MaintenanceLogAdmin(LargeTableAdmin):
+    list_display = ('equipment', 'status', 'lab', 'reported_by', 'fixed_by', 'reported_on', 'fixed_on')
+    list_select_related = ('equipment', 'lab', 'reported_by', 'fixed_by')
+    # Filter on the log's own lab column (indexed with status) rather than through equipment
+    list_filter = ('status', LAB_FILTER)
+    search_fields = ('equipment__serial_number', 'equipment__model_name', 'reported_by__username', 'fixed_by__username')
+    autocomplete_fields = ('equipment', 'lab', 'reported_by', 'fixed_by')
 
 
 # --------------------------
@@ -67,4 +140,6 @@ class MaintenanceLogAdmin(admin.ModelAdmin):
 @admin.register(Inventory)
 class InventoryAdmin(admin.ModelAdmin):
     list_display = ('equipment_type', 'lab', 'total_quantity', 'working_quantity', 'not_working_quantity', 'under_repair_quantity')
-    list_filter = ('equipment_type', 'lab')
+    list_select_related = ('lab',)
+    list_filter = ('equipment_type', LAB_FILTER)
+    autocomplete_fields = ('lab',)
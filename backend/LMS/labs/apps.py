@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class LabsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'labs'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Installs the per-request query recorder on new DB connections
+        from . import instrumentation  # noqa: F401
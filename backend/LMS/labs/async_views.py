@@ -0,0 +1,173 @@
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .authentication import CachedJWTAuthentication
+from .inventory import inventory_queryset, inventory_row
+from .models import Lab, PC, Equipment, MaintenanceLog
+from .pagination import FALSE_VALUES
+from .permissions import IsAdminOrReadOnly, AllowAuthenticatedReadAndCreateElseAdmin
+from .serializers import LabSerializer, PCSerializer, EquipmentSerializer, MaintenanceLogSerializer, InventorySerializer
+from tickets.models import Ticket
+from tickets.serializers import TicketSerializer
+
+
+# ------------------------------
+# Base view
+# ------------------------------
+class AsyncReadView(View):
+    """
+    Read-only JSON endpoint for the ASGI stack.
+
+    JWT auth (CachedJWTAuthentication.aauthenticate), the DRF permission
+    classes and every query run on the event loop through the async ORM,
+    so under ASGI a request never waits for a worker thread. Responses
+    match the sync endpoints' JSON.
+
+    ReplicaRoutingMiddleware is async-capable, so reads still go to a
+    replica and are served again from the primary if it fails. The
+    response cache (labs.cache) and ETags/304s (labs.conditional) are
+    DRF view mixins and are not applied here: every request hits the
+    database.
+    """
+    http_method_names = ['get']
+    permission_classes = [IsAdminOrReadOnly]
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await self.authenticate(request)
+            self.check_permissions(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            return JsonResponse(detail, status=exc.status_code, safe=False)
+
+    async def authenticate(self, request):
+        result = await CachedJWTAuthentication().aauthenticate(request)
+        if result is not None:
+            request.user, request.auth = result
+        else:
+            # Not the session's lazy user: resolving it would be a sync query
+            request.user, request.auth = AnonymousUser(), None
+
+    def check_permissions(self, request):
+        for permission in self.permission_classes:
+            if not permission().has_permission(request, self):
+                if not request.auth:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied()
+
+
+class AsyncListView(AsyncReadView):
+    """Page-number list (?page=, ?count=false) shaped like HybridPagination's output."""
+    serializer_class = None
+    ordering = ('id',)
+
+    def get_queryset(self):
+        return self.serializer_class.Meta.model.objects.all()
+
+    async def get(self, request, *args, **kwargs):
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        page = request.GET.get('page', '1')
+        if not page.isdigit() or int(page) < 1:
+            raise exceptions.NotFound('Invalid page.')
+        page = int(page)
+        include_count = request.GET.get('count', '').lower() not in FALSE_VALUES
+
+        queryset = self.get_queryset().order_by(*self.ordering)
+        offset = (page - 1) * page_size
+        rows = [obj async for obj in queryset[offset:offset + page_size + 1].aiterator()]
+        if not rows and page > 1:
+            raise exceptions.NotFound('Invalid page.')
+        has_next = len(rows) > page_size
+
+        payload = {}
+        if include_count:
+            payload['count'] = await queryset.acount()
+        url = request.build_absolute_uri()
+        payload['next'] = replace_query_param(url, 'page', page + 1) if has_next else None
+        payload['previous'] = None
+        if page == 2:
+            payload['previous'] = remove_query_param(url, 'page')
+        elif page > 2:
+            payload['previous'] = replace_query_param(url, 'page', page - 1)
+        payload['results'] = self.serializer_class(rows[:page_size], many=True).data
+        return JsonResponse(payload)
+
+
+class AsyncDetailView(AsyncReadView):
+    serializer_class = None
+
+    def get_queryset(self):
+        return self.serializer_class.Meta.model.objects.all()
+
+    async def get(self, request, pk):
+        model = self.serializer_class.Meta.model
+        try:
+            obj = await self.get_queryset().aget(pk=pk)
+        except model.DoesNotExist:
+            raise exceptions.NotFound(f'No {model._meta.object_name} matches the given query.')
+        return JsonResponse(self.serializer_class(obj).data)
+
+
+# ------------------------------
+# Endpoints under /api/async/
+# ------------------------------
+class LabList(AsyncListView):
+    serializer_class = LabSerializer
+
+
+class LabDetail(AsyncDetailView):
+    serializer_class = LabSerializer
+
+
+class PCList(AsyncListView):
+    serializer_class = PCSerializer
+
+
+class PCDetail(AsyncDetailView):
+    serializer_class = PCSerializer
+
+
+class EquipmentList(AsyncListView):
+    serializer_class = EquipmentSerializer
+    ordering = ('added_on', 'id')
+
+
+class EquipmentDetail(AsyncDetailView):
+    serializer_class = EquipmentSerializer
+
+
+class MaintenanceLogList(AsyncListView):
+    serializer_class = MaintenanceLogSerializer
+    permission_classes = [AllowAuthenticatedReadAndCreateElseAdmin]
+    ordering = ('reported_on', 'id')
+
+
+class MaintenanceLogDetail(AsyncDetailView):
+    serializer_class = MaintenanceLogSerializer
+    permission_classes = [AllowAuthenticatedReadAndCreateElseAdmin]
+
+
+class TicketList(AsyncListView):
+    serializer_class = TicketSerializer
+    ordering = ('created_at', 'id')
+
+    def get_queryset(self):
+        # dispatch() has checked permissions by now; guard anyway, as
+        # AnonymousUser has no role
+        user = self.request.user
+        if not user.is_authenticated:
+            return Ticket.objects.none()
+        if user.role == 'admin':
+            return Ticket.objects.all()
+        return Ticket.objects.filter(student=user)
+
+
+class InventoryList(AsyncReadView):
+    async def get(self, request):
+        rows = [inventory_row(row) async for row in inventory_queryset(request.GET)]
+        return JsonResponse(InventorySerializer(rows, many=True).data, safe=False)
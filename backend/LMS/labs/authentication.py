@@ -0,0 +1,221 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+ROLE_CLAIM = 'role'
+USERNAME_CLAIM = 'username'
+VERSION_CLAIM = 'ver'
+
+
+def user_version(user):
+    """
+    Short stamp of everything that should revoke a user's tokens: password,
+    role and active/staff flags. Tokens carry it; a mismatch rejects them.
+    """
+    raw = f'{user.password}|{user.role}|{user.is_active}|{user.is_staff}|{user.is_superuser}'
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+# ------------------------------
+# Tokens
+# ------------------------------
+class LabsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens also carry role, username and the user version."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[USERNAME_CLAIM] = user.get_username()
+        token[VERSION_CLAIM] = user_version(user)
+        return token
+
+
+class LabsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = LabsRefreshToken
+
+
+# ------------------------------
+# In-process user cache
+# ------------------------------
+class LRUCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = LRUCache(
+    maxsize=getattr(settings, 'JWT_USER_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'JWT_USER_CACHE_TTL', 60),
+)
+
+
+def forget_user(user_id):
+    # Token claims hold the id as a string
+    user_cache.delete(str(user_id))
+
+
+# ------------------------------
+# Authentication
+# ------------------------------
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication without the per-request user SELECT.
+
+    Tokens issued by LabsRefreshToken carry the user's role and version
+    stamp. With settings.JWT_USER_RESOLUTION = 'cache' (default) the user
+    comes from an in-process LRU+TTL cache, loaded once per TTL and dropped
+    when the user is saved. A token whose stamp no longer matches (role,
+    password or active flag changed) is rejected. With 'claims' the user is
+    built from the token alone, so changes only take effect once the
+    access token expires. Tokens without the claims fall back to a
+    database lookup.
+    """
+
+    def authenticate(self, request):
+        self.loaded_user = False
+        try:
+            return super().authenticate(request)
+        finally:
+            if self.loaded_user:
+                # Not charged against the endpoint's query budget (labs.instrumentation)
+                request._request.auth_queries = 1
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views, on a plain Django request. Cache and
+        claim hits never leave the event loop; misses use the async ORM.
+        """
+        self.loaded_user = False
+        try:
+            header = self.get_header(request)
+            raw_token = self.get_raw_token(header) if header is not None else None
+            if raw_token is None:
+                return None
+            validated_token = self.get_validated_token(raw_token)
+            return await self.aget_user(validated_token), validated_token
+        finally:
+            if self.loaded_user:
+                request.auth_queries = 1
+
+    def load_user(self, validated_token):
+        self.loaded_user = True
+        return super().get_user(validated_token)
+
+    async def aload_user(self, validated_token):
+        """load_user() through the async ORM."""
+        self.loaded_user = True
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken('Token contained no recognizable user identification') from exc
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as exc:
+            raise AuthenticationFailed('User not found', code='user_not_found') from exc
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
+
+    def get_user(self, validated_token):
+        user = self.known_user(validated_token)
+        if user is None:
+            user = self.remember_user(validated_token, self.load_user(validated_token))
+        return user
+
+    async def aget_user(self, validated_token):
+        user = self.known_user(validated_token)
+        if user is None:
+            user = self.remember_user(validated_token, await self.aload_user(validated_token))
+        return user
+
+    def known_user(self, validated_token):
+        """The user if no query is needed (claims mode or a current cache entry), else None."""
+        version = validated_token.get(VERSION_CLAIM)
+        if version is None:
+            return None
+        if getattr(settings, 'JWT_USER_RESOLUTION', 'cache') == 'claims':
+            return self.user_from_claims(validated_token)
+        user = user_cache.get(str(validated_token.get(api_settings.USER_ID_CLAIM)))
+        if user is None or user_version(user) != version:
+            return None
+        return self.checked(user, version)
+
+    def remember_user(self, validated_token, user):
+        """Cache a freshly loaded user; a fresh row tells us whether the token is stale."""
+        version = validated_token.get(VERSION_CLAIM)
+        if version is None:
+            return user
+        user_cache.set(str(validated_token.get(api_settings.USER_ID_CLAIM)), user)
+        return self.checked(user, version)
+
+    def checked(self, user, version):
+        if user_version(user) != version:
+            raise AuthenticationFailed('Token was issued before the user changed.', code='token_not_valid')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        # Views may modify request.user; never hand out the shared instance
+        return copy.copy(user)
+
+    def user_from_claims(self, validated_token):
+        user = User(
+            username=validated_token.get(USERNAME_CLAIM, ''),
+            role=validated_token.get(ROLE_CLAIM, 'student'),
+            is_active=True,
+        )
+        user.pk = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        user._state.adding = False
+        return user
@@ -0,0 +1,149 @@
+import json
+import math
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from django.db import connections
+from django.test import Client
+
+from .authentication import LabsRefreshToken
+from .instrumentation import QueryRecorder
+
+
+# ------------------------------
+# Helpers shared by the benchmark commands
+# ------------------------------
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies_ms):
+    return {
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p95_ms': round(percentile(latencies_ms, 95), 3),
+        'mean_ms': round(statistics.fmean(latencies_ms), 3),
+        'max_ms': round(max(latencies_ms), 3),
+    }
+
+
+def bench_admin(username='bench-admin'):
+    """Admin account the benchmarks authenticate as (created without a usable password)."""
+    from .models import User
+
+    user = User.objects.filter(username=username).first()
+    if user is None:
+        user = User.objects.create_user(username=username, password=None, role='admin')
+    elif user.role != 'admin':
+        raise ValueError(f"{user.username} is not an admin")
+    return user
+
+
+def jwt_client(user):
+    """Django test client that authenticates every request with a fresh access token."""
+    token = LabsRefreshToken.for_user(user).access_token
+    return Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+
+def consume(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def count_queries():
+    """Context manager yielding a QueryRecorder installed on every connection."""
+    recorder = QueryRecorder()
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(recorder))
+    return stack, recorder
+
+
+def measure(client, url, iterations=20, warmup=2, before=None, **extra):
+    """
+    Time ``iterations`` GETs of ``url`` and report latency percentiles,
+    queries per request, response size and peak Python memory. Memory is
+    sampled in a separate request so tracemalloc does not skew latency.
+    ``before`` is called ahead of every timed request (e.g. to clear caches).
+    """
+    for _ in range(warmup):
+        consume(client.get(url, **extra))
+
+    latencies = []
+    queries = []
+    size = status = None
+    for _ in range(iterations):
+        if before:
+            before()
+        stack, recorder = count_queries()
+        with stack:
+            start = time.perf_counter()
+            response = client.get(url, **extra)
+            size = consume(response)
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(recorder.count)
+        status = response.status_code
+
+    if before:
+        before()
+    tracemalloc.start()
+    try:
+        consume(client.get(url, **extra))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'url': url,
+        'status': status,
+        **summarize(latencies),
+        'queries': max(queries),
+        'bytes': size,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+# ------------------------------
+# Reports
+# ------------------------------
+def write_report(report, path=None, stdout=None):
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path:
+        with open(path, 'w') as fh:
+            fh.write(text + '\n')
+    elif stdout is not None:
+        stdout.write(text)
+    return text
+
+
+def compare_reports(base, new, metrics=('p50_ms', 'p95_ms', 'queries', 'bytes', 'peak_kb')):
+    """Per-endpoint deltas between two benchmark reports (new - base, and % change)."""
+    diff = {}
+    base_endpoints = base.get('endpoints', {})
+    new_endpoints = new.get('endpoints', {})
+    for name in sorted(set(base_endpoints) | set(new_endpoints)):
+        before = base_endpoints.get(name)
+        after = new_endpoints.get(name)
+        if before is None or after is None:
+            diff[name] = {'only_in': 'new' if before is None else 'base'}
+            continue
+        entry = {}
+        for metric in metrics:
+            old, cur = before.get(metric), after.get(metric)
+            if old is None or cur is None:
+                continue
+            entry[metric] = {
+                'base': old,
+                'new': cur,
+                'delta': round(cur - old, 3),
+                'change_pct': round((cur - old) / old * 100, 1) if old else None,
+            }
+        diff[name] = entry
+    return diff
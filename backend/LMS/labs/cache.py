@@ -0,0 +1,120 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from .db_router import read_your_writes_seconds, reading_from_replica
+
+VERSION_KEY = 'lms:version:{}'
+RESPONSE_KEY = 'lms:response:{}'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+# ------------------------------
+# Per-model version counters
+# ------------------------------
+def _version_key(model):
+    return VERSION_KEY.format(model._meta.label_lower)
+
+
+def model_versions(models):
+    """Current version of each model, initialising missing counters."""
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Seed from the clock so an evicted counter never reuses an old version
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(models):
+    for model in models:
+        key = _version_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def bump_versions(*models):
+    """
+    Invalidate every cached response that depends on these models. Bumped
+    immediately and again on commit, so a reader that cached pre-commit
+    data under the new version is invalidated too.
+    """
+    _bump(models)
+    transaction.on_commit(lambda: _bump(models))
+
+
+# ------------------------------
+# Response cache
+# ------------------------------
+def response_version(request, models):
+    """Digest of path, query params, role and the version counters of ``models``."""
+    role = getattr(request.user, 'role', '') if request.user else ''
+    query = sorted(request.query_params.lists())
+    versions = model_versions(models)
+    raw = f'{request.path}|{query}|{role}|{versions}'
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def response_cache_key(request, models):
+    return RESPONSE_KEY.format(response_version(request, models))
+
+
+def record(hit):
+    with _stats_lock:
+        _stats['hits' if hit else 'misses'] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / total, 4) if total else None
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.update(hits=0, misses=0)
+
+
+class CachedListMixin:
+    """
+    Cache GET list responses keyed by path, query params, role and the
+    version counters of ``cache_models``. A write to any of those models
+    bumps its counter, so stale entries are simply never looked up again.
+
+    Version counters live in the default cache; use a shared backend
+    (Redis/Memcached) when running more than one worker process.
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache_key(request, self.cache_models)
+        data = cache.get(key)
+        if data is not None:
+            record(hit=True)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        record(hit=False)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+            if reading_from_replica():
+                # A lagging replica may predate the version bump; keep it short-lived
+                timeout = min(timeout, read_your_writes_seconds())
+            cache.set(key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
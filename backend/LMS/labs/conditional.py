@@ -0,0 +1,81 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import response_version
+from .pagination import FALSE_VALUES, HybridPagination
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for list and detail GETs.
+
+    Lists behind CachedListMixin take their ETag from the ``cache_models``
+    version counters, so validating one costs no query. Other views use
+    one aggregate over the queryset they would serialize: MAX(updated_at)
+    catches edits and COUNT(*) catches deletes. If-None-Match /
+    If-Modified-Since are answered with 304 before any rows are loaded or
+    serialized. Keyset and ?count=false pages skip validation, since they
+    exist to avoid whole-table aggregates.
+    """
+    change_marker_field = 'updated_at'
+
+    def conditional_enabled(self):
+        if self.is_detail_request():
+            return True
+        params = self.request.query_params
+        keyset = (
+            params.get(HybridPagination.mode_query_param) == 'cursor'
+            or HybridPagination.cursor_query_param in params
+        )
+        return not keyset and params.get(HybridPagination.count_query_param, '').lower() not in FALSE_VALUES
+
+    def is_detail_request(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_marker_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_detail_request():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validators(self):
+        cache_models = getattr(self, 'cache_models', ())
+        if cache_models and not self.is_detail_request():
+            return f'W/"{response_version(self.request, cache_models)}"', None
+
+        marker = self.get_marker_queryset().order_by().aggregate(
+            last_modified=Max(self.change_marker_field),
+            count=Count('pk'),
+        )
+        if self.is_detail_request() and not marker['count']:
+            # Let the normal lookup produce the 404
+            return None
+        last_modified = marker['last_modified']
+        stamp = last_modified.isoformat() if last_modified else ''
+        raw = f"{self.request.get_full_path()}|{marker['count']}|{stamp}"
+        etag = f'W/"{hashlib.sha1(raw.encode()).hexdigest()}"'
+        return etag, last_modified
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators() if self.conditional_enabled() else None
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
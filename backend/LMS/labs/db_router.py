@@ -0,0 +1,271 @@
+import asyncio
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+REPLICA_PREFIX = 'replica_'
+PIN_KEY = 'lms:db-pin:{}'
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+def read_your_writes_seconds():
+    return getattr(settings, 'DB_READ_YOUR_WRITES_SECONDS', 5)
+
+
+# ------------------------------
+# Replica selection and health
+# ------------------------------
+def connect(alias):
+    """Open the connection if needed; False if the database cannot be reached."""
+    connection = connections[alias]
+    if connection.connection is not None:
+        return True
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        # Connecting is sync-only; under the event loop the first query connects
+        return True
+    try:
+        connection.ensure_connection()
+    except DatabaseError:
+        return False
+    return True
+
+
+class ReplicaSet:
+    """
+    Picks a healthy replica, round-robin or least recently used
+    (settings.DB_REPLICA_SELECTION). A replica that fails to connect or
+    errors mid-query is skipped for DB_REPLICA_RETRY_SECONDS.
+    """
+
+    def __init__(self, aliases=None, selection=None, retry_after=None, check=connect):
+        self.aliases = list(replica_aliases() if aliases is None else aliases)
+        self.selection = selection or getattr(settings, 'DB_REPLICA_SELECTION', 'round_robin')
+        self.retry_after = getattr(settings, 'DB_REPLICA_RETRY_SECONDS', 30) if retry_after is None else retry_after
+        self.check = check
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._last_used = {}
+        self._down_until = {}
+        self.failures = 0
+
+    def pick(self, now):
+        with self._lock:
+            healthy = [alias for alias in self.aliases if self._down_until.get(alias, 0) <= now]
+            if not healthy:
+                return None
+            if self.selection == 'least_recent':
+                alias = min(healthy, key=lambda name: self._last_used.get(name, 0))
+            else:
+                alias = healthy[next(self._turn) % len(healthy)]
+            self._last_used[alias] = now
+            return alias
+
+    def choose(self):
+        """A reachable replica alias, or None to use the primary."""
+        for _ in self.aliases:
+            alias = self.pick(time.monotonic())
+            if alias is None:
+                return None
+            if self.check(alias):
+                return alias
+            self.mark_down(alias)
+        return None
+
+    def mark_down(self, alias):
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + self.retry_after
+            self.failures += 1
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'selection': self.selection,
+                'replicas': {
+                    alias: 'down' if self._down_until.get(alias, 0) > now else 'up' for alias in self.aliases
+                },
+                'failures': self.failures,
+            }
+
+
+replica_set = ReplicaSet()
+
+
+def replica_status():
+    return replica_set.status()
+
+
+# ------------------------------
+# Per-request routing state
+# ------------------------------
+class RoutingState:
+    def __init__(self, use_replicas):
+        self.use_replicas = use_replicas
+        # One replica per request, so all of its reads see the same snapshot
+        self.alias = None
+        self.failed = False
+
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+def reading_from_replica():
+    """True if the current request has read from a replica."""
+    state = _routing.get()
+    return state is not None and state.alias not in (None, DEFAULT_DB_ALIAS)
+
+
+class ReplicaRouter:
+    """
+    Sends reads made while serving a safe-method request to a replica (see
+    ReplicaRoutingMiddleware); everything else, including reads inside a
+    transaction, uses the primary. Replicas are never migrated: they are
+    copies of the primary.
+    """
+
+    def __init__(self, replicas=None):
+        self.replicas = replicas
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not state.use_replicas:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.alias is None:
+            state.alias = (self.replicas or replica_set).choose() or DEFAULT_DB_ALIAS
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db.startswith(REPLICA_PREFIX):
+            return False
+        return None
+
+
+def _replica_failure(execute, sql, params, many, context):
+    try:
+        return execute(sql, params, many, context)
+    except DatabaseError:
+        state = _routing.get()
+        if state is not None:
+            state.failed = True
+        raise
+
+
+@receiver(connection_created)
+def watch_replica(sender, connection, **kwargs):
+    if connection.alias.startswith(REPLICA_PREFIX) and _replica_failure not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_replica_failure)
+
+
+# ------------------------------
+# Middleware
+# ------------------------------
+def request_identities(request):
+    """Cache keys for the client: its user (from the JWT) if known, and its address."""
+    identities = []
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Bearer '):
+        try:
+            identities.append(f'user:{AccessToken(header[7:])[api_settings.USER_ID_CLAIM]}')
+        except (TokenError, KeyError):
+            pass
+    identities.append(f"ip:{request.META.get('REMOTE_ADDR', '')}")
+    return identities
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Routes safe-method requests to read replicas, unless the client wrote
+    something in the last DB_READ_YOUR_WRITES_SECONDS (read-your-writes).
+    A successful unsafe request pins its user (or, for anonymous clients,
+    its address) to the primary for that window. The pin lives in the
+    default cache, so use a shared backend with more than one worker.
+
+    If a replica fails while a safe request is being served, the replica
+    is marked down and the request is served again from the primary.
+    Does nothing when no replicas are configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not replica_set.aliases:
+            return self.get_response(request)
+        state, identities = self.start(request)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+            if self.should_retry(state):
+                response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response, identities)
+
+    async def __acall__(self, request):
+        if not replica_set.aliases:
+            return await self.get_response(request)
+        state, identities = self.start(request)
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+            if self.should_retry(state):
+                response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(request, response, identities)
+
+    def start(self, request):
+        identities = request_identities(request)
+        safe = request.method in SAFE_METHODS
+        pinned = safe and bool(cache.get_many([PIN_KEY.format(identity) for identity in identities]))
+        return RoutingState(use_replicas=safe and not pinned), identities
+
+    def should_retry(self, state):
+        if not state.failed or state.alias in (None, DEFAULT_DB_ALIAS):
+            return False
+        replica_set.mark_down(state.alias)
+        state.use_replicas = False
+        state.alias = None
+        state.failed = False
+        return True
+
+    def finish(self, request, response, identities):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # Pin the user when known, else the address (logins, registrations)
+            pin = identities[0] if len(identities) > 1 else identities[-1]
+            cache.set(PIN_KEY.format(pin), 1, read_your_writes_seconds())
+        return response
@@ -0,0 +1,235 @@
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .authentication import CachedJWTAuthentication
+
+DEFAULTS = {
+    'REPLAY_SIZE': 1000,
+    'QUEUE_SIZE': 500,
+    'KEEPALIVE': 15,
+    'RETRY_MS': 3000,
+    'MAX_SUBSCRIBERS': 1000,
+}
+TOPICS = ('maintenance', 'ticket')
+
+
+def event_settings():
+    return {**DEFAULTS, **getattr(settings, 'LIVE_EVENTS', {})}
+
+
+# ------------------------------
+# In-process pub/sub
+# ------------------------------
+class Subscriber:
+    """One stream's queue plus the filter it was opened with."""
+
+    def __init__(self, loop, user, topics, lab_id, queue_size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.user_id = user.pk
+        self.is_admin = user.role == 'admin'
+        self.topics = topics
+        self.lab_id = lab_id
+        self.overflowed = False
+
+    def accepts(self, event):
+        if event['topic'] not in self.topics:
+            return False
+        if self.lab_id is not None and event['lab'] != self.lab_id:
+            return False
+        # Students only hear about their own tickets
+        return self.is_admin or event['topic'] != 'ticket' or event['student'] == self.user_id
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: end the stream, the client resumes from the replay buffer
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBroker:
+    """
+    Fan-out of change events to the open streams of this process, with a
+    bounded replay buffer for Last-Event-ID resume. Event ids are
+    "<boot>-<seq>"; an id from another boot (server restart, another
+    worker) or older than the buffer cannot be resumed and the client is
+    told to refetch instead. Publishing is thread-safe and never blocks.
+    """
+
+    def __init__(self, replay_size=None):
+        self._lock = threading.Lock()
+        self._seq = itertools.count(1)
+        self._subscribers = set()
+        self.boot = format(time.time_ns() // 1000, 'x')
+        self.replay = deque(maxlen=replay_size or event_settings()['REPLAY_SIZE'])
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, topic, action, lab_id, data, student_id=None):
+        with self._lock:
+            seq = next(self._seq)
+            event = {
+                'id': f'{self.boot}-{seq}',
+                'seq': seq,
+                'topic': topic,
+                'type': f'{topic}.{action}',
+                'lab': lab_id,
+                'student': student_id,
+                'data': data,
+            }
+            self.replay.append(event)
+            self.published += 1
+            subscribers = [subscriber for subscriber in self._subscribers if subscriber.accepts(event)]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # Its event loop is gone without the stream's cleanup running
+                with self._lock:
+                    self._subscribers.discard(subscriber)
+                    self.dropped += 1
+        return event
+
+    def subscribe(self, subscriber, last_event_id=None):
+        """
+        Register ``subscriber`` and return (backlog, complete): the buffered
+        events after ``last_event_id`` it may see, and whether the buffer
+        still covered that id.
+        """
+        with self._lock:
+            if len(self._subscribers) >= event_settings()['MAX_SUBSCRIBERS']:
+                return None, False
+            self._subscribers.add(subscriber)
+            if not last_event_id:
+                return [], True
+            boot, _, seq = last_event_id.partition('-')
+            if boot != self.boot or not seq.isdigit():
+                return [], False
+            seq = int(seq)
+            buffered = list(self.replay)
+        complete = not buffered or buffered[0]['seq'] <= seq + 1
+        return [event for event in buffered if event['seq'] > seq and subscriber.accepts(event)], complete
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'published': self.published,
+                'buffered': len(self.replay),
+                'dropped': self.dropped,
+            }
+
+
+broker = EventBroker()
+
+
+def event_stats():
+    return broker.stats()
+
+
+def publish_on_commit(topic, action, lab_id, data, student_id=None):
+    """Publish once the surrounding transaction commits (immediately outside one)."""
+    transaction.on_commit(lambda: broker.publish(topic, action, lab_id, data, student_id))
+
+
+def format_event(event):
+    payload = json.dumps({'type': event['type'], 'lab': event['lab'], 'data': event['data']}, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+
+# ------------------------------
+# Stream endpoint
+# ------------------------------
+@require_GET
+async def event_stream(request):
+    """
+    GET /api/events/?topics=maintenance,ticket&lab=<id>&token=<access token>
+
+    Server-Sent Events for maintenance log and ticket creates/updates.
+    Admins receive everything; students receive maintenance updates and
+    their own tickets. Authenticate with the usual Bearer header or, for
+    EventSource (which cannot set headers), ?token=. Reconnecting clients
+    send Last-Event-ID and get the events they missed from the replay
+    buffer, or an "events.reset" event when that is no longer possible.
+
+    Needs an ASGI server (LMS.asgi:application, e.g. uvicorn or daphne);
+    each open stream costs a queue, not a thread. Events only reach clients
+    connected to the worker that made the change.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'The event stream is only served over ASGI.'}, status=501)
+
+    header = request.headers.get('Authorization', '')
+    raw_token = header[7:] if header.startswith('Bearer ') else request.GET.get('token')
+    if not raw_token:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    try:
+        authentication = CachedJWTAuthentication()
+        user = await authentication.aget_user(authentication.get_validated_token(raw_token.encode()))
+    except (AuthenticationFailed, InvalidToken, TokenError) as exc:
+        return JsonResponse({'detail': str(exc)}, status=401)
+
+    topics = {topic for topic in request.GET.get('topics', '').split(',') if topic} or set(TOPICS)
+    if not topics <= set(TOPICS):
+        return JsonResponse({'topics': f"Topics must be among: {', '.join(TOPICS)}"}, status=400)
+    lab_id = request.GET.get('lab')
+    if lab_id:
+        if not lab_id.isdigit():
+            return JsonResponse({'lab': 'Lab must be an integer id'}, status=400)
+        lab_id = int(lab_id)
+    else:
+        lab_id = None
+
+    config = event_settings()
+    subscriber = Subscriber(asyncio.get_running_loop(), user, topics, lab_id, config['QUEUE_SIZE'])
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    backlog, complete = broker.subscribe(subscriber, last_event_id)
+    if backlog is None:
+        return JsonResponse({'detail': 'Too many open event streams.'}, status=503)
+
+    async def stream():
+        try:
+            yield f"retry: {config['RETRY_MS']}\n\n"
+            if not complete:
+                yield 'event: events.reset\ndata: {}\n\n'
+            for event in backlog:
+                yield format_event(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), config['KEEPALIVE'])
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if event is None:
+                    break
+                yield format_event(event)
+        finally:
+            broker.unsubscribe(subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,150 @@
+import csv
+import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+
+from .permissions import IsAdminUser
+
+CHUNK_SIZE = 2000
+ROWS_PER_WRITE = 200
+
+OUTPUT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+# ------------------------------
+# Row encoders
+# ------------------------------
+class Echo:
+    """File-like object whose write() just returns the line for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(Echo())
+    # Header goes out before the first database round trip finishes
+    yield writer.writerow(header)
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow(row))
+        if len(batch) >= ROWS_PER_WRITE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def iter_ndjson(header, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(dict(zip(header, row))) + '\n')
+        if len(batch) >= ROWS_PER_WRITE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+async def aiter_chunks(chunks):
+    """
+    Serve a sync chunk generator to ASGI one chunk at a time. Given a sync
+    iterator, StreamingHttpResponse would read all of it with
+    sync_to_async(list) before sending the first byte.
+    """
+    next_chunk = sync_to_async(next)
+    done = object()
+    try:
+        while (chunk := await next_chunk(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
+
+
+# ------------------------------
+# Filters
+# ------------------------------
+def parse_bound(value, name, end=False):
+    """
+    Parse an ISO date or datetime query param into a (moment, lookup) pair.
+    A bare date used as the upper bound covers that whole day.
+    """
+    lookup = 'lte' if end else 'gte'
+    try:
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        if end:
+            day += datetime.timedelta(days=1)
+            lookup = 'lt'
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    elif moment is None:
+        raise ValidationError({name: 'Use an ISO date (YYYY-MM-DD) or datetime.'})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment, lookup
+
+
+# ------------------------------
+# Export view
+# ------------------------------
+class ExportView(APIView):
+    """
+    Stream a table as CSV (?output=csv, the default) or NDJSON
+    (?output=ndjson). Rows come from values_list().iterator() so memory
+    stays flat no matter how big the table is; under ASGI the chunks are
+    handed over as an async iterator so they are still streamed.
+
+    Filters: ?since= / ?until= (ISO date or datetime) on ``date_field``
+    and ?lab= on ``lab_field``.
+    """
+    permission_classes = [IsAdminUser]
+    queryset = None
+    fields = ()
+    date_field = None
+    lab_field = None
+    filename = 'export'
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        for name, end in (('since', False), ('until', True)):
+            if params.get(name):
+                moment, lookup = parse_bound(params[name], name, end=end)
+                queryset = queryset.filter(**{f'{self.date_field}__{lookup}': moment})
+        if params.get('lab'):
+            if not params['lab'].isdigit():
+                raise ValidationError({'lab': 'Lab must be an integer id'})
+            queryset = queryset.filter(**{self.lab_field: int(params['lab'])})
+        return queryset
+
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', 'csv')
+        if output not in OUTPUT_FORMATS:
+            raise ValidationError({'output': f"Choose one of: {', '.join(OUTPUT_FORMATS)}"})
+
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.order_by(self.date_field, 'id').values_list(*self.fields).iterator(chunk_size=CHUNK_SIZE)
+        encode = iter_csv if output == 'csv' else iter_ndjson
+
+        chunks = encode(self.fields, rows)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=OUTPUT_FORMATS[output])
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.{output}"'
+        return response
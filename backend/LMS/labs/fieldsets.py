@@ -0,0 +1,94 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+VIEWS = ('full', 'compact')
+
+
+class SparseFieldsetMixin:
+    """
+    Sparse fieldsets for GET requests on generic views.
+
+    - ``?fields=id,name`` keeps only those fields.
+    - ``?exclude=remarks,license_key`` drops those fields.
+    - ``?view=compact`` starts from the serializer's ``compact_fields``
+      (a short representation for tables and dropdowns) instead of every field.
+
+    The selection is passed to the serializer as context['fields'] (see
+    serializers.SparseFieldsMixin), and the queryset is narrowed with
+    only() to the columns those fields read, so unused TEXT columns are
+    never fetched. Fields the columns cannot be worked out for (methods,
+    dotted sources) switch the column narrowing off, never the output.
+    """
+
+    def get_fieldset(self):
+        """Requested field names in serializer order, or None for the full representation."""
+        if hasattr(self, '_fieldset'):
+            return self._fieldset
+        self._fieldset = None
+        self._fieldset_columns = None
+
+        params = self.request.query_params
+        if self.request.method != 'GET' or not any(key in params for key in ('fields', 'exclude', 'view')):
+            return None
+
+        view = params.get('view', 'full')
+        if view not in VIEWS:
+            raise ValidationError({'view': f"View must be one of: {', '.join(VIEWS)}."})
+
+        # Built while _fieldset is None, so this is the full representation
+        serializer = self.get_serializer()
+        available = list(serializer.fields)
+        requested = _split(params.get('fields', ''))
+        excluded = _split(params.get('exclude', ''))
+        unknown = (requested | excluded) - set(available)
+        if unknown:
+            key = 'fields' if unknown & requested else 'exclude'
+            raise ValidationError({key: f"Unknown field(s): {', '.join(sorted(unknown))}."})
+
+        if requested:
+            selected = [name for name in available if name in requested]
+        elif view == 'compact':
+            compact = getattr(serializer, 'compact_fields', ())
+            if not compact:
+                raise ValidationError({'view': 'This endpoint has no compact view.'})
+            selected = [name for name in available if name in compact]
+        else:
+            selected = available
+        selected = [name for name in selected if name not in excluded]
+
+        self._fieldset = tuple(selected)
+        self._fieldset_columns = self.get_fieldset_columns([serializer.fields[name] for name in selected])
+        return self._fieldset
+
+    def get_fieldset_columns(self, fields):
+        """Model fields to load for the selected serializer fields, or None to load them all."""
+        model = self.get_serializer_class().Meta.model
+        columns = {model._meta.pk.name, *(getattr(self, 'keyset_ordering', None) or ())}
+        for field in fields:
+            if field.source == '*' or '.' in field.source:
+                return None
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None
+            if model_field.concrete and not model_field.many_to_many:
+                columns.add(model_field.name)
+            # Reverse relations and many-to-many come from prefetches, not columns
+        return sorted(columns)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if getattr(self, '_fieldset', None) is not None:
+            context['fields'] = self._fieldset
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        self.get_fieldset()
+        if self._fieldset_columns and not queryset.query.select_related:
+            queryset = queryset.only(*self._fieldset_columns)
+        return queryset
+
+
+def _split(raw):
+    return {part.strip() for part in raw.split(',') if part.strip()}
@@ -0,0 +1,261 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from .inventory import QUANTITY_FIELDS, STATUS_FIELDS
+from .models import PC, Equipment, StatusCheckpoint, StatusCheckpointItem, StatusEvent
+
+EQUIPMENT = 'equipment'
+PCS = 'pc'
+MODELS = {EQUIPMENT: Equipment, PCS: PC}
+REMOVED = 'removed'
+UP_STATUS = 'working'
+# Checkpoints stop this far behind now, so transactions still open when
+# they are taken cannot commit events into an already checkpointed span
+SETTLE = datetime.timedelta(minutes=1)
+
+
+# ------------------------------
+# Recording
+# An item's state is (lab_id, equipment_type, status); PCs have no type.
+# ------------------------------
+def item_state(obj):
+    return (obj.lab_id, getattr(obj, 'equipment_type', None), obj.status)
+
+
+def states_of(kind, queryset):
+    """{object_id: state} for the rows of ``queryset`` (one query)."""
+    if kind == EQUIPMENT:
+        rows = queryset.order_by().values_list('pk', 'lab_id', 'equipment_type', 'status')
+        return {pk: (lab_id, equipment_type, status) for pk, lab_id, equipment_type, status in rows}
+    rows = queryset.order_by().values_list('pk', 'lab_id', 'status')
+    return {pk: (lab_id, None, status) for pk, lab_id, status in rows}
+
+
+def states_by_pk(kind, pks, chunk_size=500):
+    model = MODELS[kind]
+    pks = list(pks)
+    states = {}
+    for start in range(0, len(pks), chunk_size):
+        states.update(states_of(kind, model._base_manager.filter(pk__in=pks[start:start + chunk_size])))
+    return states
+
+
+def record(kind, states, at=None):
+    """Append one event per {object_id: state} entry."""
+    if not states:
+        return
+    at = at or timezone.now()
+    StatusEvent.objects.bulk_create(
+        [
+            StatusEvent(kind=kind, object_id=pk, lab_id=lab_id, equipment_type=equipment_type, status=status, at=at)
+            for pk, (lab_id, equipment_type, status) in states.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def record_changes(kind, before, after):
+    """Record the items of ``after`` whose state differs from ``before``."""
+    record(kind, {pk: state for pk, state in after.items() if before.get(pk) != state})
+
+
+def record_created(kind, objs):
+    """
+    Record rows inserted with bulk_create. Backends without RETURNING
+    (MySQL) leave pks unset; those rows are found by serial number, and
+    any left over are picked up by the next checkpoint's reconciliation.
+    """
+    states = {obj.pk: item_state(obj) for obj in objs if obj.pk is not None}
+    serials = [obj.serial_number for obj in objs if obj.pk is None and obj.serial_number]
+    if serials:
+        states.update(states_of(kind, MODELS[kind]._base_manager.filter(serial_number__in=serials)))
+    record(kind, states)
+
+
+# ------------------------------
+# Replay
+# Replayed state is {(kind, object_id): state} of the items that exist.
+# ------------------------------
+def checkpoint_bounds(at):
+    """(first checkpoint time, latest checkpoint time <= at) in one query."""
+    bounds = StatusCheckpoint.objects.aggregate(
+        first=Min('taken_at'),
+        latest=Max('taken_at', filter=Q(taken_at__lte=at)),
+    )
+    return bounds['first'], bounds['latest']
+
+
+def replay(since, until, kind=None, lab_id=None):
+    """
+    The state in the checkpoint taken at ``since`` (None: no checkpoint)
+    and an iterator over the events of (since, until] in order, optionally
+    for one ``kind``. With ``lab_id`` only that lab's checkpoint rows are
+    read; events carry the full state, so items moving in are still seen.
+    """
+    state = {}
+    if since is not None:
+        items = StatusCheckpointItem.objects.filter(checkpoint__taken_at=since)
+        if kind is not None:
+            items = items.filter(kind=kind)
+        if lab_id is not None:
+            items = items.filter(lab_id=lab_id)
+        rows = items.values_list('kind', 'object_id', 'lab_id', 'equipment_type', 'status')
+        for item_kind, pk, item_lab, equipment_type, status in rows.iterator(chunk_size=2000):
+            state[item_kind, pk] = (item_lab, equipment_type, status)
+
+    events = StatusEvent.objects.filter(at__lte=until)
+    if kind is not None:
+        events = events.filter(kind=kind)
+    if since is not None:
+        events = events.filter(at__gt=since)
+    events = events.order_by('at', 'id').values_list('kind', 'object_id', 'lab_id', 'equipment_type', 'status', 'at')
+    return state, events.iterator(chunk_size=2000)
+
+
+def apply_event(state, key, item):
+    if item[2] == REMOVED:
+        state.pop(key, None)
+    else:
+        state[key] = item
+
+
+def inventory_at(at, lab_id=None):
+    """
+    Equipment per (lab, equipment_type) and PCs per lab as they stood at
+    ``at``, counted like the Inventory table, from the latest checkpoint
+    at or before ``at`` plus the events since. Three queries.
+    """
+    first, latest = checkpoint_bounds(at)
+    state, events = replay(latest, at, lab_id=lab_id)
+    replayed = 0
+    for kind, pk, event_lab, equipment_type, status, _ in events:
+        apply_event(state, (kind, pk), (event_lab, equipment_type, status))
+        replayed += 1
+
+    buckets = {EQUIPMENT: {}, PCS: {}}
+    for (kind, _), (item_lab, equipment_type, status) in state.items():
+        if lab_id is not None and item_lab != lab_id:
+            continue
+        key = (item_lab, equipment_type) if kind == EQUIPMENT else item_lab
+        bucket = buckets[kind].setdefault(key, dict.fromkeys(QUANTITY_FIELDS, 0))
+        bucket['total_quantity'] += 1
+        if status in STATUS_FIELDS:
+            bucket[STATUS_FIELDS[status]] += 1
+    return {
+        'at': at,
+        'history_starts': first,
+        'checkpoint': latest,
+        'events_replayed': replayed,
+        'equipment': [
+            {'lab': item_lab, 'equipment_type': equipment_type, **counts}
+            for (item_lab, equipment_type), counts in sorted(buckets[EQUIPMENT].items())
+        ],
+        'pcs': [{'lab': item_lab, **counts} for item_lab, counts in sorted(buckets[PCS].items())],
+    }
+
+
+def uptime(kind, start, end, lab_id=None):
+    """
+    Per item of ``kind``: the seconds of [start, end] it existed (in
+    ``lab_id``, when given), how many of those it was "working", and its
+    transitions in the range. Reads the checkpoint before ``start`` and
+    the events up to ``end``. Three queries.
+    """
+    _, latest = checkpoint_bounds(start)
+    state, events = replay(latest, end, kind=kind, lab_id=lab_id)
+    # (kind, object_id) -> [tracked seconds, up seconds, transitions]
+    totals = {}
+    cursor = {}
+
+    def account(key, until):
+        item = state.get(key)
+        since = cursor.get(key, start)
+        if item is None or (lab_id is not None and item[0] != lab_id) or until <= since:
+            return
+        seconds = (until - since).total_seconds()
+        entry = totals.setdefault(key, [0.0, 0.0, 0])
+        entry[0] += seconds
+        if item[2] == UP_STATUS:
+            entry[1] += seconds
+
+    for event_kind, pk, event_lab, equipment_type, status, at in events:
+        key = (event_kind, pk)
+        if at > start:
+            account(key, at)
+            cursor[key] = at
+            previous = state.get(key)
+            if lab_id is None or event_lab == lab_id or (previous is not None and previous[0] == lab_id):
+                totals.setdefault(key, [0.0, 0.0, 0])[2] += 1
+        apply_event(state, key, (event_lab, equipment_type, status))
+    for key in state:
+        account(key, end)
+
+    return [
+        {
+            'id': pk,
+            'tracked_seconds': round(tracked),
+            'up_seconds': round(up),
+            'uptime_pct': round(up / tracked * 100, 2) if tracked else None,
+            'transitions': transitions,
+        }
+        for (_, pk), (tracked, up, transitions) in sorted(totals.items())
+    ]
+
+
+# ------------------------------
+# Checkpoints
+# ------------------------------
+def take_checkpoint(now=None, settle=SETTLE):
+    """
+    Snapshot every item's state at ``now - settle`` by folding the events
+    since the previous checkpoint into it, so a snapshot always agrees
+    with the event log. Items whose live row disagrees with the log
+    (changed behind the ORM, or bulk-inserted without a pk on MySQL) get a
+    correcting event at ``now`` first. Returns (checkpoint, items,
+    corrections); checkpoint is None if one already covers that time.
+    """
+    now = now or timezone.now()
+    taken_at = now - settle
+    with transaction.atomic():
+        _, previous = checkpoint_bounds(taken_at)
+        if previous == taken_at:
+            return None, 0, 0
+        state, events = replay(previous, now)
+        snapshot = None
+        for kind, pk, event_lab, equipment_type, status, at in events:
+            if snapshot is None and at > taken_at:
+                snapshot = dict(state)
+            apply_event(state, (kind, pk), (event_lab, equipment_type, status))
+        if snapshot is None:
+            snapshot = dict(state)
+
+        corrections = 0
+        for kind, model in MODELS.items():
+            live = states_of(kind, model._base_manager.all())
+            logged = {pk: item for (item_kind, pk), item in state.items() if item_kind == kind}
+            drift = {pk: item for pk, item in live.items() if logged.get(pk) != item}
+            drift.update({pk: (item[0], item[1], REMOVED) for pk, item in logged.items() if pk not in live})
+            record(kind, drift, at=now)
+            corrections += len(drift)
+
+        checkpoint = StatusCheckpoint.objects.create(taken_at=taken_at)
+        StatusCheckpointItem.objects.bulk_create(
+            (
+                StatusCheckpointItem(checkpoint=checkpoint, kind=kind, object_id=pk,
+                                     lab_id=item_lab, equipment_type=equipment_type, status=status)
+                for (kind, pk), (item_lab, equipment_type, status) in snapshot.items()
+            ),
+            batch_size=1000,
+        )
+    return checkpoint, len(snapshot), corrections
+
+
+def prune_checkpoints(keep):
+    """Delete all but the ``keep`` newest checkpoints and the first one (where history starts)."""
+    checkpoints = list(StatusCheckpoint.objects.order_by('-taken_at').values_list('pk', flat=True))
+    doomed = checkpoints[keep:-1]
+    StatusCheckpoint.objects.filter(pk__in=doomed).delete()
+    return len(doomed)
@@ -0,0 +1,228 @@
+import codecs
+import csv
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+
+from .models import PC, Equipment, Software
+from .search import reindex
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+CSV_CONTENT_TYPES = ('text/csv', 'application/csv')
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/x-jsonlines')
+
+
+# ------------------------------
+# Streaming row readers
+# ------------------------------
+def iter_text_lines(stream):
+    """Decode a binary request stream line by line without buffering it."""
+    if stream is None:
+        return iter(())
+    return codecs.iterdecode(iter(stream.readline, b''), 'utf-8-sig')
+
+
+def iter_csv_rows(lines):
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def iter_ndjson_rows(lines):
+    for line_num, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            yield line_num, None
+        else:
+            yield line_num, row
+
+
+def row_reader(content_type, stream):
+    """Return a (line_number, dict) iterator for the body, or None if unsupported."""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    lines = iter_text_lines(stream)
+    if content_type in CSV_CONTENT_TYPES:
+        return iter_csv_rows(lines)
+    if content_type in NDJSON_CONTENT_TYPES:
+        return iter_ndjson_rows(lines)
+    return None
+
+
+# ------------------------------
+# Bulk importer
+# ------------------------------
+class BulkImporter:
+    """
+    Validate rows as they stream in and insert them with chunked
+    bulk_create. Foreign keys and the unique field are checked with one
+    batched query per chunk instead of one query per row.
+    """
+
+    def __init__(self, model, fields, unique_field=None, defaults=None):
+        self.model = model
+        self.fields = [model._meta.get_field(name) for name in fields]
+        self.unique_field = unique_field
+        self.defaults = defaults or {}
+
+        self.rows = 0
+        self.created = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.errors = []
+        self.seen_unique = set()
+
+    def report_error(self, line, errors, duplicate=False):
+        if duplicate:
+            self.duplicates += 1
+        else:
+            self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def clean_row(self, data):
+        values, errors = {}, {}
+        for field in self.fields:
+            raw = data.get(field.name)
+            if raw in ('', None):
+                raw = self.defaults.get(field.name)
+            if raw in ('', None):
+                raw = None
+
+            if field.is_relation:
+                if raw is None:
+                    if not field.null:
+                        errors[field.name] = ['This field is required.']
+                    values[field.attname] = None
+                    continue
+                try:
+                    values[field.attname] = int(raw)
+                except (TypeError, ValueError):
+                    errors[field.name] = ['Must be an integer id.']
+                continue
+
+            if raw is None and field.has_default():
+                values[field.attname] = field.get_default()
+                continue
+            try:
+                values[field.attname] = field.clean(raw, None)
+            except DjangoValidationError as exc:
+                errors[field.name] = exc.messages
+        return values, errors
+
+    def run(self, rows, dry_run=False):
+        with transaction.atomic():
+            pending = []
+            for line, data in rows:
+                self.rows += 1
+                if data is None:
+                    self.report_error(line, {'non_field_errors': ['Row is not a JSON object.']})
+                    continue
+
+                values, errors = self.clean_row(data)
+                if errors:
+                    self.report_error(line, errors)
+                    continue
+
+                if self.unique_field and values.get(self.unique_field) is not None:
+                    key = values[self.unique_field]
+                    if key in self.seen_unique:
+                        self.report_error(line, {self.unique_field: ['Duplicate value in this file.']}, duplicate=True)
+                        continue
+                    self.seen_unique.add(key)
+
+                pending.append((line, values))
+                if len(pending) >= CHUNK_SIZE:
+                    self.flush(pending)
+                    pending = []
+            self.flush(pending)
+
+            if dry_run:
+                transaction.set_rollback(True)
+        return self.summary(dry_run)
+
+    def flush(self, pending):
+        if not pending:
+            return
+
+        invalid = {}
+        for field in self.fields:
+            if not field.is_relation:
+                continue
+            ids = {values[field.attname] for _, values in pending if values[field.attname] is not None}
+            existing = set(
+                field.related_model._base_manager.filter(pk__in=ids).values_list('pk', flat=True)
+            )
+            for line, values in pending:
+                if values[field.attname] is not None and values[field.attname] not in existing:
+                    invalid.setdefault(line, {})[field.name] = [f'{field.related_model.__name__} not found.']
+
+        taken = set()
+        if self.unique_field:
+            keys = {values[self.unique_field] for _, values in pending if values.get(self.unique_field) is not None}
+            taken = set(
+                self.model._base_manager.filter(**{f'{self.unique_field}__in': keys})
+                .values_list(self.unique_field, flat=True)
+            )
+
+        objs = []
+        for line, values in pending:
+            if line in invalid:
+                self.report_error(line, invalid[line])
+            elif self.unique_field and values.get(self.unique_field) in taken:
+                self.report_error(line, {self.unique_field: ['Already exists.']}, duplicate=True)
+            else:
+                objs.append(self.model(**values))
+
+        self.model.objects.bulk_create(objs, batch_size=CHUNK_SIZE)
+        # bulk_create sends no post_save signals
+        self.index(objs)
+        self.created += len(objs)
+
+    def index(self, objs):
+        ids = [obj.pk for obj in objs if obj.pk is not None]
+        if len(ids) < len(objs) and self.unique_field:
+            # Backends without RETURNING (MySQL) leave pks unset
+            keys = [getattr(obj, self.unique_field) for obj in objs if getattr(obj, self.unique_field) is not None]
+            ids = self.model.objects.filter(**{f'{self.unique_field}__in': keys}).values_list('pk', flat=True)
+        reindex(self.model, ids)
+
+    def summary(self, dry_run=False):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'duplicates': self.duplicates,
+            'failed': self.failed,
+            'dry_run': dry_run,
+            'errors': self.errors,
+            'errors_truncated': self.failed + self.duplicates > len(self.errors),
+        }
+
+
+IMPORTERS = {
+    'equipment': lambda defaults: BulkImporter(
+        Equipment,
+        ('lab', 'equipment_type', 'brand', 'model_name', 'serial_number', 'location_in_lab', 'price', 'status'),
+        unique_field='serial_number',
+        defaults=defaults,
+    ),
+    'pcs': lambda defaults: BulkImporter(
+        PC,
+        ('lab', 'name', 'status', 'brand', 'serial_number'),
+        unique_field='serial_number',
+        defaults=defaults,
+    ),
+    'software': lambda defaults: BulkImporter(
+        Software,
+        ('pc', 'name', 'version', 'license_key', 'expiry_date'),
+        defaults=defaults,
+    ),
+}
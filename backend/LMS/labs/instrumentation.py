@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+
+# ------------------------------
+# Per-request recording
+# ------------------------------
+class QueryRecorder:
+    """execute_wrapper that counts queries and the time spent in the database."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# The request's recorder travels in a context variable rather than being
+# wrapped around connections per request: the async ORM runs queries on a
+# shared worker thread with its own connections, and contextvars follow
+# sync_to_async there while per-connection wrappers do not.
+_current_recorder = ContextVar('query_recorder', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def query_budget(url_name):
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+
+
+def record_request(url_name, queries, db_time, render_time, total_time, size, auth_queries=0):
+    budget = query_budget(url_name)
+    # Budgets assume a warm JWT user cache; user loads are not charged
+    charged = queries - auth_queries
+    over_budget = budget is not None and charged > budget
+    with _metrics_lock:
+        entry = _metrics.setdefault(url_name, {
+            'requests': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0,
+            'render_ms': 0.0, 'total_ms': 0.0, 'bytes': 0, 'over_budget': 0,
+        })
+        entry['requests'] += 1
+        entry['queries'] += queries
+        entry['max_queries'] = max(entry['max_queries'], queries)
+        entry['db_ms'] += db_time * 1000
+        entry['render_ms'] += render_time * 1000
+        entry['total_ms'] += total_time * 1000
+        entry['bytes'] += size or 0
+        entry['over_budget'] += int(over_budget)
+    if over_budget:
+        logger.warning("%s ran %d queries (budget %d)", url_name, charged, budget)
+    return over_budget
+
+
+def request_metrics():
+    """Per-endpoint averages collected by this process."""
+    with _metrics_lock:
+        snapshot = {name: dict(entry) for name, entry in _metrics.items()}
+    summary = {}
+    for name, entry in sorted(snapshot.items()):
+        n = entry['requests']
+        summary[name] = {
+            'requests': n,
+            'avg_queries': round(entry['queries'] / n, 2),
+            'max_queries': entry['max_queries'],
+            'query_budget': query_budget(name),
+            'over_budget': entry['over_budget'],
+            'avg_db_ms': round(entry['db_ms'] / n, 3),
+            'avg_render_ms': round(entry['render_ms'] / n, 3),
+            'avg_total_ms': round(entry['total_ms'] / n, 3),
+            'avg_bytes': round(entry['bytes'] / n),
+        }
+    return summary
+
+
+def reset_request_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+# ------------------------------
+# Middleware
+# ------------------------------
+class RequestMetricsMiddleware:
+    """
+    Record query count, DB time, render time and response size per
+    request, tagged with the resolved URL name. Render time covers DRF's
+    Response.render() only; serializer .data runs inside the view and
+    shows up in the total (and in db time for its queries). In DEBUG the
+    numbers are also returned as a Server-Timing header. Runs natively in
+    both the WSGI and ASGI stacks, so async views keep their event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        recorder, token, start = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        recorder, token, start = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    def start(self, request):
+        recorder = QueryRecorder()
+        request._render_time = 0.0
+        return recorder, _current_recorder.set(recorder), time.perf_counter()
+
+    def finish(self, request, response, recorder, total_time):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.url_name:
+            return response
+
+        # Views may report a variant (e.g. "lab-detail:expand") with its own budget.
+        # Budgets describe reads; writes are tracked as "<name>:<METHOD>", which
+        # only has a budget if QUERY_BUDGETS lists one.
+        url_name = getattr(request, 'metrics_name', None) or match.url_name
+        if request.method not in SAFE_METHODS:
+            url_name = f'{match.url_name}:{request.method}'
+        auth_queries = getattr(request, 'auth_queries', 0)
+        size = None if response.streaming else len(response.content)
+        over_budget = record_request(
+            url_name, recorder.count, recorder.duration, request._render_time, total_time, size, auth_queries,
+        )
+
+        if settings.DEBUG:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={recorder.duration * 1000:.2f};desc="{recorder.count} queries"',
+                f'render;dur={request._render_time * 1000:.2f}',
+                f'total;dur={total_time * 1000:.2f}',
+            ])
+            if over_budget:
+                response['X-Query-Budget'] = f'exceeded ({recorder.count - auth_queries}/{query_budget(url_name)})'
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        started = time.perf_counter()
+
+        def rendered(_response):
+            request._render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
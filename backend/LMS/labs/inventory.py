@@ -0,0 +1,150 @@
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from rest_framework.exceptions import ValidationError
+
+from .models import Equipment, Inventory
+
+STATUS_FIELDS = {
+    'working': 'working_quantity',
+    'not_working': 'not_working_quantity',
+    'under_repair': 'under_repair_quantity',
+}
+QUANTITY_FIELDS = ('total_quantity',) + tuple(STATUS_FIELDS.values())
+
+
+# ------------------------------
+# Inventory aggregation helpers
+# ------------------------------
+def aggregate_inventory(equipment_qs=None):
+    """
+    Group equipment by (lab, equipment_type) and count every status bucket
+    in a single SQL query. Returns a values() queryset of dicts shaped like
+    the Inventory model (lab, equipment_type, *_quantity).
+    """
+    if equipment_qs is None:
+        equipment_qs = Equipment.objects.all()
+    return (
+        equipment_qs
+        .order_by()
+        .values('lab', 'equipment_type')
+        .annotate(
+            total_quantity=Count('id'),
+            working_quantity=Count('id', filter=Q(status='working')),
+            not_working_quantity=Count('id', filter=Q(status='not_working')),
+            under_repair_quantity=Count('id', filter=Q(status='under_repair')),
+        )
+        .order_by('lab', 'equipment_type')
+    )
+
+
+def inventory_queryset(params):
+    """
+    Rows of the materialized Inventory table for the inventory API,
+    filtered by the ?lab= and ?equipment_type= query parameters.
+    """
+    queryset = Inventory.objects.filter(total_quantity__gt=0)
+
+    lab_id = params.get('lab')
+    if lab_id:
+        if not lab_id.isdigit():
+            raise ValidationError({'lab': 'Lab must be an integer id'})
+        queryset = queryset.filter(lab_id=int(lab_id))
+
+    equipment_type = params.get('equipment_type')
+    if equipment_type:
+        if equipment_type not in dict(Equipment.EQUIPMENT_TYPES):
+            raise ValidationError({'equipment_type': 'Unknown equipment type'})
+        queryset = queryset.filter(equipment_type=equipment_type)
+
+    return queryset.values('lab', 'equipment_type', *QUANTITY_FIELDS).order_by('lab', 'equipment_type')
+
+
+def inventory_row(row):
+    """Add the composite "<lab>_<type>" id used by the inventory API."""
+    return {'id': f"{row['lab']}_{row['equipment_type']}", **row}
+
+
+# ------------------------------
+# Materialized Inventory maintenance
+# ------------------------------
+def apply_inventory_deltas(deltas):
+    """
+    Apply {(lab_id, equipment_type, status): +/-n} changes to the Inventory
+    table with one F()-expression UPDATE per touched bucket.
+    """
+    buckets = defaultdict(Counter)
+    for (lab_id, equipment_type, status), n in deltas.items():
+        if not n:
+            continue
+        bucket = buckets[(lab_id, equipment_type)]
+        bucket['total_quantity'] += n
+        if status in STATUS_FIELDS:
+            bucket[STATUS_FIELDS[status]] += n
+
+    for (lab_id, equipment_type), changes in buckets.items():
+        changes = {field: n for field, n in changes.items() if n}
+        if not changes:
+            continue
+        bucket = Inventory.objects.filter(lab_id=lab_id, equipment_type=equipment_type)
+        expressions = {field: F(field) + n for field, n in changes.items()}
+        if bucket.update(**expressions) or changes.get('total_quantity', 0) <= 0:
+            continue
+        try:
+            with transaction.atomic():
+                Inventory.objects.create(lab_id=lab_id, equipment_type=equipment_type, **changes)
+        except IntegrityError:
+            # Another writer created the bucket first
+            bucket.update(**expressions)
+
+
+def refresh_inventory(keys=None, fix=True):
+    """
+    Recount the given (lab_id, equipment_type) buckets from Equipment, or
+    every bucket when keys is None. Returns a drift report listing the
+    buckets whose stored counts were wrong; with fix=False nothing is written.
+    """
+    equipment = Equipment.objects.all()
+    stored = Inventory.objects.all()
+    if keys is not None:
+        keys = set(keys)
+        if not keys:
+            return []
+        labs = {lab_id for lab_id, _ in keys}
+        types = {equipment_type for _, equipment_type in keys}
+        equipment = equipment.filter(lab_id__in=labs, equipment_type__in=types)
+        stored = stored.filter(lab_id__in=labs, equipment_type__in=types)
+
+    expected = {
+        (row['lab'], row['equipment_type']): row
+        for row in aggregate_inventory(equipment)
+    }
+    current = {
+        (row['lab'], row['equipment_type']): row
+        for row in stored.values('id', 'lab', 'equipment_type', *QUANTITY_FIELDS)
+    }
+    if keys is None:
+        keys = set(expected) | set(current)
+
+    drift = []
+    for key in sorted(keys, key=lambda k: (k[0], k[1])):
+        want = expected.get(key)
+        have = current.get(key)
+        want_counts = {field: want[field] for field in QUANTITY_FIELDS} if want else None
+        have_counts = {field: have[field] for field in QUANTITY_FIELDS} if have else None
+        if have_counts and not have_counts['total_quantity'] and want_counts is None:
+            # Empty buckets left behind by deltas are not drift
+            have_counts = None
+        if want_counts == have_counts:
+            continue
+        drift.append({'lab': key[0], 'equipment_type': key[1], 'expected': want_counts, 'stored': have_counts})
+        if not fix:
+            continue
+        if want_counts is None:
+            Inventory.objects.filter(id=have['id']).delete()
+        elif have is None:
+            Inventory.objects.create(lab_id=key[0], equipment_type=key[1], **want_counts)
+        else:
+            Inventory.objects.filter(id=have['id']).update(**want_counts)
+    return drift
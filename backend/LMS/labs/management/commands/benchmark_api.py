@@ -0,0 +1,109 @@
+import json
+import platform
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from labs import urls as labs_urls
+from labs.benchmarks import bench_admin, compare_reports, jwt_client, measure, write_report
+from labs.models import User, Lab, PC, Software, Equipment, MaintenanceLog
+from tickets import urls as tickets_urls
+from tickets.models import Ticket
+
+# URL kwarg -> model whose first row is used to fill it in
+DETAIL_MODELS = {
+    'user-detail': User,
+    'lab-detail': Lab,
+    'pc-detail': PC,
+    'software-detail': Software,
+    'equipment-detail': Equipment,
+    'maintenance-log-detail': MaintenanceLog,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every GET endpoint in labs.urls and tickets.urls through the Django test "
+        "client with JWT auth and report p50/p95 latency, queries and peak memory as JSON. "
+        "Use --compare BASE NEW to diff two reports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--user', default='bench-admin', help="Admin user to authenticate as (created if missing).")
+        parser.add_argument('--endpoint', action='append', dest='endpoints', help="Only run these URL names (repeatable).")
+        parser.add_argument('--cold', action='store_true', help="Clear the response cache before every request.")
+        parser.add_argument('--include-exports', action='store_true', help="Also stream the full export endpoints.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help="Diff two saved reports and exit.")
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            base_path, new_path = options['compare']
+            with open(base_path) as fh:
+                base = json.load(fh)
+            with open(new_path) as fh:
+                new = json.load(fh)
+            write_report(compare_reports(base, new), options['output'], self.stdout)
+            return
+
+        try:
+            user = bench_admin(options['user'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        client = jwt_client(user)
+
+        before = cache.clear if options['cold'] else None
+        endpoints = {}
+        for name, url in self.endpoint_urls(options):
+            self.stderr.write(f"{name} {url}")
+            endpoints[name] = measure(client, url, options['iterations'], options['warmup'], before=before)
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'iterations': options['iterations'],
+                'cold': options['cold'],
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'rows': {
+                    'labs': Lab.objects.count(),
+                    'pcs': PC.objects.count(),
+                    'equipment': Equipment.objects.count(),
+                    'software': Software.objects.count(),
+                    'maintenance_logs': MaintenanceLog.objects.count(),
+                    'tickets': Ticket.objects.count(),
+                },
+            },
+            'endpoints': endpoints,
+        }
+        write_report(report, options['output'], self.stdout)
+
+    def endpoint_urls(self, options):
+        lab = Lab.objects.order_by('id').first()
+        for pattern in labs_urls.urlpatterns + tickets_urls.urlpatterns:
+            name = pattern.name
+            view_class = getattr(pattern.callback, 'view_class', None)
+            if not name or view_class is None or not hasattr(view_class, 'get'):
+                continue
+            if options['endpoints'] and name not in options['endpoints']:
+                continue
+            if name.endswith('-export') and not options['include_exports']:
+                continue
+
+            kwargs = {}
+            if 'lab_id' in pattern.pattern.converters:
+                if lab is None:
+                    continue
+                kwargs['lab_id'] = lab.pk
+            if 'pk' in pattern.pattern.converters:
+                model = DETAIL_MODELS.get(name)
+                obj = model.objects.order_by('id').first() if model else None
+                if obj is None:
+                    continue
+                kwargs['pk'] = obj.pk
+            yield name, reverse(name, kwargs=kwargs or None)
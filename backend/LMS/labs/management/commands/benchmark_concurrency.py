@@ -0,0 +1,157 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from labs.authentication import LabsRefreshToken
+from labs.benchmarks import bench_admin, summarize, write_report
+
+# Endpoint name -> path below /api/ (sync) and /api/async/ (async)
+ENDPOINTS = {
+    'labs': 'labs/',
+    'pcs': 'pcs/',
+    'equipment': 'equipment/',
+    'maintenance': 'maintenance/',
+    'tickets': 'tickets/',
+    'inventory': 'inventory/',
+}
+SYNC_PATHS = {'tickets': '/api/tickets/my/'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the WSGI and ASGI applications in-process with many concurrent clients and "
+        "report throughput and latency as JSON for three stacks: sync views under WSGI with "
+        "a fixed worker thread pool, sync views under ASGI, and labs.async_views under ASGI. "
+        "No sockets are involved, so the numbers isolate the request-handling model."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200, help="Concurrent clients.")
+        parser.add_argument('--requests', type=int, default=10, help="Requests per client.")
+        parser.add_argument('--wsgi-threads', type=int, default=32, help="Worker threads for the WSGI run.")
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='maintenance')
+        parser.add_argument('--query', default='count=false', help="Query string added to every request.")
+        parser.add_argument('--user', default='bench-admin')
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        from LMS.asgi import application as asgi_app
+        from LMS.wsgi import application as wsgi_app
+
+        try:
+            user = bench_admin(options['user'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.token = str(LabsRefreshToken.for_user(user).access_token)
+        self.options = options
+
+        name = options['endpoint']
+        sync_path = SYNC_PATHS.get(name, f'/api/{ENDPOINTS[name]}')
+        async_path = f'/api/async/{ENDPOINTS[name]}'
+        keys = ('clients', 'requests', 'wsgi_threads', 'endpoint', 'query')
+        report = {'meta': {key: options[key] for key in keys}}
+        report['wsgi_sync'] = asyncio.run(self.run(self.wsgi_caller(wsgi_app), sync_path))
+        self.pool.shutdown()
+        report['asgi_sync'] = asyncio.run(self.run(self.asgi_caller(asgi_app), sync_path))
+        report['asgi_async'] = asyncio.run(self.run(self.asgi_caller(asgi_app), async_path))
+        write_report(report, options['output'], self.stdout)
+
+    async def run(self, call, path):
+        latencies = []
+        statuses = {}
+
+        async def client():
+            for _ in range(self.options['requests']):
+                start = time.perf_counter()
+                status = await call(path)
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        # One warm-up request loads the JWT user cache and opens connections
+        await call(path)
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(self.options['clients'])))
+        elapsed = time.perf_counter() - started
+        return {
+            'path': path,
+            'requests': len(latencies),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(len(latencies) / elapsed, 1),
+            'latency': summarize(latencies),
+            'status': {str(code): count for code, count in sorted(statuses.items())},
+        }
+
+    def wsgi_caller(self, app):
+        pool = self.pool = ThreadPoolExecutor(max_workers=self.options['wsgi_threads'])
+
+        def request(path):
+            status = []
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': path,
+                'QUERY_STRING': self.options['query'],
+                'SERVER_NAME': 'localhost',
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'localhost',
+                'HTTP_AUTHORIZATION': f'Bearer {self.token}',
+                'REMOTE_ADDR': '127.0.0.1',
+                'wsgi.url_scheme': 'http',
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': io.StringIO(),
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            result = app(environ, lambda code, headers, exc_info=None: status.append(int(code.split()[0])))
+            try:
+                for _ in result:
+                    pass
+            finally:
+                result.close()
+            return status[0]
+
+        async def call(path):
+            return await asyncio.get_running_loop().run_in_executor(pool, request, path)
+        return call
+
+    def asgi_caller(self, app):
+        async def call(path):
+            done = asyncio.Event()
+            status = []
+            body_sent = False
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': self.options['query'].encode(),
+                'root_path': '',
+                'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {self.token}'.encode())],
+                'client': ('127.0.0.1', 50000),
+                'server': ('localhost', 80),
+            }
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                    done.set()
+
+            await app(scope, receive, send)
+            return status[0]
+        return call
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+
+from labs.benchmarks import bench_admin, jwt_client, summarize, write_report
+from labs.throttling import reset_throttles, throttle_settings, throttle_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Flood the login endpoint with bad passwords from several threads while other "
+        "threads make authenticated API reads, once without and once with the login "
+        "throttle, and report the readers' p50/p95 latency for each run as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per scenario.")
+        parser.add_argument('--attackers', type=int, default=4)
+        parser.add_argument('--targets', type=int, default=2, help="Usernames the attackers cycle through.")
+        parser.add_argument('--rate', type=float, default=20.0, help="Login attempts per second per attacker (0 = unpaced).")
+        parser.add_argument('--readers', type=int, default=2)
+        parser.add_argument('--read-url', default='/api/labs/')
+        parser.add_argument('--login-url', default='/api/login/')
+        parser.add_argument('--user', default='bench-admin')
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            self.user = bench_admin(options['user'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.options = options
+
+        keys = ('duration', 'attackers', 'targets', 'rate', 'readers', 'read_url', 'login_url')
+        report = {'meta': {key: options[key] for key in keys}}
+        report['quiet'] = self.run_scenario(attackers=0, throttled=True)
+        report['flood_unthrottled'] = self.run_scenario(attackers=options['attackers'], throttled=False)
+        report['flood_throttled'] = self.run_scenario(attackers=options['attackers'], throttled=True)
+        write_report(report, options['output'], self.stdout)
+
+    def run_scenario(self, attackers, throttled):
+        config = {**throttle_settings(), 'ENABLED': throttled}
+        reset_throttles()
+        stop = threading.Event()
+        read_latencies = []
+        login_latencies = []
+        login_status = {}
+        lock = threading.Lock()
+
+        def reader():
+            client = jwt_client(self.user)
+            try:
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    client.get(self.options['read_url'])
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        read_latencies.append(elapsed)
+            finally:
+                connections.close_all()
+
+        def attacker(n):
+            client = Client(HTTP_HOST='localhost', REMOTE_ADDR=f'10.0.0.{n % 4 + 1}')
+            interval = 1 / self.options['rate'] if self.options['rate'] else 0
+            attempt = 0
+            try:
+                while not stop.is_set():
+                    attempt += 1
+                    start = time.perf_counter()
+                    response = client.post(
+                        self.options['login_url'],
+                        {'username': f"{self.user.username}-{attempt % self.options['targets']}", 'password': 'wrong'},
+                        content_type='application/json',
+                    )
+                    elapsed = (time.perf_counter() - start) * 1000
+                    with lock:
+                        login_latencies.append(elapsed)
+                        login_status[response.status_code] = login_status.get(response.status_code, 0) + 1
+                    stop.wait(max(0, interval - elapsed / 1000))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=reader) for _ in range(self.options['readers'])]
+        threads += [threading.Thread(target=attacker, args=(n,)) for n in range(attackers)]
+        with override_settings(LOGIN_THROTTLE=config):
+            for thread in threads:
+                thread.start()
+            time.sleep(self.options['duration'])
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        result = {
+            'throttled': throttled,
+            'attackers': attackers,
+            'reads': len(read_latencies),
+            'read_latency': summarize(read_latencies) if read_latencies else None,
+            'logins': len(login_latencies),
+            'login_status': {str(code): count for code, count in sorted(login_status.items())},
+            'login_latency': summarize(login_latencies) if login_latencies else None,
+        }
+        if throttled:
+            result['throttle'] = throttle_stats()
+        return result
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from labs.benchmarks import bench_admin, jwt_client, measure, summarize, write_report
+from labs.serializers import LabSerializer, PCSerializer, SoftwareSerializer, EquipmentSerializer, MaintenanceLogSerializer
+
+# URL name -> serializer whose compact_fields the list view serves
+ENDPOINTS = {
+    'lab-list': LabSerializer,
+    'pc-list': PCSerializer,
+    'software-list': SoftwareSerializer,
+    'equipment-list': EquipmentSerializer,
+    'maintenance-log-list': MaintenanceLogSerializer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare full and ?view=compact list pages: response bytes and end-to-end latency "
+        "through the API (response cache cleared before each request), plus the time to "
+        "load and serialize one page in-process. Reports JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--user', default='bench-admin')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', choices=sorted(ENDPOINTS))
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            user = bench_admin(options['user'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        client = jwt_client(user)
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+
+        report = {'meta': {'page_size': page_size, 'iterations': options['iterations']}, 'endpoints': {}}
+        for name in options['endpoints'] or ENDPOINTS:
+            serializer_class = ENDPOINTS[name]
+            url = reverse(name)
+            full = measure(client, url, options['iterations'], options['warmup'], before=cache.clear)
+            compact = measure(client, f'{url}?view=compact', options['iterations'], options['warmup'], before=cache.clear)
+            report['endpoints'][name] = {
+                'full': {**full, 'serialize': self.serialize(serializer_class, None, page_size, options['iterations'])},
+                'compact': {
+                    **compact,
+                    'serialize': self.serialize(serializer_class, serializer_class.compact_fields, page_size, options['iterations']),
+                },
+                'bytes_saved_pct': round((1 - compact['bytes'] / full['bytes']) * 100, 1) if full['bytes'] else None,
+            }
+        write_report(report, options['output'], self.stdout)
+
+    def serialize(self, serializer_class, fields, page_size, iterations):
+        """Load one page (narrowed with only() when ``fields`` is given) and render it to JSON."""
+        model = serializer_class.Meta.model
+        context = {} if fields is None else {'fields': fields}
+        columns = None
+        if fields is not None:
+            columns = ['pk', *(model._meta.get_field(name).name for name in fields if name != 'id')]
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            queryset = model.objects.order_by('pk')
+            if columns:
+                queryset = queryset.only(*columns)
+            data = serializer_class(list(queryset[:page_size]), many=True, context=context).data
+            JSONRenderer().render(data)
+            latencies.append((time.perf_counter() - start) * 1000)
+        return summarize(latencies)
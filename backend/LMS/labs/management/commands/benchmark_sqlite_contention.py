@@ -0,0 +1,182 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import got_request_exception
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+from django.test import Client
+from django.urls import reverse
+
+from LMS.sqlite_backend import production_options
+from labs.authentication import LabsRefreshToken, user_cache
+from labs.benchmarks import bench_admin, summarize, write_report
+
+PROFILES = {
+    # What settings.py used before the production profile existed
+    'stock': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}},
+    'production': {'ENGINE': 'LMS.sqlite_backend', 'OPTIONS': production_options()},
+}
+
+
+@contextmanager
+def use_database(settings_dict):
+    """Point the default alias at another database for the duration of the block."""
+    original = connections[DEFAULT_DB_ALIAS]
+    connections[DEFAULT_DB_ALIAS] = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        connections[DEFAULT_DB_ALIAS].close()
+        connections[DEFAULT_DB_ALIAS] = original
+
+
+def worker(role, settings_dict, tokens, equipment_id, duration, start, results):
+    """
+    One client process until time is up. A writer files a maintenance log as a
+    student and resolves it as an admin (a read-then-write transaction); a
+    reader lists the logs.
+    """
+    from LMS.sqlite_backend.base import lock_stats
+
+    connections[DEFAULT_DB_ALIAS] = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+    # Forked from the parent: drop anything it cached about its own database
+    cache.clear()
+    user_cache.clear()
+    # Failed requests are counted in the report instead of logged from every process
+    logging.disable(logging.ERROR)
+    failed = []
+    got_request_exception.connect(lambda sender, **kwargs: failed.append(1), weak=False)
+
+    student = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f"Bearer {tokens['student']}", raise_request_exception=False)
+    admin = Client(HTTP_HOST='localhost', HTTP_AUTHORIZATION=f"Bearer {tokens['admin']}", raise_request_exception=False)
+    url = reverse('maintenance-log-list')
+    resolve_url = reverse('maintenance-resolve')
+    latencies = []
+    statuses = {}
+    start.wait()
+    deadline = time.perf_counter() + duration
+    log_id = None
+    while time.perf_counter() < deadline:
+        began = time.perf_counter()
+        if role == 'reader':
+            response = student.get(url, {'count': 'false'})
+        elif log_id is None:
+            response = student.post(
+                url, {'equipment': equipment_id, 'issue_description': 'Benchmark issue', 'status_before': 'not_working'},
+                content_type='application/json',
+            )
+            log_id = response.json()['id'] if response.status_code == 201 else None
+        else:
+            response = admin.post(resolve_url, {'ids': [log_id], 'status_after': 'working'}, content_type='application/json')
+            log_id = None
+        latencies.append((time.perf_counter() - began) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    connections[DEFAULT_DB_ALIAS].close()
+    results.put({'role': role, 'latencies': latencies, 'statuses': statuses, 'errors': len(failed), **lock_stats()})
+
+
+class Command(BaseCommand):
+    help = (
+        "Multi-process contention benchmark for SQLite: writer processes file maintenance logs "
+        "through the API while reader processes list them, against a copy of the current "
+        "database, once per profile (stock Django settings and the SQLITE_PRODUCTION profile). "
+        "Reports throughput, latency and failed requests as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds per profile.")
+        parser.add_argument('--profile', action='append', dest='profiles', choices=sorted(PROFILES))
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError("This benchmark compares SQLite profiles; the default database is not SQLite.")
+
+        keys = ('writers', 'readers', 'duration')
+        report = {'meta': {key: options[key] for key in keys}, 'profiles': {}}
+        workdir = tempfile.mkdtemp(prefix='lms-sqlite-bench-')
+        try:
+            for name in options['profiles'] or PROFILES:
+                path = os.path.join(workdir, f'{name}.sqlite3')
+                self.copy_database(primary, path)
+                settings_dict = {**primary.settings_dict, **PROFILES[name], 'NAME': path}
+                report['profiles'][name] = self.run(settings_dict, options)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        write_report(report, options['output'], self.stdout)
+
+    def copy_database(self, primary, path):
+        primary.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+    def fixtures(self):
+        """Tokens for a student and an admin, and a piece of equipment to file logs against."""
+        from labs.models import Equipment, Lab, User
+
+        student = User.objects.filter(username='bench-student').first()
+        if student is None:
+            student = User.objects.create_user(username='bench-student', password=None, role='student')
+        tokens = {
+            'student': str(LabsRefreshToken.for_user(student).access_token),
+            'admin': str(LabsRefreshToken.for_user(bench_admin()).access_token),
+        }
+        equipment = Equipment.objects.order_by('pk').first()
+        if equipment is None:
+            lab = Lab.objects.create(name='Benchmark Lab')
+            equipment = Equipment.objects.create(lab=lab, equipment_type='MOUSE', status='working')
+        return tokens, equipment.pk
+
+    def run(self, settings_dict, options):
+        with use_database(settings_dict):
+            tokens, equipment_id = self.fixtures()
+
+        context = multiprocessing.get_context('fork')
+        start = context.Event()
+        results = context.Queue()
+        roles = ['writer'] * options['writers'] + ['reader'] * options['readers']
+        processes = [
+            context.Process(
+                target=worker,
+                args=(role, settings_dict, tokens, equipment_id, options['duration'], start, results),
+            )
+            for role in roles
+        ]
+        for process in processes:
+            process.start()
+        start.set()
+        outcomes = [results.get(timeout=options['duration'] + 60) for _ in processes]
+        for process in processes:
+            process.join()
+
+        summary = {'begin_retries': sum(outcome['begin_retries'] for outcome in outcomes)}
+        for role, label in (('writer', 'writes'), ('reader', 'reads')):
+            mine = [outcome for outcome in outcomes if outcome['role'] == role]
+            latencies = [value for outcome in mine for value in outcome['latencies']]
+            statuses = {}
+            for outcome in mine:
+                for code, count in outcome['statuses'].items():
+                    statuses[str(code)] = statuses.get(str(code), 0) + count
+            ok = sum(count for code, count in statuses.items() if code.startswith('2'))
+            summary[label] = {
+                'requests': len(latencies),
+                'ok_per_s': round(ok / options['duration'], 1),
+                'failed': sum(outcome['errors'] for outcome in mine),
+                'status': dict(sorted(statuses.items())),
+                'latency': summarize(latencies) if latencies else None,
+            }
+        return summary
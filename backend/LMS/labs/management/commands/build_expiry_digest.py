@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from labs.rollups import build_license_expiry_digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Incrementally refresh the license expiry digest read by /api/software/expiring/. "
+        "Only labs with software changed since the last run are recomputed; schedule it daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Rebuild the digest for every lab instead of only changed ones.",
+        )
+
+    def handle(self, *args, **options):
+        labs = build_license_expiry_digest(full=options['full'])
+        if labs is None:
+            self.stdout.write(self.style.SUCCESS("Rebuilt license expiry digest for all labs."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Refreshed license expiry digest for {len(labs)} lab(s)."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from labs.rollups import build_maintenance_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Incrementally refresh the maintenance KPI rollups read by /api/maintenance/stats/. "
+        "Only days with logs changed since the last run are recomputed; schedule it hourly or daily."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Rebuild the rollups for every day instead of only changed ones.",
+        )
+
+    def handle(self, *args, **options):
+        days = build_maintenance_rollups(full=options['full'])
+        if days is None:
+            self.stdout.write(self.style.SUCCESS("Rebuilt maintenance rollups for all days."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Refreshed maintenance rollups for {len(days)} day(s)."))
@@ -0,0 +1,33 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from labs.history import prune_checkpoints, take_checkpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot every equipment and PC status into a status history checkpoint, so "
+        "as-of and uptime queries replay only the events since. Run periodically (e.g. hourly "
+        "from cron); also records items whose live row drifted from the event log."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settle-seconds', type=int, default=60,
+            help="Take the snapshot this far behind now, past any still-open transaction (default 60).",
+        )
+        parser.add_argument('--keep', type=int, help="Delete all but this many newest checkpoints (the first is always kept).")
+
+    def handle(self, *args, **options):
+        settle = datetime.timedelta(seconds=options['settle_seconds'])
+        checkpoint, items, corrections = take_checkpoint(settle=settle)
+        if checkpoint is None:
+            self.stdout.write("A checkpoint already covers this time; nothing to do.")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Checkpointed {items} items at {checkpoint.taken_at.isoformat()} ({corrections} corrections)."
+            ))
+        if options['keep'] is not None:
+            pruned = prune_checkpoints(options['keep'])
+            self.stdout.write(f"Pruned {pruned} old checkpoints.")
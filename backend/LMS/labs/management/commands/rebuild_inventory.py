@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from labs.inventory import refresh_inventory
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialized Inventory table from Equipment and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report drift, do not rewrite the Inventory table.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        with transaction.atomic():
+            drift = refresh_inventory(fix=not dry_run)
+
+        for entry in drift:
+            self.stdout.write(
+                f"lab={entry['lab']} type={entry['equipment_type']} "
+                f"stored={entry['stored']} expected={entry['expected']}"
+            )
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Inventory is in sync."))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} inventory bucket(s) drifted (dry run, nothing changed)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(drift)} drifted inventory bucket(s)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from labs.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the global search index from labs, PCs, equipment, software and maintenance logs. "
+        "Run after migrating an existing database or after bulk writes that bypass save()."
+    )
+
+    def handle(self, *args, **options):
+        counts = rebuild_index()
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Indexed {summary}."))
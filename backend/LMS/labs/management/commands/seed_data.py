@@ -0,0 +1,268 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from labs.cache import bump_versions
+from labs.models import User, Lab, PC, Software, Equipment, MaintenanceLog
+from labs.search import rebuild_index
+from tickets.models import Ticket
+
+# Row counts at --scale 1
+DEFAULT_COUNTS = {
+    'labs': 100,
+    'students': 1000,
+    'pcs': 5000,
+    'equipment': 50000,
+    'software': 200000,
+    'maintenance': 500000,
+    'tickets': 100000,
+}
+
+BRANDS = ('Dell', 'HP', 'Lenovo', 'Acer', 'Asus', 'Cisco', 'Logitech', 'Samsung', 'Philips', 'Havells')
+SOFTWARE = ('Windows 11', 'Ubuntu', 'MS Office', 'MATLAB', 'AutoCAD', 'Visual Studio', 'PyCharm', 'Adobe Reader')
+PC_STATUSES = ('working', 'working', 'working', 'not_working', 'under_repair')
+EQUIPMENT_WEIGHTS = (('working', 80), ('not_working', 12), ('under_repair', 8))
+ISSUES = ('Does not power on', 'Loose cable', 'Screen flickers', 'Keys not responding', 'Overheating', 'Network drops')
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create store the timestamps we generate instead of now()."""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset for benchmarking. At --scale 1 this creates 100 labs, "
+        "5k PCs, 50k equipment, 200k software rows, 500k maintenance logs and 100k tickets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help="Multiplier applied to every default count.")
+        for name, count in DEFAULT_COUNTS.items():
+            parser.add_argument(f'--{name}', type=int, help=f"Override the number of {name} (default {count} x scale).")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, for reproducible datasets.")
+        parser.add_argument('--days', type=int, default=365, help="Spread timestamps over this many past days.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='Seed', help="Prefix for generated names and serial numbers.")
+        parser.add_argument('--clear', action='store_true', help="Delete previously seeded rows with this prefix first.")
+        parser.add_argument('--skip-search-index', action='store_true', help="Do not rebuild the search index afterwards.")
+
+    def handle(self, *args, **options):
+        counts = {
+            name: options[name] if options[name] is not None else int(count * options['scale'])
+            for name, count in DEFAULT_COUNTS.items()
+        }
+        if options['labs'] is None:
+            counts['labs'] = max(1, counts['labs'])
+        if counts['labs'] < 1:
+            raise CommandError("At least one lab is required.")
+
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.seconds = options['days'] * 86400
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+
+        if options['clear']:
+            self.clear()
+        elif Lab.objects.filter(name__startswith=f'{self.prefix} Lab ').exists():
+            raise CommandError(f"Seeded data with prefix {self.prefix!r} already exists; use --clear or --prefix.")
+
+        with transaction.atomic():
+            lab_ids = self.seed_labs(counts['labs'])
+            student_ids = self.seed_students(counts['students'])
+            admin_ids = list(User.objects.filter(role='admin').values_list('id', flat=True)) or [None]
+            pc_ids = self.seed_pcs(counts['pcs'], lab_ids)
+            self.seed_software(counts['software'], pc_ids)
+            equipment = self.seed_equipment(counts['equipment'], lab_ids)
+            self.seed_maintenance(counts['maintenance'], equipment, student_ids, admin_ids)
+            self.seed_tickets(counts['tickets'], pc_ids, student_ids)
+        # bulk_create sends no post_save signals
+        bump_versions(Lab, PC, Software, Equipment)
+        if not options['skip_search_index']:
+            rebuild_index()
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary}."))
+
+    # ------------------------------
+    # Generators
+    # ------------------------------
+    def past(self):
+        return self.now - timedelta(seconds=self.rng.randrange(self.seconds))
+
+    def create(self, model, objs, label):
+        created = 0
+        ids = []
+        for batch in batched(objs, self.batch_size):
+            ids.extend(obj.pk for obj in model.objects.bulk_create(batch))
+            created += len(batch)
+            self.stderr.write(f"\r{label}: {created}", ending='')
+        self.stderr.write('')
+        return ids
+
+    def clear(self):
+        labs = Lab.objects.filter(name__startswith=f'{self.prefix} Lab ')
+        # Deleting labs cascades to PCs, software, equipment, logs and tickets
+        labs.delete()
+        User.objects.filter(username__startswith=f'{self.prefix.lower()}-student-').delete()
+
+    def seed_labs(self, count):
+        objs = (
+            Lab(name=f'{self.prefix} Lab {i:04d}', location=f'Block {chr(65 + i % 6)}, Floor {i % 5 + 1}')
+            for i in range(count)
+        )
+        return self.create(Lab, objs, 'labs')
+
+    def seed_students(self, count):
+        # Hash once; every seeded student shares the password "password"
+        password = make_password('password')
+        objs = (
+            User(
+                username=f'{self.prefix.lower()}-student-{i:06d}',
+                email=f'{self.prefix.lower()}-student-{i:06d}@example.com',
+                password=password,
+                role='student',
+            )
+            for i in range(count)
+        )
+        return self.create(User, objs, 'students')
+
+    def seed_pcs(self, count, lab_ids):
+        rng = self.rng
+        objs = (
+            PC(
+                lab_id=lab_ids[i % len(lab_ids)],
+                name=f'PC-{i:05d}',
+                status=rng.choice(PC_STATUSES),
+                brand=rng.choice(BRANDS),
+                serial_number=f'{self.prefix}-PC-{i:07d}',
+            )
+            for i in range(count)
+        )
+        return self.create(PC, objs, 'pcs')
+
+    def seed_software(self, count, pc_ids):
+        if not pc_ids:
+            return []
+        rng = self.rng
+        today = self.now.date()
+        objs = (
+            Software(
+                pc_id=rng.choice(pc_ids),
+                name=rng.choice(SOFTWARE),
+                version=f'{rng.randint(1, 20)}.{rng.randint(0, 9)}',
+                license_key=f'{rng.getrandbits(64):016X}',
+                expiry_date=today + timedelta(days=rng.randint(-90, 3 * 365)) if rng.random() < 0.7 else None,
+                updated_at=self.past(),
+            )
+            for _ in range(count)
+        )
+        with explicit_timestamps(Software._meta.get_field('updated_at')):
+            return self.create(Software, objs, 'software')
+
+    def seed_equipment(self, count, lab_ids):
+        rng = self.rng
+        types = [code for code, _ in Equipment.EQUIPMENT_TYPES]
+        statuses, weights = zip(*EQUIPMENT_WEIGHTS)
+        rows = []
+
+        def objs():
+            for i in range(count):
+                added_on = self.past()
+                obj = Equipment(
+                    lab_id=lab_ids[i % len(lab_ids)],
+                    equipment_type=rng.choice(types),
+                    brand=rng.choice(BRANDS),
+                    model_name=f'M{rng.randint(100, 999)}',
+                    serial_number=f'{self.prefix}-EQ-{i:07d}',
+                    location_in_lab=f'Row {rng.randint(1, 10)}',
+                    price=Decimal(rng.randint(500, 150000)) / 100,
+                    status=rng.choices(statuses, weights)[0],
+                    added_on=added_on,
+                    updated_at=added_on,
+                )
+                rows.append((obj, added_on))
+                yield obj
+
+        fields = Equipment._meta.get_field('added_on'), Equipment._meta.get_field('updated_at')
+        with explicit_timestamps(*fields):
+            self.create(Equipment, objs(), 'equipment')
+        return [(obj.pk, obj.lab_id, obj.status, added_on) for obj, added_on in rows]
+
+    def seed_maintenance(self, count, equipment, student_ids, admin_ids):
+        if not equipment:
+            return
+        rng = self.rng
+
+        def objs():
+            for _ in range(count):
+                equipment_id, lab_id, status, added_on = rng.choice(equipment)
+                reported_on = added_on + (self.now - added_on) * rng.random()
+                fixed = rng.random() < 0.85
+                fixed_on = reported_on + timedelta(hours=rng.expovariate(1 / 48)) if fixed else None
+                if fixed_on and fixed_on > self.now:
+                    fixed_on = self.now
+                yield MaintenanceLog(
+                    equipment_id=equipment_id,
+                    lab_id=lab_id,
+                    reported_by_id=rng.choice(student_ids) if student_ids else None,
+                    fixed_by_id=rng.choice(admin_ids) if fixed else None,
+                    issue_description=rng.choice(ISSUES),
+                    status_before=rng.choice(('not_working', 'under_repair')),
+                    status_after='working' if fixed else None,
+                    status='fixed' if fixed else 'pending',
+                    reported_on=reported_on,
+                    fixed_on=fixed_on,
+                    updated_at=fixed_on or reported_on,
+                )
+
+        fields = MaintenanceLog._meta.get_field('reported_on'), MaintenanceLog._meta.get_field('updated_at')
+        with explicit_timestamps(*fields):
+            self.create(MaintenanceLog, objs(), 'maintenance')
+
+    def seed_tickets(self, count, pc_ids, student_ids):
+        if not student_ids:
+            return
+        rng = self.rng
+
+        def objs():
+            for _ in range(count):
+                created_at = self.past()
+                yield Ticket(
+                    student_id=rng.choice(student_ids),
+                    pc_id=rng.choice(pc_ids) if pc_ids else None,
+                    issue_description=rng.choice(ISSUES),
+                    status=rng.choices(('open', 'in_progress', 'resolved'), (20, 10, 70))[0],
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+
+        fields = Ticket._meta.get_field('created_at'), Ticket._meta.get_field('updated_at')
+        with explicit_timestamps(*fields):
+            self.create(Ticket, objs(), 'tickets')
@@ -0,0 +1,45 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from labs.db_router import replica_aliases
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into every configured replica file "
+        "(DB_REPLICA_<n>_NAME), so the read-replica routing can be tried locally. "
+        "Replicas of a MySQL primary are kept up to date by MySQL replication instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replica', action='append', dest='replicas', help="Only refresh this alias.")
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError(f"Replicas of a {primary.vendor} database are maintained by the database server.")
+        aliases = options['replicas'] or replica_aliases()
+        unknown = set(aliases) - set(replica_aliases())
+        if unknown:
+            raise CommandError(f"Not a configured replica: {', '.join(sorted(unknown))}")
+        if not aliases:
+            self.stdout.write("No replicas configured (set DB_REPLICA_1_NAME, ...).")
+            return
+
+        primary.ensure_connection()
+        for alias in aliases:
+            replica = connections[alias]
+            if replica.settings_dict['NAME'] == primary.settings_dict['NAME']:
+                # A test database mirror, or a replica pointed at the primary file
+                self.stdout.write(f"{alias}: same database as the primary, skipped")
+                continue
+            replica.close()
+            # The online backup API gives a consistent copy even while the primary takes writes
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(f"{alias}: copied to {replica.settings_dict['NAME']}"))
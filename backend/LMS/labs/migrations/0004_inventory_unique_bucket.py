@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def rebuild_inventory(apps, schema_editor):
+    Equipment = apps.get_model('labs', 'Equipment')
+    Inventory = apps.get_model('labs', 'Inventory')
+
+    Inventory.objects.all().delete()
+    rows = (
+        Equipment.objects.order_by()
+        .values('lab', 'equipment_type')
+        .annotate(
+            total_quantity=Count('id'),
+            working_quantity=Count('id', filter=Q(status='working')),
+            not_working_quantity=Count('id', filter=Q(status='not_working')),
+            under_repair_quantity=Count('id', filter=Q(status='under_repair')),
+        )
+    )
+    Inventory.objects.bulk_create([
+        Inventory(
+            lab_id=row['lab'],
+            equipment_type=row['equipment_type'],
+            total_quantity=row['total_quantity'],
+            working_quantity=row['working_quantity'],
+            not_working_quantity=row['not_working_quantity'],
+            under_repair_quantity=row['under_repair_quantity'],
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0003_maintenancelog_lab'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_inventory, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventory',
+            constraint=models.UniqueConstraint(fields=('lab', 'equipment_type'), name='unique_inventory_bucket'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0004_inventory_unique_bucket'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['lab', 'equipment_type', 'status'], name='equipment_lab_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['added_on', 'id'], name='equipment_added_on_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['status', 'reported_on'], name='mlog_status_reported_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['lab', 'status'], name='mlog_lab_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['reported_on', 'id'], name='mlog_reported_on_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='software',
+            index=models.Index(fields=['expiry_date'], name='software_expiry_date_idx'),
+        ),
+    ]
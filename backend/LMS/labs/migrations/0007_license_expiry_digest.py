@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0006_change_markers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('watermark', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupDirtyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rollup', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=100)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('rollup', 'key'), name='unique_rollup_dirty_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LicenseExpiryDigest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('expiry_date', models.DateField()),
+                ('license_count', models.IntegerField(default=0)),
+                ('lab', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='license_digest', to='labs.lab')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['expiry_date'], name='license_digest_expiry_idx')],
+                'constraints': [models.UniqueConstraint(fields=('lab', 'name', 'expiry_date'), name='unique_license_digest_row')],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:58
+
+from django.db import migrations, models
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE labs_searchentry_fts USING fts5(
+        title, body, content='labs_searchentry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER labs_searchentry_ai AFTER INSERT ON labs_searchentry BEGIN
+        INSERT INTO labs_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER labs_searchentry_ad AFTER DELETE ON labs_searchentry BEGIN
+        INSERT INTO labs_searchentry_fts(labs_searchentry_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER labs_searchentry_au AFTER UPDATE ON labs_searchentry BEGIN
+        INSERT INTO labs_searchentry_fts(labs_searchentry_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO labs_searchentry_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS labs_searchentry_au',
+    'DROP TRIGGER IF EXISTS labs_searchentry_ad',
+    'DROP TRIGGER IF EXISTS labs_searchentry_ai',
+    'DROP TABLE IF EXISTS labs_searchentry_fts',
+]
+MYSQL_FORWARD = ['ALTER TABLE labs_searchentry ADD FULLTEXT INDEX labs_searchentry_fulltext (title, body)']
+MYSQL_BACKWARD = ['ALTER TABLE labs_searchentry DROP INDEX labs_searchentry_fulltext']
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0007_license_expiry_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('lab', 'Lab'), ('pc', 'PC'), ('equipment', 'Equipment'), ('software', 'Software'), ('maintenance', 'Maintenance log')], max_length=20)),
+                ('object_id', models.IntegerField()),
+                ('lab_id', models.IntegerField(blank=True, null=True)),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_entry')],
+            },
+        ),
+        # Other databases fall back to icontains matching in labs.search
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD, 'mysql': MYSQL_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_BACKWARD, 'mysql': MYSQL_BACKWARD}),
+        ),
+    ]
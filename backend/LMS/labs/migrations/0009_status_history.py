@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def baseline_checkpoint(apps, schema_editor):
+    """History starts here: record every existing item's current state."""
+    StatusCheckpoint = apps.get_model('labs', 'StatusCheckpoint')
+    StatusCheckpointItem = apps.get_model('labs', 'StatusCheckpointItem')
+    Equipment = apps.get_model('labs', 'Equipment')
+    PC = apps.get_model('labs', 'PC')
+
+    checkpoint = StatusCheckpoint.objects.create(taken_at=timezone.now())
+    equipment = (
+        StatusCheckpointItem(checkpoint=checkpoint, kind='equipment', object_id=pk,
+                             lab_id=lab_id, equipment_type=equipment_type, status=status)
+        for pk, lab_id, equipment_type, status in
+        Equipment.objects.values_list('pk', 'lab_id', 'equipment_type', 'status').iterator(chunk_size=2000)
+    )
+    StatusCheckpointItem.objects.bulk_create(equipment, batch_size=1000)
+    pcs = (
+        StatusCheckpointItem(checkpoint=checkpoint, kind='pc', object_id=pk, lab_id=lab_id, status=status)
+        for pk, lab_id, status in PC.objects.values_list('pk', 'lab_id', 'status').iterator(chunk_size=2000)
+    )
+    StatusCheckpointItem.objects.bulk_create(pcs, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('equipment', 'Equipment'), ('pc', 'PC')], max_length=10)),
+                ('object_id', models.IntegerField()),
+                ('lab_id', models.IntegerField(blank=True, null=True)),
+                ('equipment_type', models.CharField(blank=True, max_length=20, null=True)),
+                ('status', models.CharField(max_length=50)),
+                ('at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'at'], name='status_event_kind_at_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatusCheckpointItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('equipment', 'Equipment'), ('pc', 'PC')], max_length=10)),
+                ('object_id', models.IntegerField()),
+                ('lab_id', models.IntegerField(blank=True, null=True)),
+                ('equipment_type', models.CharField(blank=True, max_length=20, null=True)),
+                ('status', models.CharField(max_length=50)),
+                ('checkpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='labs.statuscheckpoint')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['checkpoint', 'kind', 'lab_id'], name='checkpoint_item_lab_idx')],
+                'constraints': [models.UniqueConstraint(fields=('checkpoint', 'kind', 'object_id'), name='unique_checkpoint_item')],
+            },
+        ),
+        migrations.RunPython(baseline_checkpoint, migrations.RunPython.noop),
+    ]
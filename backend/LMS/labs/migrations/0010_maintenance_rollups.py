@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0009_status_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaintenanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('equipment_type', models.CharField(max_length=20)),
+                ('incoming', models.IntegerField(default=0)),
+                ('resolved', models.IntegerField(default=0)),
+                ('fix_seconds', models.BigIntegerField(default=0)),
+                ('fix_seconds_max', models.BigIntegerField(default=0)),
+                ('fix_histogram', models.JSONField(default=list)),
+                ('lab', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='maintenance_rollups', to='labs.lab')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'lab', 'equipment_type'), name='unique_maintenance_rollup_row')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TechnicianDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('equipment_type', models.CharField(max_length=20)),
+                ('resolved', models.IntegerField(default=0)),
+                ('fix_seconds', models.BigIntegerField(default=0)),
+                ('lab', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='technician_rollups', to='labs.lab')),
+                ('technician', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='maintenance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'lab', 'equipment_type', 'technician'), name='unique_technician_rollup_row')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0010_maintenance_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['updated_at'], name='mlog_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0011_change_marker_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='software',
+            index=models.Index(fields=['updated_at'], name='software_updated_at_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0012_software_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenancelog',
+            index=models.Index(fields=['fixed_on'], name='mlog_fixed_on_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+CHUNK_SIZE = 2000
+
+
+def _join(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+def backfill_search_index(apps, schema_editor):
+    """Index the rows that existed before 0008; the FTS triggers fill the FTS table."""
+    SearchEntry = apps.get_model('labs', 'SearchEntry')
+    Lab = apps.get_model('labs', 'Lab')
+    PC = apps.get_model('labs', 'PC')
+    Equipment = apps.get_model('labs', 'Equipment')
+    Software = apps.get_model('labs', 'Software')
+    MaintenanceLog = apps.get_model('labs', 'MaintenanceLog')
+    equipment_types = dict(Equipment._meta.get_field('equipment_type').choices)
+
+    # Same documents as labs.search.SOURCES at the time of this migration
+    sources = (
+        ('lab', Lab.objects.all(), lambda lab: (lab.name, _join(lab.location), lab.pk)),
+        ('pc', PC.objects.all(), lambda pc: (pc.name, _join(pc.brand, pc.serial_number), pc.lab_id)),
+        ('equipment', Equipment.objects.all(), lambda item: (
+            _join(item.brand, item.model_name) or equipment_types.get(item.equipment_type, item.equipment_type),
+            _join(item.serial_number, equipment_types.get(item.equipment_type, item.equipment_type),
+                  item.location_in_lab),
+            item.lab_id,
+        )),
+        ('software', Software.objects.select_related('pc'), lambda software: (
+            _join(software.name, software.version), _join(software.pc.name), software.pc.lab_id,
+        )),
+        ('maintenance', MaintenanceLog.objects.all(), lambda log: (
+            (log.issue_description or f'Maintenance log #{log.pk}')[:255], _join(log.remarks), log.lab_id,
+        )),
+    )
+
+    SearchEntry.objects.all().delete()
+    for kind, queryset, build in sources:
+        batch = []
+        for obj in queryset.order_by('pk').iterator(chunk_size=CHUNK_SIZE):
+            title, body, lab_id = build(obj)
+            batch.append(SearchEntry(kind=kind, object_id=obj.pk, lab_id=lab_id, title=title, body=body))
+            if len(batch) >= CHUNK_SIZE:
+                SearchEntry.objects.bulk_create(batch)
+                batch = []
+        SearchEntry.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0013_maintenance_fixed_on_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,55 @@
-from django.db import models
+from collections import Counter
+from contextvars import ContextVar
+
+from django.db import models, transaction
+from django.db.models.expressions import Combinable
+
+from .cache import bump_versions
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+
+# ------------------------------
+# Bulk writes
+# ------------------------------
+class VersionedQuerySet(models.QuerySet):
+    """
+    Bulk writes send no post_save and skip auto_now: stamp the updated_at
+    change marker (ETags, digests), refresh search entries (labs.search) and
+    bump the model's response cache version (labs.cache) here. bulk_update()
+    goes through update(). Single saves and deletes are handled by the
+    signal handlers.
+    """
+
+    def update(self, **kwargs):
+        from .search import reindex, touches_index
+
+        kwargs.setdefault('updated_at', timezone.now())
+        if not touches_index(self.model, kwargs):
+            rows = super().update(**kwargs)
+        else:
+            with transaction.atomic(using=self.db):
+                # Before the update, which may change what the filter matches
+                ids = list(self.values_list('pk', flat=True))
+                rows = super().update(**kwargs)
+                reindex(self.model, ids)
+        bump_versions(self.model)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.updated_at = now
+        fields = [*fields, 'updated_at'] if 'updated_at' not in fields else fields
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        bump_versions(self.model)
+        return created
+
 
 # ------------------------------
 # 1) Custom User (with Roles)
@@ -37,6 +87,8 @@ class Lab(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = VersionedQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -44,12 +96,77 @@ class Lab(models.Model):
 # -------------------------------
 # 3) PC model
 # -------------------------------
+# Fields whose change is a status history event (labs.history)
+STATE_FIELDS = ('lab', 'lab_id', 'status')
+
+
+class PCQuerySet(VersionedQuerySet):
+    """
+    Does for bulk operations what the PC signal handlers do for single
+    saves: records status history, marks both labs' license expiry digests
+    dirty when PCs change lab, and reindexes the PCs' software (whose
+    search entries carry the PC's name and lab) when PCs move or are
+    renamed. bulk_update() goes through update(), so it is covered too.
+    """
+
+    def update(self, **kwargs):
+        from .history import PCS, record_changes, states_by_pk, states_of
+        from .rollups import LICENSE_EXPIRY, mark_dirty
+        from .search import reindex
+
+        touches_state = any(field in STATE_FIELDS for field in kwargs)
+        if not touches_state and 'name' not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            before = states_of(PCS, self)
+            rows = super().update(**kwargs)
+            moved = {}
+            if touches_state:
+                after = states_by_pk(PCS, before)
+                record_changes(PCS, before, after)
+                moved = {
+                    pk: (state[0], after[pk][0]) for pk, state in before.items()
+                    if pk in after and after[pk][0] != state[0]
+                }
+            if moved:
+                mark_dirty(LICENSE_EXPIRY, {f'lab:{lab_id}' for labs in moved.values() for lab_id in labs})
+            stale = list(before) if 'name' in kwargs else list(moved)
+            if stale:
+                reindex(Software, Software.objects.filter(pc_id__in=stale).values_list('pk', flat=True))
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .history import PCS, record_created
+
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            record_created(PCS, created)
+        return created
+
+
 class PC(models.Model):
     lab = models.ForeignKey(Lab, on_delete=models.CASCADE, related_name='pcs')
     name = models.CharField(max_length=100)
     status = models.CharField(max_length=50)
     brand = models.CharField(max_length=100, blank=True, null=True)
     serial_number = models.CharField(max_length=100, blank=True, null=True, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PCQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the lab so a move can mark both labs' rollups dirty, and
+        # the name, which the software's search entries carry too
+        instance._loaded_lab_id = instance.__dict__.get('lab_id')
+        instance._loaded_name = instance.__dict__.get('name')
+        # ... and the state the status history last saw
+        if 'lab_id' in field_names and 'status' in field_names:
+            instance._status_state = (instance.lab_id, None, instance.status)
+        return instance
 
     def __str__(self):
         return self.name
@@ -58,6 +175,111 @@ class PC(models.Model):
 # ------------------------------
 # 4) Equipment (All Items)
 # ------------------------------
+INVENTORY_FIELDS = ('lab', 'lab_id', 'equipment_type', 'status')
+
+
+def _touches_inventory(fields):
+    return any(field in INVENTORY_FIELDS for field in fields)
+
+
+# Set while EquipmentQuerySet.bulk_update runs: it refreshes the Inventory
+# buckets once at the end instead of update() doing so for every batch
+_bulk_updating = ContextVar('equipment_bulk_updating', default=False)
+
+
+class EquipmentQuerySet(VersionedQuerySet):
+    """
+    Keeps the materialized Inventory table in step with bulk operations,
+    which bypass Equipment.save() / Equipment.delete().
+    """
+
+    def update(self, **kwargs):
+        from .history import EQUIPMENT, record_changes, states_by_pk, states_of
+        from .inventory import refresh_inventory
+
+        if not _touches_inventory(kwargs):
+            return super().update(**kwargs)
+
+        with transaction.atomic(using=self.db):
+            before = states_of(EQUIPMENT, self)
+            keys = {(lab_id, equipment_type) for lab_id, equipment_type, _ in before.values()}
+            rows = super().update(**kwargs)
+            record_changes(EQUIPMENT, before, states_by_pk(EQUIPMENT, before))
+            if _bulk_updating.get():
+                return rows
+            new_lab = kwargs.get('lab_id', kwargs.get('lab'))
+            new_type = kwargs.get('equipment_type')
+            if isinstance(new_lab, Lab):
+                new_lab = new_lab.pk
+            if isinstance(new_lab, Combinable) or isinstance(new_type, Combinable):
+                refresh_inventory(None)
+            else:
+                keys |= {
+                    (lab_id if new_lab is None else new_lab, eq_type if new_type is None else new_type)
+                    for lab_id, eq_type in keys
+                }
+                refresh_inventory(keys)
+        return rows
+
+    update.alters_data = True
+
+    def delete(self):
+        from .inventory import apply_inventory_deltas
+
+        with transaction.atomic(using=self.db):
+            removed = {
+                (row['lab_id'], row['equipment_type'], row['status']): -row['n']
+                for row in self.order_by().values('lab_id', 'equipment_type', 'status').annotate(n=models.Count('id'))
+            }
+            result = super().delete()
+            apply_inventory_deltas(removed)
+        return result
+
+    delete.alters_data = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from .history import EQUIPMENT, record_created
+        from .inventory import apply_inventory_deltas, refresh_inventory
+
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Some rows may not have been inserted; recount their buckets.
+                refresh_inventory({(obj.lab_id, obj.equipment_type) for obj in objs})
+            else:
+                apply_inventory_deltas(Counter(
+                    (obj.lab_id, obj.equipment_type, obj.status) for obj in objs
+                ))
+            for obj in created:
+                obj._inventory_key = obj.inventory_key()
+            record_created(EQUIPMENT, created)
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        from .history import EQUIPMENT, states_by_pk
+        from .inventory import refresh_inventory
+
+        objs = list(objs)
+        if not _touches_inventory(fields):
+            return super().bulk_update(objs, fields, *args, **kwargs)
+
+        with transaction.atomic(using=self.db):
+            before = states_by_pk(EQUIPMENT, [obj.pk for obj in objs])
+            keys = {(lab_id, equipment_type) for lab_id, equipment_type, _ in before.values()}
+            # Status history is recorded by update(), which bulk_update runs per batch
+            token = _bulk_updating.set(True)
+            try:
+                rows = super().bulk_update(objs, fields, *args, **kwargs)
+            finally:
+                _bulk_updating.reset(token)
+            keys |= {(obj.lab_id, obj.equipment_type) for obj in objs}
+            refresh_inventory(keys)
+            for obj in objs:
+                obj._inventory_key = obj.inventory_key()
+        return rows
+
+
 class Equipment(models.Model):
     EQUIPMENT_TYPES = (
         ('PC', 'PC'),
@@ -88,6 +310,66 @@ class Equipment(models.Model):
     added_on = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = EquipmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Inventory buckets and filtered equipment lists
+            models.Index(fields=['lab', 'equipment_type', 'status'], name='equipment_lab_type_status_idx'),
+            # Keyset pagination order
+            models.Index(fields=['added_on', 'id'], name='equipment_added_on_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember which inventory bucket the row was loaded from
+        if all(name in field_names for name in ('lab_id', 'equipment_type', 'status')):
+            instance._inventory_key = instance.inventory_key()
+        return instance
+
+    def inventory_key(self):
+        return (self.lab_id, self.equipment_type, self.status)
+
+    def save(self, *args, **kwargs):
+        # Apply the change to the materialized Inventory and the status
+        # history in the same transaction
+        from .history import EQUIPMENT, record
+        from .inventory import apply_inventory_deltas
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not _touches_inventory(update_fields):
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic(using=kwargs.get('using')):
+            previous = None
+            if not self._state.adding:
+                previous = getattr(self, '_inventory_key', None)
+                if previous is None:
+                    previous = (
+                        Equipment.objects.filter(pk=self.pk)
+                        .values_list('lab_id', 'equipment_type', 'status')
+                        .first()
+                    )
+            super().save(*args, **kwargs)
+            current = self.inventory_key()
+            if previous != current:
+                deltas = Counter({current: 1})
+                if previous is not None:
+                    deltas[previous] -= 1
+                apply_inventory_deltas(deltas)
+                record(EQUIPMENT, {self.pk: current})
+            self._inventory_key = current
+
+    def delete(self, *args, **kwargs):
+        from .inventory import apply_inventory_deltas
+
+        with transaction.atomic(using=kwargs.get('using')):
+            key = getattr(self, '_inventory_key', None) or self.inventory_key()
+            result = super().delete(*args, **kwargs)
+            apply_inventory_deltas({key: -1})
+        return result
+
     def __str__(self):
         return f"{self.equipment_type} - {self.model_name or 'Unknown'} ({self.status})"
 
@@ -105,9 +387,25 @@ class Software(models.Model):
     version = models.CharField(max_length=50, blank=True, null=True)
     license_key = models.CharField(max_length=200, blank=True, null=True)
     expiry_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expiry_date'], name='software_expiry_date_idx'),
+            # Change marker: incremental license expiry digest
+            models.Index(fields=['updated_at'], name='software_updated_at_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_pc_id = instance.__dict__.get('pc_id')
+        return instance
 
     def __str__(self):
-        return f"{self.name} ({self.version}) - PC: {self.pc.id}"
+        return f"{self.name} ({self.version}) - PC: {self.pc_id}"
 
 
 # ------------------------------
@@ -131,19 +429,48 @@ class MaintenanceLog(models.Model):
     reported_on = models.DateTimeField(auto_now_add=True)
     fixed_on = models.DateTimeField(blank=True, null=True)
     remarks = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Change marker: ETag aggregate and incremental rollups
+            models.Index(fields=['updated_at'], name='mlog_updated_at_idx'),
+            models.Index(fields=['status', 'reported_on'], name='mlog_status_reported_idx'),
+            models.Index(fields=['lab', 'status'], name='mlog_lab_status_idx'),
+            # Keyset pagination order
+            models.Index(fields=['reported_on', 'id'], name='mlog_reported_on_idx'),
+            # KPI rollups: logs fixed on a given day
+            models.Index(fields=['fixed_on'], name='mlog_fixed_on_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        # Automatically set lab based on the equipment selected
-        if not self.lab and self.equipment:
-            self.lab = self.equipment.lab
+        # Automatically set lab based on the equipment selected, reading only
+        # the lab id instead of loading the equipment (and its lab) lazily
+        if self.lab_id is None and self.equipment_id is not None:
+            if self._meta.get_field('equipment').is_cached(self):
+                self.lab_id = self.equipment.lab_id
+            else:
+                self.lab_id = Equipment.objects.filter(pk=self.equipment_id).values_list('lab_id', flat=True).first()
         super().save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the days the KPI rollups counted this log on
+        instance._loaded_days = (instance.__dict__.get('reported_on'), instance.__dict__.get('fixed_on'))
+        return instance
+
     def __str__(self):
         return f"Issue on {self.equipment} - {self.status}"
     
 
 # ------------------------------
 # 7) Inventory Table (for Dashboard)
+# Materialized rollup of Equipment per (lab, equipment_type); kept current
+# by Equipment.save/delete and EquipmentQuerySet, rebuilt by the
+# `rebuild_inventory` management command.
 # ------------------------------
 class Inventory(models.Model):
     equipment_type = models.CharField(max_length=20, choices=Equipment.EQUIPMENT_TYPES)
@@ -153,5 +480,197 @@ class Inventory(models.Model):
     under_repair_quantity = models.IntegerField(default=0)
     lab = models.ForeignKey(Lab, on_delete=models.CASCADE, related_name="inventory")
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lab', 'equipment_type'], name='unique_inventory_bucket'),
+        ]
+
     def __str__(self):
         return f"{self.equipment_type} in {self.lab.name} - Total: {self.total_quantity}"
+
+
+# ------------------------------
+# 8) Rollup bookkeeping
+# Incremental rollups remember how far they have read (watermark) and
+# which keys changed in ways a timestamp cannot show, e.g. deletes (dirty keys).
+# ------------------------------
+class RollupWatermark(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    watermark = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.watermark}"
+
+
+class RollupDirtyKey(models.Model):
+    rollup = models.CharField(max_length=50)
+    key = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['rollup', 'key'], name='unique_rollup_dirty_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.rollup}: {self.key}"
+
+
+# ------------------------------
+# 9) License expiry digest
+# Software licenses per (lab, name, expiry_date), built incrementally by
+# the `build_expiry_digest` management command.
+# ------------------------------
+class LicenseExpiryDigest(models.Model):
+    lab = models.ForeignKey(Lab, on_delete=models.CASCADE, related_name="license_digest")
+    name = models.CharField(max_length=100)
+    expiry_date = models.DateField()
+    license_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lab', 'name', 'expiry_date'], name='unique_license_digest_row'),
+        ]
+        indexes = [
+            models.Index(fields=['expiry_date'], name='license_digest_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.license_count} x {self.name} in lab {self.lab_id} expiring {self.expiry_date}"
+
+
+# ------------------------------
+# 10) Global search index
+# One row per searchable object, kept current by labs.search. A full-text
+# index over (title, body) is added per database in the migration:
+# FTS5 external-content table on SQLite, FULLTEXT index on MySQL.
+# ------------------------------
+class SearchEntry(models.Model):
+    KIND_CHOICES = (
+        ('lab', 'Lab'),
+        ('pc', 'PC'),
+        ('equipment', 'Equipment'),
+        ('software', 'Software'),
+        ('maintenance', 'Maintenance log'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    lab_id = models.IntegerField(blank=True, null=True)
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default='')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_entry'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.title}"
+
+
+# ------------------------------
+# 11) Status history
+# Append-only log of equipment and PC state changes (lab, type, status),
+# written by Equipment.save, the Equipment/PC querysets' bulk operations and
+# the delete signals, plus periodic checkpoints of every item's state taken
+# by `checkpoint_status_history`. See labs.history.
+# ------------------------------
+class StatusEvent(models.Model):
+    KIND_CHOICES = (
+        ('equipment', 'Equipment'),
+        ('pc', 'PC'),
+    )
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    lab_id = models.IntegerField(blank=True, null=True)
+    equipment_type = models.CharField(max_length=20, blank=True, null=True)
+    # The new status, or "removed" when the item was deleted
+    status = models.CharField(max_length=50)
+    at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'at'], name='status_event_kind_at_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Status events are append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} -> {self.status} @ {self.at}"
+
+
+class StatusCheckpoint(models.Model):
+    taken_at = models.DateTimeField(unique=True)
+
+    def __str__(self):
+        return f"Status checkpoint @ {self.taken_at}"
+
+
+class StatusCheckpointItem(models.Model):
+    checkpoint = models.ForeignKey(StatusCheckpoint, on_delete=models.CASCADE, related_name='items')
+    kind = models.CharField(max_length=10, choices=StatusEvent.KIND_CHOICES)
+    object_id = models.IntegerField()
+    lab_id = models.IntegerField(blank=True, null=True)
+    equipment_type = models.CharField(max_length=20, blank=True, null=True)
+    status = models.CharField(max_length=50)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['checkpoint', 'kind', 'object_id'], name='unique_checkpoint_item'),
+        ]
+        indexes = [
+            models.Index(fields=['checkpoint', 'kind', 'lab_id'], name='checkpoint_item_lab_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.status} @ checkpoint {self.checkpoint_id}"
+
+
+# ------------------------------
+# 12) Maintenance KPI rollups
+# Maintenance logs per (day, lab, equipment_type), and resolutions per
+# technician, built incrementally by `build_maintenance_rollups` and read
+# by /api/maintenance/stats/. See labs.rollups.
+# ------------------------------
+class MaintenanceDailyRollup(models.Model):
+    day = models.DateField()
+    lab = models.ForeignKey(Lab, on_delete=models.CASCADE, related_name="maintenance_rollups", null=True, blank=True)
+    equipment_type = models.CharField(max_length=20)
+    incoming = models.IntegerField(default=0)
+    resolved = models.IntegerField(default=0)
+    # Over the logs resolved that day
+    fix_seconds = models.BigIntegerField(default=0)
+    fix_seconds_max = models.BigIntegerField(default=0)
+    # Resolutions per labs.rollups.FIX_BUCKETS bucket, for percentiles
+    fix_histogram = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'lab', 'equipment_type'], name='unique_maintenance_rollup_row'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} lab {self.lab_id} {self.equipment_type}: +{self.incoming} -{self.resolved}"
+
+
+class TechnicianDailyRollup(models.Model):
+    day = models.DateField()
+    lab = models.ForeignKey(Lab, on_delete=models.CASCADE, related_name="technician_rollups", null=True, blank=True)
+    equipment_type = models.CharField(max_length=20)
+    technician = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="maintenance_rollups", null=True, blank=True)
+    resolved = models.IntegerField(default=0)
+    fix_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'lab', 'equipment_type', 'technician'], name='unique_technician_rollup_row',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.day} technician {self.technician_id}: {self.resolved} resolved"
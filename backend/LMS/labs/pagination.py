@@ -0,0 +1,176 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    Page-number pagination that can switch to keyset (cursor) pagination.
+
+    - ``?pagination=cursor`` (or any ``?cursor=``) pages by the view's
+      ``keyset_ordering``, e.g. ``('reported_on', 'id')``. Each page is a
+      ``WHERE (col, id) > (last_col, last_id) ORDER BY col, id LIMIT n``
+      query, so page 10,000 costs the same as page 1.
+    - ``?count=false`` skips the ``COUNT(*)`` query in either mode.
+
+    Views without ``keyset_ordering`` behave exactly like PageNumberPagination.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.include_count = request.query_params.get(self.count_query_param, '').lower() not in FALSE_VALUES
+        self.ordering = getattr(view, 'keyset_ordering', None)
+        self.keyset = bool(self.ordering) and (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+        if self.keyset:
+            return self.paginate_keyset(queryset)
+        if self.include_count:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_without_count(queryset)
+
+    def get_paginated_response(self, data):
+        if not self.keyset and self.include_count:
+            return super().get_paginated_response(data)
+
+        payload = OrderedDict()
+        if self.include_count:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if self.keyset:
+            if self.next_position is None:
+                return None
+            return self.cursor_link(self.next_position, reverse=False)
+        if not self.include_count:
+            if not self.has_next:
+                return None
+            return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1)
+        return super().get_next_link()
+
+    def get_previous_link(self):
+        if self.keyset:
+            if self.previous_position is None:
+                return None
+            return self.cursor_link(self.previous_position, reverse=True)
+        if not self.include_count:
+            if self.page_number <= 1:
+                return None
+            url = self.request.build_absolute_uri()
+            if self.page_number == 2:
+                return remove_query_param(url, self.page_query_param)
+            return replace_query_param(url, self.page_query_param, self.page_number - 1)
+        return super().get_previous_link()
+
+    # --------------------------
+    # Page numbers without COUNT(*)
+    # --------------------------
+    def paginate_without_count(self, queryset):
+        page_size = self.get_page_size(self.request)
+        try:
+            self.page_number = int(self.request.query_params.get(self.page_query_param, 1))
+        except (TypeError, ValueError):
+            self.page_number = 1
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message.format(page_number=self.page_number, message='Invalid page.'))
+
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.page_number > 1:
+            raise NotFound(self.invalid_page_message.format(page_number=self.page_number, message='That page contains no results'))
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    # --------------------------
+    # Keyset pagination
+    # --------------------------
+    def paginate_keyset(self, queryset):
+        page_size = self.get_page_size(self.request)
+        field, tiebreak = self.ordering
+        model_field = queryset.model._meta.get_field(field)
+
+        if self.include_count:
+            self.count = queryset.count()
+
+        position = self.decode_cursor(self.request.query_params.get(self.cursor_query_param), model_field)
+        reverse = bool(position and position['r'])
+        if position:
+            value = position['value']
+            op = 'lt' if reverse else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{op}': value})
+                | Q(**{field: value, f'{tiebreak}__{op}': position['id']})
+            )
+
+        prefix = '-' if reverse else ''
+        rows = list(queryset.order_by(f'{prefix}{field}', f'{prefix}{tiebreak}')[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = None
+        self.previous_position = None
+        if rows:
+            first, last = rows[0], rows[-1]
+            if has_more or reverse:
+                self.next_position = self.position_of(last, field, tiebreak)
+            if (position and not reverse) or (reverse and has_more):
+                self.previous_position = self.position_of(first, field, tiebreak)
+        elif position:
+            # Ran off the end; offer a way back to where we came from
+            if reverse:
+                self.next_position = {'v': position['v'], 'id': position['id']}
+            else:
+                self.previous_position = {'v': position['v'], 'id': position['id']}
+        return rows
+
+    def position_of(self, obj, field, tiebreak):
+        value = getattr(obj, field)
+        return {
+            'v': value.isoformat() if hasattr(value, 'isoformat') else value,
+            'id': getattr(obj, tiebreak),
+        }
+
+    def cursor_link(self, position, reverse):
+        payload = json.dumps({**position, 'r': int(reverse)}, separators=(',', ':'))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, token, model_field):
+        """The cursor's position, with ``value`` converted for ``model_field``; bad cursors are a 404."""
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            raw = position['v']
+            # Positions are JSON scalars written by position_of(); the
+            # keyset columns are never NULL
+            if raw is None or isinstance(raw, (bool, dict, list)):
+                raise ValueError(raw)
+            value = model_field.to_python(raw)
+            if value is None:
+                raise ValueError(raw)
+            return {'v': raw, 'value': value, 'id': int(position['id']), 'r': int(position.get('r', 0))}
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError, ValidationError):
+            raise NotFound('Invalid cursor')
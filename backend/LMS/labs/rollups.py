@@ -0,0 +1,381 @@
+import datetime
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    PC, Software, MaintenanceLog, RollupWatermark, RollupDirtyKey, LicenseExpiryDigest,
+    MaintenanceDailyRollup, TechnicianDailyRollup,
+)
+
+LICENSE_EXPIRY = 'license_expiry'
+MAINTENANCE_KPIS = 'maintenance_kpis'
+# A write that commits after a build started can carry an updated_at from
+# before it; each build re-reads this far behind its watermark so such
+# rows are not skipped (see labs.history.SETTLE)
+WATERMARK_OVERLAP = datetime.timedelta(minutes=1)
+
+
+# ------------------------------
+# Watermarks and dirty keys
+# ------------------------------
+def mark_dirty(rollup, keys):
+    keys = {str(key) for key in keys if key is not None}
+    if keys:
+        RollupDirtyKey.objects.bulk_create(
+            [RollupDirtyKey(rollup=rollup, key=key) for key in keys],
+            ignore_conflicts=True,
+        )
+
+
+def take_dirty(rollup):
+    """Return and clear the dirty keys of ``rollup`` (call inside the build transaction)."""
+    rows = list(RollupDirtyKey.objects.filter(rollup=rollup).values_list('pk', 'key'))
+    RollupDirtyKey.objects.filter(pk__in=[pk for pk, _ in rows]).delete()
+    return {key for _, key in rows}
+
+
+def get_watermark(rollup):
+    return RollupWatermark.objects.filter(name=rollup).values_list('watermark', flat=True).first()
+
+
+# ------------------------------
+# License expiry digest
+# Dirty keys are "lab:<id>" (PC deleted or moved) or "pc:<id>" (software
+# deleted), so the signal handlers never need an extra query.
+# ------------------------------
+def build_license_expiry_digest(full=False):
+    """
+    Recompute the digest for every lab with software changed since the last
+    run (updated_at >= watermark - WATERMARK_OVERLAP) or marked dirty, or for all labs when
+    ``full`` is set or the digest has never been built. Returns the set of
+    rebuilt lab ids, or None after a full rebuild.
+    """
+    with transaction.atomic():
+        started = timezone.now()
+        state, _ = RollupWatermark.objects.select_for_update().get_or_create(name=LICENSE_EXPIRY)
+        dirty = take_dirty(LICENSE_EXPIRY)
+        full = full or state.watermark is None
+
+        if full:
+            LicenseExpiryDigest.objects.all().delete()
+            software = Software.objects.all()
+            labs = None
+        else:
+            labs = set(
+                Software.objects.filter(updated_at__gte=state.watermark - WATERMARK_OVERLAP)
+                .values_list('pc__lab_id', flat=True).distinct()
+            )
+            labs |= {int(key[4:]) for key in dirty if key.startswith('lab:')}
+            dirty_pcs = [int(key[3:]) for key in dirty if key.startswith('pc:')]
+            if dirty_pcs:
+                labs |= set(PC.objects.filter(pk__in=dirty_pcs).values_list('lab_id', flat=True))
+            LicenseExpiryDigest.objects.filter(lab_id__in=labs).delete()
+            software = Software.objects.filter(pc__lab_id__in=labs)
+
+        rows = (
+            software.filter(expiry_date__isnull=False)
+            .values('pc__lab_id', 'name', 'expiry_date')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        LicenseExpiryDigest.objects.bulk_create(
+            (
+                LicenseExpiryDigest(lab_id=row['pc__lab_id'], name=row['name'],
+                                    expiry_date=row['expiry_date'], license_count=row['n'])
+                for row in rows.iterator(chunk_size=2000)
+            ),
+            batch_size=1000,
+        )
+
+        state.watermark = started
+        state.save(update_fields=['watermark'])
+    return labs
+
+
+def expiring_licenses(start, end, lab_id=None, live=False):
+    """
+    Licenses expiring in [start, end] grouped by lab and software name.
+    Reads the digest unless ``live`` is set.
+    """
+    if live:
+        queryset = Software.objects.filter(expiry_date__range=(start, end))
+        if lab_id is not None:
+            queryset = queryset.filter(pc__lab_id=lab_id)
+        rows = (
+            queryset.values('pc__lab_id', 'pc__lab__name', 'name')
+            .annotate(license_count=Count('id'), first_expiry=Min('expiry_date'), last_expiry=Max('expiry_date'))
+            .order_by('first_expiry', 'pc__lab_id', 'name')
+        )
+        lab_key, lab_name_key = 'pc__lab_id', 'pc__lab__name'
+    else:
+        queryset = LicenseExpiryDigest.objects.filter(expiry_date__range=(start, end))
+        if lab_id is not None:
+            queryset = queryset.filter(lab_id=lab_id)
+        rows = (
+            queryset.values('lab_id', 'lab__name', 'name')
+            .annotate(license_count=Sum('license_count'), first_expiry=Min('expiry_date'), last_expiry=Max('expiry_date'))
+            .order_by('first_expiry', 'lab_id', 'name')
+        )
+        lab_key, lab_name_key = 'lab_id', 'lab__name'
+
+    return [
+        {
+            'lab': row[lab_key],
+            'lab_name': row[lab_name_key],
+            'name': row['name'],
+            'license_count': row['license_count'],
+            'first_expiry': row['first_expiry'],
+            'last_expiry': row['last_expiry'],
+        }
+        for row in rows
+    ]
+
+
+# ------------------------------
+# Maintenance KPIs
+# A log counts as incoming on the (local) day it was reported and as
+# resolved on the day it was fixed. Dirty keys are "day:<iso date>" for
+# days a log was moved off or deleted from; changed logs are found by
+# updated_at. Retyping equipment does not touch its logs: run with --full.
+# ------------------------------
+HOUR = 3600
+DAY = 24 * HOUR
+# Upper bounds (seconds) of the time-to-fix histogram buckets; one more
+# bucket holds everything slower
+FIX_BUCKETS = (
+    HOUR // 4, HOUR // 2, HOUR, 2 * HOUR, 4 * HOUR, 8 * HOUR, 12 * HOUR,
+    DAY, 2 * DAY, 3 * DAY, 5 * DAY, 7 * DAY, 14 * DAY, 30 * DAY,
+)
+DAYS_PER_QUERY = 400
+# Runs of consecutive days per log query (four parameters each)
+RANGES_PER_QUERY = 200
+
+
+def local_day(moment):
+    return timezone.localtime(moment).date() if timezone.is_aware(moment) else moment.date()
+
+
+def day_keys(moments):
+    return [f'day:{local_day(moment).isoformat()}' for moment in moments if moment is not None]
+
+
+def _empty_kpis():
+    """[incoming, resolved, fix seconds, slowest fix, histogram]"""
+    return [0, 0, 0, 0, [0] * (len(FIX_BUCKETS) + 1)]
+
+
+def day_start(day):
+    moment = datetime.datetime.combine(day, datetime.time.min)
+    return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+
+def day_ranges(days):
+    """Half-open [start, end) datetimes covering ``days``, one per run of consecutive days."""
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + datetime.timedelta(days=1)
+        else:
+            ranges.append([day, day + datetime.timedelta(days=1)])
+    return [(day_start(first), day_start(end)) for first, end in ranges]
+
+
+def reported_or_fixed_in(ranges):
+    condition = Q()
+    for lower, upper in ranges:
+        condition |= Q(reported_on__gte=lower, reported_on__lt=upper) | Q(fixed_on__gte=lower, fixed_on__lt=upper)
+    return condition
+
+
+def _log_rows(days):
+    """The logs reported or fixed on ``days`` (None: all logs), each once."""
+    fields = ('pk', 'lab_id', 'equipment__lab_id', 'equipment__equipment_type', 'reported_on', 'fixed_on', 'fixed_by_id')
+    if days is None:
+        yield from MaintenanceLog.objects.values_list(*fields).iterator(chunk_size=2000)
+        return
+    # Plain range comparisons, so the timestamp indexes apply (a __date
+    # lookup casts the column)
+    ranges = day_ranges(days)
+    seen = set()
+    for start in range(0, len(ranges), RANGES_PER_QUERY):
+        logs = MaintenanceLog.objects.filter(reported_or_fixed_in(ranges[start:start + RANGES_PER_QUERY]))
+        for row in logs.values_list(*fields).iterator(chunk_size=2000):
+            if row[0] not in seen:
+                seen.add(row[0])
+                yield row
+
+
+def build_maintenance_rollups(full=False):
+    """
+    Recompute the KPI rollups for every day a log changed since the last
+    run was reported or fixed on, plus the dirty days, or for all days
+    when ``full`` is set or the rollups have never been built. Returns the
+    set of rebuilt days, or None after a full rebuild.
+    """
+    with transaction.atomic():
+        started = timezone.now()
+        state, _ = RollupWatermark.objects.select_for_update().get_or_create(name=MAINTENANCE_KPIS)
+        dirty = take_dirty(MAINTENANCE_KPIS)
+        full = full or state.watermark is None
+
+        if full:
+            days = None
+            MaintenanceDailyRollup.objects.all().delete()
+            TechnicianDailyRollup.objects.all().delete()
+        else:
+            days = {datetime.date.fromisoformat(key[4:]) for key in dirty if key.startswith('day:')}
+            changed = (
+                MaintenanceLog.objects.filter(updated_at__gte=state.watermark - WATERMARK_OVERLAP)
+                .values_list('reported_on', 'fixed_on')
+            )
+            for moments in changed.iterator(chunk_size=2000):
+                days.update(local_day(moment) for moment in moments if moment is not None)
+            ordered = sorted(days)
+            for start in range(0, len(ordered), DAYS_PER_QUERY):
+                chunk = ordered[start:start + DAYS_PER_QUERY]
+                MaintenanceDailyRollup.objects.filter(day__in=chunk).delete()
+                TechnicianDailyRollup.objects.filter(day__in=chunk).delete()
+
+        buckets = defaultdict(_empty_kpis)
+        # (day, lab, type, technician) -> [resolved, fix seconds]
+        technicians = defaultdict(lambda: [0, 0])
+        for _, lab_id, equipment_lab_id, equipment_type, reported_on, fixed_on, fixed_by_id in _log_rows(days):
+            lab_id = lab_id or equipment_lab_id
+            reported_day = local_day(reported_on)
+            if days is None or reported_day in days:
+                buckets[reported_day, lab_id, equipment_type][0] += 1
+            if fixed_on is None:
+                continue
+            fixed_day = local_day(fixed_on)
+            if days is None or fixed_day in days:
+                seconds = max(0, round((fixed_on - reported_on).total_seconds()))
+                bucket = buckets[fixed_day, lab_id, equipment_type]
+                bucket[1] += 1
+                bucket[2] += seconds
+                bucket[3] = max(bucket[3], seconds)
+                bucket[4][bisect_left(FIX_BUCKETS, seconds)] += 1
+                technician = technicians[fixed_day, lab_id, equipment_type, fixed_by_id]
+                technician[0] += 1
+                technician[1] += seconds
+
+        MaintenanceDailyRollup.objects.bulk_create(
+            (
+                MaintenanceDailyRollup(day=day, lab_id=lab_id, equipment_type=equipment_type, incoming=incoming,
+                                       resolved=resolved, fix_seconds=fix_seconds, fix_seconds_max=fix_seconds_max,
+                                       fix_histogram=histogram)
+                for (day, lab_id, equipment_type), (incoming, resolved, fix_seconds, fix_seconds_max, histogram)
+                in buckets.items()
+            ),
+            batch_size=1000,
+        )
+        TechnicianDailyRollup.objects.bulk_create(
+            (
+                TechnicianDailyRollup(day=day, lab_id=lab_id, equipment_type=equipment_type,
+                                      technician_id=technician_id, resolved=resolved, fix_seconds=fix_seconds)
+                for (day, lab_id, equipment_type, technician_id), (resolved, fix_seconds) in technicians.items()
+            ),
+            batch_size=1000,
+        )
+
+        state.watermark = started
+        state.save(update_fields=['watermark'])
+    return days
+
+
+def histogram_percentile(histogram, maximum, fraction):
+    """The ``fraction`` percentile of a FIX_BUCKETS histogram, interpolated within its bucket."""
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = fraction * total
+    seen = lower = 0
+    for upper, count in zip((*FIX_BUCKETS, maximum), histogram):
+        if count and seen + count >= rank:
+            upper = min(upper, maximum)
+            return round(lower + (upper - lower) * (rank - seen) / count)
+        seen += count
+        lower = upper
+    return maximum
+
+
+def _kpis(incoming, resolved, fix_seconds, fix_seconds_max, histogram):
+    return {
+        'incoming': incoming,
+        'resolved': resolved,
+        'mean_time_to_fix_seconds': round(fix_seconds / resolved) if resolved else None,
+        'p90_time_to_fix_seconds': histogram_percentile(histogram, fix_seconds_max, 0.9),
+    }
+
+
+def maintenance_stats(start, end, lab_id=None, equipment_type=None):
+    """
+    Maintenance KPIs for the days [start, end] from the rollups: totals,
+    a per-day series with the open backlog at the end of each day, a
+    per-(lab, equipment_type) breakdown and per-technician throughput.
+    Three queries, however many logs the range covers.
+    """
+    rows = MaintenanceDailyRollup.objects.all()
+    technicians = TechnicianDailyRollup.objects.filter(day__range=(start, end))
+    if lab_id is not None:
+        rows = rows.filter(lab_id=lab_id)
+        technicians = technicians.filter(lab_id=lab_id)
+    if equipment_type is not None:
+        rows = rows.filter(equipment_type=equipment_type)
+        technicians = technicians.filter(equipment_type=equipment_type)
+
+    before = rows.filter(day__lt=start).aggregate(incoming=Sum('incoming'), resolved=Sum('resolved'))
+    backlog_start = (before['incoming'] or 0) - (before['resolved'] or 0)
+
+    total = _empty_kpis()
+    breakdown = defaultdict(_empty_kpis)
+    per_day = defaultdict(lambda: [0, 0])
+    in_range = rows.filter(day__range=(start, end)).values_list(
+        'day', 'lab_id', 'equipment_type', 'incoming', 'resolved', 'fix_seconds', 'fix_seconds_max', 'fix_histogram',
+    )
+    for day, row_lab, row_type, incoming, resolved, fix_seconds, fix_seconds_max, histogram in in_range:
+        per_day[day][0] += incoming
+        per_day[day][1] += resolved
+        for acc in (total, breakdown[row_lab or 0, row_type]):
+            acc[0] += incoming
+            acc[1] += resolved
+            acc[2] += fix_seconds
+            acc[3] = max(acc[3], fix_seconds_max)
+            for index, count in enumerate(histogram):
+                acc[4][index] += count
+
+    days = []
+    backlog = backlog_start
+    day = start
+    while day <= end:
+        incoming, resolved = per_day.get(day, (0, 0))
+        backlog += incoming - resolved
+        days.append({'day': day, 'incoming': incoming, 'resolved': resolved, 'backlog': backlog})
+        day += datetime.timedelta(days=1)
+
+    throughput = (
+        technicians.values('technician_id', 'technician__username')
+        .annotate(resolved=Sum('resolved'), fix_seconds=Sum('fix_seconds'))
+        .order_by('-resolved', 'technician_id')
+    )
+    return {
+        'totals': {**_kpis(*total), 'backlog_start': backlog_start, 'backlog_end': backlog},
+        'days': days,
+        'breakdown': [
+            {'lab': row_lab or None, 'equipment_type': row_type, **_kpis(*acc)}
+            for (row_lab, row_type), acc in sorted(breakdown.items())
+        ],
+        'technicians': [
+            {
+                'technician': row['technician_id'],
+                'username': row['technician__username'],
+                'resolved': row['resolved'],
+                'mean_time_to_fix_seconds': round(row['fix_seconds'] / row['resolved']) if row['resolved'] else None,
+            }
+            for row in throughput
+        ],
+    }
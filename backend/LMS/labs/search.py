@@ -0,0 +1,207 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import Lab, PC, Equipment, Software, MaintenanceLog, SearchEntry
+
+MAX_RESULTS = 50
+MAX_TERMS = 8
+FTS_TABLE = 'labs_searchentry_fts'
+
+
+def _join(*parts):
+    return ' '.join(str(part) for part in parts if part)
+
+
+# ------------------------------
+# What gets indexed
+# kind -> (model, select_related, document builder returning (title, body, lab_id))
+# ------------------------------
+SOURCES = {
+    'lab': (Lab, (), lambda lab: (lab.name, _join(lab.location), lab.pk)),
+    'pc': (PC, (), lambda pc: (pc.name, _join(pc.brand, pc.serial_number), pc.lab_id)),
+    'equipment': (Equipment, (), lambda item: (
+        _join(item.brand, item.model_name) or item.get_equipment_type_display(),
+        _join(item.serial_number, item.get_equipment_type_display(), item.location_in_lab),
+        item.lab_id,
+    )),
+    'software': (Software, ('pc',), lambda software: (
+        _join(software.name, software.version), _join(software.pc.name), software.pc.lab_id,
+    )),
+    'maintenance': (MaintenanceLog, (), lambda log: (
+        (log.issue_description or f'Maintenance log #{log.pk}')[:255], _join(log.remarks), log.lab_id,
+    )),
+}
+KIND_FOR_MODEL = {model: kind for kind, (model, _, _) in SOURCES.items()}
+
+# Fields the documents are built from: bulk updates touching one reindex the rows
+INDEXED_FIELDS = {
+    'lab': ('name', 'location'),
+    'pc': ('name', 'brand', 'serial_number', 'lab'),
+    'equipment': ('brand', 'model_name', 'equipment_type', 'serial_number', 'location_in_lab', 'lab'),
+    'software': ('name', 'version', 'pc'),
+    'maintenance': ('issue_description', 'remarks', 'lab'),
+}
+
+
+def touches_index(model, fields):
+    """True if writing ``fields`` (names or attnames) changes ``model``'s search documents."""
+    kind = KIND_FOR_MODEL.get(model)
+    if kind is None:
+        return False
+    return any(model._meta.get_field(field).name in INDEXED_FIELDS[kind] for field in fields)
+
+
+# ------------------------------
+# Index maintenance
+# ------------------------------
+def index_objects(kind, objs, batch_size=1000):
+    """Insert or refresh the search entries for ``objs`` (upsert on kind + object_id)."""
+    build = SOURCES[kind][2]
+    entries = []
+    for obj in objs:
+        title, body, lab_id = build(obj)
+        entries.append(SearchEntry(kind=kind, object_id=obj.pk, lab_id=lab_id, title=title, body=body))
+    if entries:
+        SearchEntry.objects.bulk_create(
+            entries,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['kind', 'object_id'],
+            update_fields=['lab_id', 'title', 'body'],
+        )
+    return len(entries)
+
+
+def reindex(model, ids):
+    """Refresh entries for rows changed behind save() (bulk_create, queryset.update)."""
+    kind = KIND_FOR_MODEL[model]
+    _, related, _ = SOURCES[kind]
+    ids = list(ids)
+    for start in range(0, len(ids), 1000):
+        queryset = model.objects.filter(pk__in=ids[start:start + 1000]).select_related(*related)
+        index_objects(kind, queryset)
+
+
+def remove_objects(model, ids):
+    kind = KIND_FOR_MODEL[model]
+    ids = list(ids)
+    for start in range(0, len(ids), 1000):
+        SearchEntry.objects.filter(kind=kind, object_id__in=ids[start:start + 1000]).delete()
+
+
+def rebuild_index(chunk_size=2000):
+    """Recreate every search entry from the source tables. Returns counts per kind."""
+    counts = {}
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for kind, (model, related, _) in SOURCES.items():
+            queryset = model.objects.select_related(*related).order_by('pk')
+            batch, total = [], 0
+            for obj in queryset.iterator(chunk_size=chunk_size):
+                batch.append(obj)
+                if len(batch) >= chunk_size:
+                    total += index_objects(kind, batch)
+                    batch = []
+            total += index_objects(kind, batch)
+            counts[kind] = total
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return counts
+
+
+# ------------------------------
+# Queries
+# ------------------------------
+def search_terms(query):
+    """Word tokens of the query, at most MAX_TERMS of them."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def search(query, kinds=None, lab_id=None, limit=20, backend=None):
+    """
+    Ranked matches for every term of ``query`` (prefix match on the last
+    term, so results can follow typing). Returns dicts with kind, id, lab,
+    title, body and score, best first.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+    backend = backend or connection.vendor
+    if backend == 'sqlite':
+        rows = _search_sqlite(terms, kinds, lab_id, limit)
+    elif backend == 'mysql':
+        rows = _search_mysql(terms, kinds, lab_id, limit)
+    else:
+        rows = _search_fallback(terms, kinds, lab_id, limit)
+    return [
+        {'type': kind, 'id': object_id, 'lab': lab, 'title': title, 'body': body, 'score': round(score, 4)}
+        for kind, object_id, lab, title, body, score in rows
+    ]
+
+
+def _filters(kinds, lab_id, params):
+    sql = ''
+    if kinds:
+        sql += f" AND e.kind IN ({', '.join(['%s'] * len(kinds))})"
+        params.extend(kinds)
+    if lab_id is not None:
+        sql += ' AND e.lab_id = %s'
+        params.append(lab_id)
+    return sql
+
+
+def _search_sqlite(terms, kinds, lab_id, limit):
+    # Quote every term so FTS5 operators in user input are inert
+    match = ' '.join(f'"{term}"' for term in terms[:-1])
+    last = terms[-1]
+    match = _join(match, f'"{last}"*' if len(last) >= 2 else f'"{last}"')
+    params = [match]
+    where = _filters(kinds, lab_id, params)
+    params.append(limit)
+    sql = (
+        f"SELECT e.kind, e.object_id, e.lab_id, e.title, e.body, -bm25({FTS_TABLE}, 5.0, 1.0) AS score "
+        f"FROM {FTS_TABLE} JOIN labs_searchentry e ON e.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s{where} ORDER BY score DESC, e.id LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_mysql(terms, kinds, lab_id, limit):
+    against = ' '.join(f'+{term}' for term in terms[:-1])
+    against = _join(against, f'+{terms[-1]}*')
+    params = [against, against]
+    where = _filters(kinds, lab_id, params)
+    params.append(limit)
+    sql = (
+        "SELECT e.kind, e.object_id, e.lab_id, e.title, e.body, "
+        "MATCH(e.title, e.body) AGAINST (%s IN BOOLEAN MODE) AS score "
+        "FROM labs_searchentry e "
+        f"WHERE MATCH(e.title, e.body) AGAINST (%s IN BOOLEAN MODE){where} "
+        "ORDER BY score DESC, e.id LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _search_fallback(terms, kinds, lab_id, limit):
+    queryset = SearchEntry.objects.all()
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+    if lab_id is not None:
+        queryset = queryset.filter(lab_id=lab_id)
+    rows = []
+    for entry in queryset.order_by('id')[:limit * 4]:
+        title = entry.title.lower()
+        score = sum(2.0 if term in title else 1.0 for term in terms)
+        rows.append((entry.kind, entry.object_id, entry.lab_id, entry.title, entry.body, score))
+    rows.sort(key=lambda row: -row[5])
+    return rows[:limit]
@@ -6,36 +6,97 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'role')
 
-class LabSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Keeps only the fields named in context['fields'], when the view passes
+    them (labs.fieldsets.SparseFieldsetMixin). ``compact_fields`` is the
+    short representation served for ?view=compact.
+    """
+    compact_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('fields')
+        if selected is not None:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+class LabSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = ('id', 'name', 'location')
+
     class Meta:
         model = Lab
         fields = '__all__'
 
-class PCSerializer(serializers.ModelSerializer):
+class PCSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = ('id', 'lab', 'name', 'status')
+
     class Meta:
         model = PC
         fields = ('id', 'lab', 'name', 'status', 'brand', 'serial_number')
         read_only_fields = ('id', 'lab')
 
-class SoftwareSerializer(serializers.ModelSerializer):
+class SoftwareSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = ('id', 'pc', 'name', 'version', 'expiry_date')
+
     class Meta:
         model = Software
         fields = '__all__'
 
-class EquipmentSerializer(serializers.ModelSerializer):
+class EquipmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = ('id', 'lab', 'equipment_type', 'brand', 'model_name', 'status')
+
     class Meta:
         model = Equipment
         fields = '__all__'
 
-class MaintenanceLogSerializer(serializers.ModelSerializer):
+class MaintenanceLogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = ('id', 'equipment', 'lab', 'status', 'reported_on')
+
     class Meta:
         model = MaintenanceLog
         fields = '__all__'
 
+class MaintenanceResolveSerializer(serializers.Serializer):
+    """Input for closing a batch of maintenance logs in one request."""
+    MAX_IDS = 1000
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=MAX_IDS,
+    )
+    status_after = serializers.ChoiceField(choices=Equipment.STATUS_CHOICES, default='working')
+    remarks = serializers.CharField(required=False, allow_blank=True)
+
+class PCWithSoftwareSerializer(PCSerializer):
+    installed_software = SoftwareSerializer(many=True, read_only=True)
+
+    class Meta(PCSerializer.Meta):
+        fields = PCSerializer.Meta.fields + ('installed_software',)
+
+class LabExpandedSerializer(LabSerializer):
+    """
+    Lab with the nested collections named in context['expand']. The view
+    prefetches each of them, so rendering never touches the database.
+    """
+    pcs = PCSerializer(many=True, read_only=True)
+    equipment = EquipmentSerializer(many=True, read_only=True, source='equipments')
+    open_maintenance = MaintenanceLogSerializer(many=True, read_only=True)
+
+    EXPANDABLE = ('pcs', 'pcs.software', 'equipment', 'open_maintenance')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand', ())
+        if 'pcs.software' in expand and 'pcs' in self.fields:
+            self.fields['pcs'] = PCWithSoftwareSerializer(many=True, read_only=True)
+        for name in ('pcs', 'equipment', 'open_maintenance'):
+            if name not in expand:
+                self.fields.pop(name, None)
+
 class InventorySerializer(serializers.Serializer):
     """
-    Dynamic Inventory Serializer - doesn't use the Inventory model directly.
-    Instead, it serializes calculated inventory data from Equipment.
+    Inventory Serializer - serializes rows of the materialized Inventory
+    table, keyed by a composite "<lab>_<equipment_type>" id.
     """
     id = serializers.CharField(read_only=True)
     lab = serializers.IntegerField()
@@ -0,0 +1,168 @@
+from django.db.models import Model, QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user
+from .cache import bump_versions
+from .events import publish_on_commit
+from .history import EQUIPMENT, PCS, REMOVED, item_state, record
+from .models import User, Lab, PC, Equipment, Software, MaintenanceLog
+from .rollups import LICENSE_EXPIRY, MAINTENANCE_KPIS, day_keys, mark_dirty
+from .search import KIND_FOR_MODEL, index_objects, reindex, remove_objects
+from .serializers import MaintenanceLogSerializer
+from tickets.models import Ticket
+from tickets.serializers import TicketSerializer
+
+CACHED_MODELS = (Lab, PC, Equipment, Software)
+
+
+# ------------------------------
+# Response cache invalidation
+# ------------------------------
+# Bulk writes bump versions in the models' querysets. Connected per model:
+# a receiver without a sender would turn off fast deletes for every model.
+def invalidate_cached_lists(sender, **kwargs):
+    bump_versions(sender)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(invalidate_cached_lists, sender=model)
+    post_delete.connect(invalidate_cached_lists, sender=model)
+
+
+# ------------------------------
+# Cached JWT users
+# ------------------------------
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+# ------------------------------
+# License expiry digest: changes updated_at cannot show
+# ------------------------------
+@receiver(post_save, sender=PC)
+def pc_moved(sender, instance, created, **kwargs):
+    old_lab_id = getattr(instance, '_loaded_lab_id', None)
+    old_name = getattr(instance, '_loaded_name', None)
+    moved = not created and old_lab_id is not None and old_lab_id != instance.lab_id
+    renamed = not created and old_name is not None and old_name != instance.name
+    if moved:
+        mark_dirty(LICENSE_EXPIRY, [f'lab:{old_lab_id}', f'lab:{instance.lab_id}'])
+    if moved or renamed:
+        # Software search entries carry the PC's name and lab
+        reindex(Software, instance.installed_software.values_list('pk', flat=True))
+    instance._loaded_lab_id = instance.lab_id
+    instance._loaded_name = instance.name
+
+
+@receiver(post_delete, sender=PC)
+def pc_deleted(sender, instance, **kwargs):
+    mark_dirty(LICENSE_EXPIRY, [f'lab:{instance.lab_id}'])
+
+
+@receiver(post_save, sender=Software)
+def software_moved(sender, instance, created, **kwargs):
+    old_pc_id = getattr(instance, '_loaded_pc_id', None)
+    if not created and old_pc_id is not None and old_pc_id != instance.pc_id:
+        mark_dirty(LICENSE_EXPIRY, [f'pc:{old_pc_id}'])
+    instance._loaded_pc_id = instance.pc_id
+
+
+@receiver(post_delete, sender=Software)
+def software_deleted(sender, instance, **kwargs):
+    mark_dirty(LICENSE_EXPIRY, [f'pc:{instance.pc_id}'])
+
+
+# ------------------------------
+# Maintenance KPI rollups: days a log no longer counts on
+# ------------------------------
+@receiver(post_save, sender=MaintenanceLog)
+def maintenance_log_moved(sender, instance, created, **kwargs):
+    days = (instance.reported_on, instance.fixed_on)
+    old_days = getattr(instance, '_loaded_days', None)
+    if not created and old_days is not None and old_days != days:
+        mark_dirty(MAINTENANCE_KPIS, day_keys(old_days))
+    instance._loaded_days = days
+
+
+@receiver(post_delete, sender=MaintenanceLog)
+def maintenance_log_deleted(sender, instance, **kwargs):
+    mark_dirty(MAINTENANCE_KPIS, day_keys((instance.reported_on, instance.fixed_on)))
+
+
+# ------------------------------
+# Search index
+# Connected per indexed model, like the cache receivers. Rows a delete
+# cascades to are dropped with one query per kind once the origin's own
+# rows go, instead of one query per row.
+# ------------------------------
+def index_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_objects(KIND_FOR_MODEL[sender], [instance])
+
+
+def deleted_model(origin):
+    if isinstance(origin, QuerySet):
+        return origin.model
+    return origin._meta.concrete_model if isinstance(origin, Model) else None
+
+
+def unindex_deleted(sender, instance, origin=None, **kwargs):
+    origin_model = deleted_model(origin)
+    if origin_model in KIND_FOR_MODEL and origin_model is not sender:
+        # Collector.delete signals the cascaded rows before the origin's
+        pending = getattr(origin, '_search_removals', None)
+        if pending is None:
+            pending = origin._search_removals = {}
+        pending.setdefault(sender, []).append(instance.pk)
+        return
+    pending = getattr(origin, '_search_removals', None) or {}
+    if origin is not None:
+        origin._search_removals = None
+    pending.setdefault(sender, []).append(instance.pk)
+    for model, ids in pending.items():
+        remove_objects(model, ids)
+
+
+for model in KIND_FOR_MODEL:
+    post_save.connect(index_saved, sender=model)
+    post_delete.connect(unindex_deleted, sender=model)
+
+
+# ------------------------------
+# Live events (labs.events)
+# ------------------------------
+@receiver(post_save, sender=MaintenanceLog)
+def maintenance_event(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        data = MaintenanceLogSerializer(instance).data
+        publish_on_commit('maintenance', 'created' if created else 'updated', instance.lab_id, data)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_event(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        lab_id = PC.objects.filter(pk=instance.pc_id).values_list('lab_id', flat=True).first() if instance.pc_id else None
+        data = TicketSerializer(instance).data
+        publish_on_commit('ticket', 'created' if created else 'updated', lab_id, data, student_id=instance.student_id)
+
+
+# ------------------------------
+# Status history (labs.history)
+# Equipment records its own changes in Equipment.save
+# ------------------------------
+@receiver(post_save, sender=PC)
+def pc_status_changed(sender, instance, created, raw=False, **kwargs):
+    state = item_state(instance)
+    if not raw and state != getattr(instance, '_status_state', None):
+        record(PCS, {instance.pk: state})
+    instance._status_state = state
+
+
+@receiver(post_delete, sender=PC)
+@receiver(post_delete, sender=Equipment)
+def status_item_removed(sender, instance, **kwargs):
+    lab_id, equipment_type, _ = item_state(instance)
+    record(PCS if sender is PC else EQUIPMENT, {instance.pk: (lab_id, equipment_type, REMOVED)})
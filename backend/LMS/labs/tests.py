@@ -1,3 +1,2005 @@
-from django.test import TestCase
+import asyncio
+import base64
+import datetime
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from importlib import import_module
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.db.models.deletion import Collector
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from LMS.sqlite_backend import production_options
+from LMS.sqlite_backend.base import lock_stats
+from tickets.models import Ticket
+from .authentication import CachedJWTAuthentication, LabsRefreshToken, user_cache
+from .benchmarks import compare_reports
+from .cache import reset_cache_stats
+from .db_router import ReplicaRouter, ReplicaRoutingMiddleware, ReplicaSet, _routing
+from .events import EventBroker, Subscriber, broker
+from .exports import aiter_chunks
+from .history import EQUIPMENT, PCS, REMOVED, inventory_at, record, take_checkpoint, uptime
+from .instrumentation import request_metrics, reset_request_metrics
+from .models import User, Lab, PC, Software, Equipment, MaintenanceLog, Inventory, LicenseExpiryDigest, RollupWatermark, SearchEntry, StatusCheckpoint, StatusEvent
+from .rollups import (
+    FIX_BUCKETS, LICENSE_EXPIRY, MAINTENANCE_KPIS, build_license_expiry_digest, build_maintenance_rollups, day_ranges,
+    histogram_percentile, maintenance_stats, reported_or_fixed_in,
+)
+from .search import search
+from .serializers import EquipmentSerializer, MaintenanceLogSerializer
+from .throttling import SlidingWindowStore, reset_throttles
+
+
+# ------------------------------
+# Inventory
+# ------------------------------
+class InventoryListTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def make_lab(self, name, statuses=('working', 'not_working', 'under_repair')):
+        lab = Lab.objects.create(name=name)
+        for eq_type in ('PC', 'MONITOR'):
+            for status in statuses:
+                Equipment.objects.create(lab=lab, equipment_type=eq_type, status=status)
+        return lab
+
+    def test_counts_per_lab_and_type(self):
+        lab = self.make_lab('Lab A', statuses=('working', 'working', 'under_repair'))
+        response = self.client.get('/api/inventory/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            {
+                'id': f'{lab.id}_MONITOR', 'lab': lab.id, 'equipment_type': 'MONITOR',
+                'total_quantity': 3, 'working_quantity': 2,
+                'not_working_quantity': 0, 'under_repair_quantity': 1,
+            },
+            {
+                'id': f'{lab.id}_PC', 'lab': lab.id, 'equipment_type': 'PC',
+                'total_quantity': 3, 'working_quantity': 2,
+                'not_working_quantity': 0, 'under_repair_quantity': 1,
+            },
+        ])
+
+    def test_filters(self):
+        lab_a = self.make_lab('Lab A')
+        self.make_lab('Lab B')
+        response = self.client.get('/api/inventory/', {'lab': lab_a.id, 'equipment_type': 'PC'})
+        self.assertEqual([row['id'] for row in response.data], [f'{lab_a.id}_PC'])
+
+        response = self.client.get('/api/inventory/', {'equipment_type': 'TOASTER'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_query_count_is_constant(self):
+        self.make_lab('Lab 0')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/inventory/')
+
+        for i in range(1, 20):
+            self.make_lab(f'Lab {i}')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get('/api/inventory/')
+
+        self.assertEqual(len(response.data), 40)
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(len(many), 1)
+
+
+class InventoryMaterializationTests(TestCase):
+    def setUp(self):
+        self.lab = Lab.objects.create(name='Lab A')
+        self.other_lab = Lab.objects.create(name='Lab B')
+
+    def counts(self, lab=None, equipment_type='PC'):
+        row = Inventory.objects.filter(lab=lab or self.lab, equipment_type=equipment_type).first()
+        if row is None:
+            return None
+        return (row.total_quantity, row.working_quantity, row.not_working_quantity, row.under_repair_quantity)
+
+    def test_create_update_delete(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='PC')
+        Equipment.objects.create(lab=self.lab, equipment_type='PC', status='not_working')
+        self.assertEqual(self.counts(), (2, 1, 1, 0))
+
+        item.status = 'under_repair'
+        item.save()
+        self.assertEqual(self.counts(), (2, 0, 1, 1))
+
+        item = Equipment.objects.get(pk=item.pk)
+        item.lab = self.other_lab
+        item.equipment_type = 'MONITOR'
+        item.save()
+        self.assertEqual(self.counts(), (1, 0, 1, 0))
+        self.assertEqual(self.counts(self.other_lab, 'MONITOR'), (1, 0, 0, 1))
+
+        item.delete()
+        self.assertEqual(self.counts(self.other_lab, 'MONITOR'), (0, 0, 0, 0))
+
+    def test_bulk_operations(self):
+        items = Equipment.objects.bulk_create([
+            Equipment(lab=self.lab, equipment_type='PC') for _ in range(5)
+        ])
+        self.assertEqual(self.counts(), (5, 5, 0, 0))
+
+        Equipment.objects.filter(pk__in=[items[0].pk, items[1].pk]).update(status='not_working')
+        self.assertEqual(self.counts(), (5, 3, 2, 0))
+
+        Equipment.objects.filter(pk=items[2].pk).update(lab=self.other_lab)
+        self.assertEqual(self.counts(), (4, 2, 2, 0))
+        self.assertEqual(self.counts(self.other_lab), (1, 1, 0, 0))
+
+        for item in items[3:]:
+            item.status = 'under_repair'
+        Equipment.objects.bulk_update(items[3:], ['status'])
+        self.assertEqual(self.counts(), (4, 0, 2, 2))
+
+        Equipment.objects.filter(status='not_working').delete()
+        self.assertEqual(self.counts(), (2, 0, 0, 2))
+
+    def test_bulk_lab_move_refreshes_inventory_once(self):
+        items = Equipment.objects.bulk_create([Equipment(lab=self.lab, equipment_type='PC') for _ in range(30)])
+        Equipment.objects.create(lab=self.other_lab, equipment_type='MOUSE')
+        for item in items[:20]:
+            item.lab = self.other_lab
+        with CaptureQueriesContext(connection) as queries:
+            Equipment.objects.bulk_update(items[:20], ['lab'], batch_size=5)
+        self.assertEqual(self.counts(), (10, 10, 0, 0))
+        self.assertEqual(self.counts(self.other_lab), (20, 20, 0, 0))
+        # One keyed recount for the whole call, not a full recount per batch
+        recounts = [q['sql'] for q in queries.captured_queries
+                    if 'FROM "labs_equipment"' in q['sql'] and 'GROUP BY' in q['sql']]
+        self.assertEqual(len(recounts), 1)
+        self.assertIn('"labs_equipment"."lab_id" IN', recounts[0])
+
+    def test_rebuild_reports_and_fixes_drift(self):
+        Equipment.objects.create(lab=self.lab, equipment_type='PC')
+        Inventory.objects.filter(lab=self.lab).update(total_quantity=7)
+
+        out = StringIO()
+        call_command('rebuild_inventory', '--dry-run', stdout=out)
+        self.assertIn('1 inventory bucket(s) drifted', out.getvalue())
+        self.assertEqual(self.counts(), (7, 1, 0, 0))
+
+        out = StringIO()
+        call_command('rebuild_inventory', stdout=out)
+        self.assertEqual(self.counts(), (1, 1, 0, 0))
+
+        out = StringIO()
+        call_command('rebuild_inventory', stdout=out)
+        self.assertIn('in sync', out.getvalue())
+
+
+# ------------------------------
+# Pagination
+# ------------------------------
+class HybridPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        lab = Lab.objects.create(name='Lab A')
+        Equipment.objects.bulk_create([
+            Equipment(lab=lab, equipment_type='MOUSE', serial_number=f'SN-{i}') for i in range(120)
+        ])
+        self.ids = list(Equipment.objects.order_by('added_on', 'id').values_list('id', flat=True))
+
+    def test_page_number_mode_is_unchanged(self):
+        response = self.client.get('/api/equipment/')
+        self.assertEqual(response.data['count'], 120)
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertIn('page=2', response.data['next'])
+
+    def test_page_number_without_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/equipment/', {'page': 3, 'count': 'false'})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNone(response.data['next'])
+        self.assertIn('page=2', response.data['previous'])
+        self.assertFalse(any('COUNT' in q['sql'] for q in queries))
+
+    def test_cursor_walks_forward_and_back(self):
+        seen = []
+        url = '/api/equipment/?pagination=cursor'
+        pages = []
+        while url:
+            response = self.client.get(url)
+            pages.append(response.data)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, self.ids)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], self.ids[50:100])
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in response.data['results']], self.ids[:50])
+        self.assertIsNone(response.data['previous'])
+
+    def test_cursor_page_cost_is_constant(self):
+        first = self.client.get('/api/equipment/', {'pagination': 'cursor', 'count': 'false'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(first.data['next'])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+        self.assertEqual([row['id'] for row in response.data['results']], self.ids[50:100])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/equipment/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_bad_position_value(self):
+        for payload in ('{"v":"garbage","id":1}', '{"v":{"a":1},"id":1}', '{"v":null,"id":1}'):
+            token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+            for url in ('/api/equipment/', '/api/maintenance/', '/api/tickets/my/'):
+                response = self.client.get(url, {'cursor': token})
+                self.assertEqual(response.status_code, 404, (payload, url))
+                self.assertEqual(str(response.data['detail']), 'Invalid cursor')
+
+
+# ------------------------------
+# Bulk import
+# ------------------------------
+class BulkImportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.lab = Lab.objects.create(name='Lab A')
+        Equipment.objects.create(lab=self.lab, equipment_type='PC', serial_number='TAKEN')
+
+    def test_csv_equipment_import(self):
+        body = "\n".join([
+            "equipment_type,brand,serial_number,status,price",
+            "MONITOR,Dell,SN-1,working,120.50",
+            "MONITOR,Dell,SN-1,working,",
+            "MOUSE,Logitech,TAKEN,,",
+            "TOASTER,Acme,SN-2,working,",
+            "KEYBOARD,HP,,not_working,",
+        ])
+        response = self.client.post(
+            f'/api/import/equipment/?lab={self.lab.id}', data=body, content_type='text/csv'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rows'], 5)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(response.data['duplicates'], 2)
+        self.assertEqual(response.data['failed'], 1)
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 5, 4])
+        self.assertIn('equipment_type', response.data['errors'][1]['errors'])
+
+        self.assertTrue(Equipment.objects.filter(serial_number='SN-1', price='120.50').exists())
+        self.assertEqual(Inventory.objects.get(lab=self.lab, equipment_type='MONITOR').total_quantity, 1)
+
+    def test_ndjson_pc_import_and_unknown_lab(self):
+        body = "\n".join([
+            '{"lab": %d, "name": "PC-01", "status": "working", "serial_number": "PC-SN-1"}' % self.lab.id,
+            '{"lab": 999, "name": "PC-02", "status": "working"}',
+            'not json',
+            '',
+        ])
+        response = self.client.post('/api/import/pcs/', data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 2)
+        self.assertEqual(response.data['errors'][0]['errors'], {'non_field_errors': ['Row is not a JSON object.']})
+        self.assertEqual(response.data['errors'][1]['errors'], {'lab': ['Lab not found.']})
+        self.assertTrue(PC.objects.filter(name='PC-01', lab=self.lab).exists())
+
+    def test_query_count_is_bounded(self):
+        pc = PC.objects.create(lab=self.lab, name='PC-01', status='working')
+        body = "name,version\n" + "\n".join(f"App {i},1.{i}" for i in range(300))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f'/api/import/software/?pc={pc.id}', data=body, content_type='text/csv')
+        self.assertEqual(response.data['created'], 300)
+        self.assertLess(len(queries), 10)
+
+    def test_dry_run_and_permissions(self):
+        body = "equipment_type,serial_number\nMONITOR,SN-9"
+        response = self.client.post(
+            f'/api/import/equipment/?lab={self.lab.id}&dry_run=true', data=body, content_type='text/csv'
+        )
+        self.assertEqual(response.data['created'], 1)
+        self.assertFalse(Equipment.objects.filter(serial_number='SN-9').exists())
+
+        response = self.client.post('/api/import/equipment/', data='{}', content_type='application/json')
+        self.assertEqual(response.status_code, 415)
+
+        student = User.objects.create_user(username='student', password='pass')
+        self.client.force_authenticate(student)
+        response = self.client.post('/api/import/equipment/', data=body, content_type='text/csv')
+        self.assertEqual(response.status_code, 403)
+
+
+# ------------------------------
+# Streaming exports
+# ------------------------------
+class ExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.lab = Lab.objects.create(name='Lab A')
+        other_lab = Lab.objects.create(name='Lab B')
+        self.monitor = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR', serial_number='SN-1')
+        other = Equipment.objects.create(lab=other_lab, equipment_type='MOUSE')
+        MaintenanceLog.objects.create(equipment=self.monitor, reported_by=self.admin, status_before='working',
+                                      issue_description='No display, "flickers"')
+        MaintenanceLog.objects.create(equipment=other, reported_by=self.admin, status_before='working')
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_with_lab_filter(self):
+        response = self.client.get('/api/maintenance/export/', {'lab': self.lab.id})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = self.read(response).splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].startswith('id,lab,equipment,equipment__serial_number'))
+        self.assertIn('"No display, ""flickers"""', lines[1])
+
+    def test_ndjson_export_with_date_range(self):
+        today = datetime.date.today()
+        response = self.client.get('/api/equipment/export/', {'output': 'ndjson', 'until': today.isoformat()})
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['serial_number'] for row in rows], ['SN-1', None])
+
+        response = self.client.get('/api/equipment/export/', {'since': (today + datetime.timedelta(days=1)).isoformat()})
+        self.assertEqual(self.read(response).splitlines()[1:], [])
+
+        response = self.client.get('/api/equipment/export/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_streamed_under_asgi(self):
+        token = await sync_to_async(lambda: str(LabsRefreshToken.for_user(self.admin).access_token))()
+        response = await AsyncClient().get(
+            '/api/maintenance/export/', {'output': 'ndjson'}, headers={'Authorization': f'Bearer {token}'},
+        )
+        self.assertTrue(response.streaming and response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+
+    async def test_async_chunks_are_read_lazily(self):
+        pulled = []
+
+        def chunks():
+            for n in range(3):
+                pulled.append(n)
+                yield f'{n}\n'
+
+        stream = aiter_chunks(chunks())
+        self.assertEqual(await anext(stream), '0\n')
+        self.assertEqual(pulled, [0])
+        await stream.aclose()
+
+
+# ------------------------------
+# Dashboard
+# ------------------------------
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def seed_lab(self, name):
+        lab = Lab.objects.create(name=name)
+        pc = PC.objects.create(lab=lab, name=f'{name} PC', status='working')
+        student = User.objects.create_user(username=f'{name}-student', password='pass')
+        for status in ('working', 'not_working', 'under_repair'):
+            item = Equipment.objects.create(lab=lab, equipment_type='PC', status=status)
+            MaintenanceLog.objects.create(equipment=item, reported_by=student, status_before=status)
+        log = MaintenanceLog.objects.filter(lab=lab).order_by('id').first()
+        log.status = 'fixed'
+        log.save()
+        Ticket.objects.create(student=student, pc=pc, issue_description='Slow')
+        Ticket.objects.create(student=student, pc=pc, issue_description='Fixed already', status='resolved')
+        return lab
+
+    def test_summary_counts(self):
+        lab = self.seed_lab('Lab A')
+        self.seed_lab('Lab B')
+
+        response = self.client.get('/api/dashboard/summary/')
+        self.assertEqual(response.data['labs'], 2)
+        self.assertEqual(response.data['equipment'], {'total': 6, 'working': 2, 'not_working': 2, 'under_repair': 2})
+        self.assertEqual(response.data['maintenance'], {'pending': 4, 'fixed': 2})
+        self.assertEqual(response.data['open_tickets'], 2)
+        self.assertEqual(len(response.data['recent_activity']), 6)
+
+        response = self.client.get('/api/dashboard/summary/', {'lab': lab.id})
+        self.assertEqual(response.data['labs'], 1)
+        self.assertEqual(response.data['equipment']['total'], 3)
+        self.assertEqual(response.data['maintenance'], {'pending': 2, 'fixed': 1})
+        self.assertEqual(response.data['open_tickets'], 1)
+        self.assertEqual({row['lab'] for row in response.data['recent_activity']}, {lab.id})
+
+    def test_query_count_is_constant(self):
+        self.seed_lab('Lab 0')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get('/api/dashboard/summary/')
+        for i in range(1, 6):
+            self.seed_lab(f'Lab {i}')
+        with CaptureQueriesContext(connection) as many:
+            self.client.get('/api/dashboard/summary/')
+        self.assertEqual(len(few), len(many))
+
+
+# ------------------------------
+# Response cache
+# ------------------------------
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.lab = Lab.objects.create(name='Lab A')
+
+    def test_hit_then_invalidated_by_write(self):
+        response = self.client.get('/api/labs/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/labs/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data['count'], 1)
+
+        Lab.objects.create(name='Lab B')
+        response = self.client.get('/api/labs/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+        self.assertEqual(self.client.get('/api/cache/stats/').data['hits'], 1)
+        self.assertEqual(self.client.get('/api/cache/stats/').data['misses'], 2)
+
+    def test_keyed_by_query_and_role(self):
+        self.client.get('/api/equipment/')
+        self.assertEqual(self.client.get('/api/equipment/', {'page_size': 5})['X-Cache'], 'MISS')
+
+        student = User.objects.create_user(username='student', password='pass')
+        self.client.force_authenticate(student)
+        self.assertEqual(self.client.get('/api/equipment/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/equipment/')['X-Cache'], 'HIT')
+
+    def test_bulk_operations_invalidate(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='PC')
+        self.client.get('/api/equipment/')
+        Equipment.objects.filter(pk=item.pk).update(brand='Dell')
+        response = self.client.get('/api/equipment/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['brand'], 'Dell')
+
+        pc = PC.objects.create(lab=self.lab, name='PC-01', status='working')
+        self.client.get('/api/software/')
+        self.client.post(f'/api/import/software/?pc={pc.id}', data='name\nMATLAB', content_type='text/csv')
+        response = self.client.get('/api/software/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 1)
+
+        self.client.get('/api/pcs/')
+        PC.objects.filter(pk=pc.pk).update(status='not_working')
+        response = self.client.get('/api/pcs/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['status'], 'not_working')
+
+        self.client.get('/api/labs/')
+        Lab.objects.bulk_update([Lab(pk=self.lab.pk, name='Lab Z')], ['name'])
+        response = self.client.get('/api/labs/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['name'], 'Lab Z')
+
+
+# ------------------------------
+# Conditional GET
+# ------------------------------
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.lab = Lab.objects.create(name='Lab A')
+        self.pc = PC.objects.create(lab=self.lab, name='PC-01', status='working')
+
+    def test_list_etag_round_trip(self):
+        response = self.client.get('/api/pcs/')
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        # Cached lists validate against the version counters, not the table
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/pcs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(len(queries), 0)
+
+        PC.objects.create(lab=self.lab, name='PC-02', status='working')
+        response = self.client.get('/api/pcs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_uncached_list_uses_change_marker(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='PC')
+        log = MaintenanceLog.objects.create(equipment=item, reported_by=self.admin, status_before='working')
+        response = self.client.get('/api/maintenance/')
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/maintenance/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        MaintenanceLog.objects.filter(pk=log.pk).update(remarks='Replaced cable')
+        self.assertEqual(self.client.get('/api/maintenance/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_keyset_and_count_free_pages_skip_validation(self):
+        for params in ({'pagination': 'cursor'}, {'count': 'false'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/maintenance/', params)
+                self.assertNotIn('ETag', response)
+
+    def test_delete_changes_etag(self):
+        other = PC.objects.create(lab=self.lab, name='PC-02', status='working')
+        etag = self.client.get(f'/api/labs/{self.lab.id}/pcs/')['ETag']
+        other.delete()
+        response = self.client.get(f'/api/labs/{self.lab.id}/pcs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_if_modified_since(self):
+        response = self.client.get(f'/api/pcs/{self.pc.id}/')
+        last_modified = response['Last-Modified']
+        response = self.client.get(f'/api/pcs/{self.pc.id}/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/api/pcs/999/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_update_moves_marker(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='PC')
+        etag = self.client.get('/api/equipment/')['ETag']
+        Equipment.objects.filter(pk=item.pk).update(brand='Dell')
+        response = self.client.get('/api/equipment/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+# ------------------------------
+# Sparse fieldsets
+# ------------------------------
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.lab = Lab.objects.create(name='Lab A', location='Block A')
+        self.item = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR', brand='Dell', price='10.00')
+        self.log = MaintenanceLog.objects.create(
+            equipment=self.item, reported_by=self.admin, status_before='working',
+            issue_description='Flickers ' * 50, remarks='Long remark',
+        )
+
+    def select_sql(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in ctx.captured_queries if 'labs_maintenancelog"."id"' in q['sql']][-1]
+
+    def test_fields_narrow_output_and_columns(self):
+        response, sql = self.select_sql('/api/maintenance/?fields=id,status')
+        self.assertEqual(response.data['results'], [{'id': self.log.pk, 'status': 'pending'}])
+        self.assertNotIn('issue_description', sql)
+        self.assertNotIn('remarks', sql)
+
+        response, sql = self.select_sql('/api/maintenance/?exclude=issue_description,remarks')
+        row = response.data['results'][0]
+        self.assertNotIn('remarks', row)
+        self.assertIn('reported_by', row)
+        self.assertNotIn('issue_description', sql)
+
+    def test_compact_view(self):
+        response = self.client.get('/api/equipment/?view=compact')
+        self.assertEqual(set(response.data['results'][0]), set(EquipmentSerializer.compact_fields))
+        # Cached separately from the full representation
+        self.assertIn('price', self.client.get('/api/equipment/').data['results'][0])
+
+        response = self.client.get('/api/maintenance/?view=compact&pagination=cursor')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), set(MaintenanceLogSerializer.compact_fields))
+
+        response = self.client.get(f'/api/labs/{self.lab.pk}/?view=compact&expand=equipment')
+        self.assertEqual(set(response.data), {'id', 'name', 'location'})
+        response = self.client.get(f'/api/labs/{self.lab.pk}/?fields=name,equipment&expand=equipment')
+        self.assertEqual(response.data['equipment'][0]['id'], self.item.pk)
+
+    def test_invalid_selections(self):
+        self.assertEqual(self.client.get('/api/equipment/?fields=id,bogus').status_code, 400)
+        self.assertEqual(self.client.get('/api/equipment/?exclude=bogus').status_code, 400)
+        self.assertEqual(self.client.get('/api/equipment/?view=tiny').status_code, 400)
+
+    def test_writes_ignore_fieldsets(self):
+        response = self.client.patch(f'/api/equipment/{self.item.pk}/?fields=id', {'brand': 'HP'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['brand'], 'HP')
+
+
+# ------------------------------
+# Live events
+# ------------------------------
+class EventBrokerTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(username='student', password='pass', role='student')
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def test_replay_filters_and_gaps(self):
+        broker = EventBroker(replay_size=3)
+        first = broker.publish('maintenance', 'created', 1, {})
+        broker.publish('ticket', 'created', 1, {}, student_id=self.student.pk + 1)
+        broker.publish('maintenance', 'updated', 2, {})
+        last = broker.publish('ticket', 'updated', 1, {}, student_id=self.student.pk)
+
+        subscriber = Subscriber(self.loop, self.student, {'maintenance', 'ticket'}, None, 10)
+        backlog, complete = broker.subscribe(subscriber, first['id'])
+        self.assertTrue(complete)
+        # Another student's ticket is filtered out
+        self.assertEqual([event['type'] for event in backlog], ['maintenance.updated', 'ticket.updated'])
+
+        lab_only = Subscriber(self.loop, self.student, {'maintenance', 'ticket'}, 1, 10)
+        backlog, complete = broker.subscribe(lab_only, f"{broker.boot}-0")
+        self.assertFalse(complete)
+        self.assertEqual([event['id'] for event in backlog], [last['id']])
+
+        self.assertEqual(broker.subscribe(subscriber, 'other-boot-5'), ([], False))
+        self.assertEqual(broker.stats()['subscribers'], 2)
+        broker.unsubscribe(subscriber)
+        self.assertEqual(broker.stats()['subscribers'], 1)
+
+    def test_bulk_resolve_publishes_updates(self):
+        admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        lab = Lab.objects.create(name='Lab A')
+        item = Equipment.objects.create(lab=lab, equipment_type='MONITOR', status='not_working')
+        log = MaintenanceLog.objects.create(equipment=item, reported_by=admin, status_before='not_working')
+        client = APIClient()
+        client.force_authenticate(admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(reverse('maintenance-resolve'), {'ids': [log.pk]}, format='json')
+        event = broker.replay[-1]
+        self.assertEqual((event['type'], event['data']['id'], event['data']['status']), ('maintenance.updated', log.pk, 'fixed'))
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.student = User.objects.create_user(username='student', password='pass', role='student')
+        self.other = User.objects.create_user(username='other', password='pass', role='student')
+        self.lab = Lab.objects.create(name='Lab A')
+        self.pc = PC.objects.create(lab=self.lab, name='PC-01', status='working')
+        self.item = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR')
+        self.url = reverse('event-stream')
+
+    def token(self, user):
+        return str(LabsRefreshToken.for_user(user).access_token)
+
+    async def open_stream(self, user, **params):
+        response = await AsyncClient().get(self.url, {'token': self.token(user), **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content.__aiter__()
+        self.assertEqual(await stream.__anext__(), b'retry: 3000\n\n')
+        return stream
+
+    def committed(self, action):
+        with self.captureOnCommitCallbacks(execute=True):
+            return action()
+
+    async def test_student_stream_gets_maintenance_and_own_tickets(self):
+        stream = await self.open_stream(self.student)
+        try:
+            await sync_to_async(self.committed)(
+                lambda: Ticket.objects.create(student=self.other, pc=self.pc, issue_description='Not mine')
+            )
+            ticket = await sync_to_async(self.committed)(
+                lambda: Ticket.objects.create(student=self.student, pc=self.pc, issue_description='Mine')
+            )
+            chunk = (await asyncio.wait_for(stream.__anext__(), 5)).decode()
+            self.assertIn('event: ticket.created', chunk)
+            payload = json.loads(chunk.split('data: ', 1)[1])
+            self.assertEqual((payload['lab'], payload['data']['id']), (self.lab.pk, ticket.pk))
+
+            log = await sync_to_async(self.committed)(lambda: MaintenanceLog.objects.create(
+                equipment=self.item, reported_by=self.admin, status_before='working',
+            ))
+            chunk = (await asyncio.wait_for(stream.__anext__(), 5)).decode()
+            self.assertIn('event: maintenance.created', chunk)
+            event_id = chunk.split('\n', 1)[0][len('id: '):]
+        finally:
+            await stream.aclose()
+
+        # Resume after a disconnect with Last-Event-ID
+        log.status = 'fixed'
+        await sync_to_async(self.committed)(log.save)
+        stream = await self.open_stream(self.admin, topics='maintenance', last_event_id=event_id)
+        try:
+            chunk = (await asyncio.wait_for(stream.__anext__(), 5)).decode()
+            self.assertIn('event: maintenance.updated', chunk)
+        finally:
+            await stream.aclose()
+
+    async def test_rejects_bad_requests(self):
+        client = AsyncClient()
+        self.assertEqual((await client.get(self.url)).status_code, 401)
+        self.assertEqual((await client.get(self.url, {'token': 'junk'})).status_code, 401)
+        response = await client.get(self.url, {'token': self.token(self.admin), 'topics': 'gossip'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_needs_asgi(self):
+        response = self.client.get(self.url, {'token': self.token(self.admin)})
+        self.assertEqual(response.status_code, 501)
+
+
+# ------------------------------
+# Async read endpoints
+# ------------------------------
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.student = User.objects.create_user(username='student', password='pass', role='student')
+        self.lab = Lab.objects.create(name='Lab A')
+        self.pc = PC.objects.create(lab=self.lab, name='PC-01', status='working')
+        self.item = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR', price='99.50')
+        MaintenanceLog.objects.create(equipment=self.item, reported_by=self.admin, status_before='working')
+        self.ticket = Ticket.objects.create(student=self.student, pc=self.pc, issue_description='Broken')
+        Ticket.objects.create(student=self.admin, pc=self.pc, issue_description='Not the student\'s')
+        user_cache.clear()
+
+    def headers(self, user):
+        return {'Authorization': f'Bearer {LabsRefreshToken.for_user(user).access_token}'}
+
+    async def test_matches_sync_endpoints(self):
+        client = AsyncClient()
+        headers = self.headers(self.admin)
+        for sync_url, async_url in (
+            ('/api/equipment/', '/api/async/equipment/'),
+            ('/api/maintenance/', '/api/async/maintenance/'),
+            (f'/api/labs/{self.lab.pk}/', f'/api/async/labs/{self.lab.pk}/'),
+            ('/api/inventory/', '/api/async/inventory/'),
+        ):
+            expected = await sync_to_async(lambda: self.client.get(sync_url, headers=headers).json())()
+            response = await client.get(async_url, headers=headers)
+            self.assertEqual(response.status_code, 200, async_url)
+            self.assertEqual(response.json(), expected, async_url)
+
+    async def test_permissions_and_errors(self):
+        client = AsyncClient()
+        response = await client.get('/api/async/tickets/', headers=self.headers(self.student))
+        self.assertEqual([row['id'] for row in response.json()['results']], [self.ticket.pk])
+        self.assertEqual((await client.get('/api/async/labs/')).status_code, 401)
+        self.assertEqual((await client.get('/api/async/tickets/')).status_code, 401)
+        # A session cookie is not an API credential
+        session_client = AsyncClient()
+        await session_client.aforce_login(self.admin)
+        self.assertEqual((await session_client.get('/api/async/tickets/')).status_code, 401)
+        response = await client.get('/api/async/labs/', headers={'Authorization': 'Bearer junk'})
+        self.assertEqual(response.status_code, 401)
+        response = await client.get('/api/async/pcs/999/', headers=self.headers(self.admin))
+        self.assertEqual(response.status_code, 404)
+        response = await client.get('/api/async/inventory/?lab=x', headers=self.headers(self.admin))
+        self.assertEqual(response.json(), {'lab': 'Lab must be an integer id'})
+        response = await client.post('/api/async/labs/', headers=self.headers(self.admin))
+        self.assertEqual(response.status_code, 405)
+
+    async def test_async_auth_uses_the_user_cache(self):
+        request = RequestFactory().get('/', headers=self.headers(self.admin))
+        authentication = CachedJWTAuthentication()
+        user, _ = await authentication.aauthenticate(request)
+        self.assertEqual((user.pk, request.auth_queries), (self.admin.pk, 1))
+
+        request = RequestFactory().get('/', headers=self.headers(self.admin))
+        await authentication.aauthenticate(request)
+        self.assertFalse(hasattr(request, 'auth_queries'))
+        self.assertEqual(user_cache.stats()['hits'], 1)
+
+
+class ConcurrencyBenchmarkTests(TransactionTestCase):
+    # The WSGI run serves requests from pool threads, which cannot see a TestCase transaction,
+    # and outside a transaction its reads go to any configured replicas
+    databases = '__all__'
+
+    def test_all_stacks_serve_the_endpoint(self):
+        Lab.objects.create(name='Lab A')
+        out = StringIO()
+        call_command('benchmark_concurrency', clients=3, requests=2, endpoint='labs', stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+        for stack in ('wsgi_sync', 'asgi_sync', 'asgi_async'):
+            self.assertEqual(report[stack]['status'], {'200': 6}, stack)
+
+
+# ------------------------------
+# Read replicas
+# ------------------------------
+class ReplicaSetTests(SimpleTestCase):
+    def test_round_robin_cycles_replicas(self):
+        replicas = ReplicaSet(['replica_1', 'replica_2'], selection='round_robin', check=lambda alias: True)
+        self.assertEqual([replicas.choose() for _ in range(4)], ['replica_1', 'replica_2', 'replica_1', 'replica_2'])
+
+    def test_least_recent_prefers_the_idle_replica(self):
+        replicas = ReplicaSet(['replica_1', 'replica_2'], selection='least_recent', check=lambda alias: True)
+        self.assertEqual(replicas.pick(now=10), 'replica_1')
+        self.assertEqual(replicas.pick(now=11), 'replica_2')
+        self.assertEqual(replicas.pick(now=12), 'replica_1')
+
+    def test_unreachable_replica_is_skipped_then_retried(self):
+        reachable = {'replica_1': False, 'replica_2': True}
+        replicas = ReplicaSet(['replica_1', 'replica_2'], retry_after=60, check=lambda alias: reachable[alias])
+        self.assertEqual(replicas.choose(), 'replica_2')
+        self.assertEqual(replicas.choose(), 'replica_2')
+        self.assertEqual(replicas.status()['replicas'], {'replica_1': 'down', 'replica_2': 'up'})
+
+        replicas.retry_after = 0
+        replicas.mark_down('replica_2')
+        reachable['replica_1'] = True
+        self.assertIn(replicas.choose(), ('replica_1', 'replica_2'))
+
+    def test_all_replicas_down_falls_back_to_primary(self):
+        replicas = ReplicaSet(['replica_1'], check=lambda alias: False)
+        self.assertIsNone(replicas.choose())
+        self.assertIsNone(replicas.choose())
+        self.assertEqual(replicas.failures, 1)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.replicas = ReplicaSet(['replica_1', 'replica_2'], check=lambda alias: True)
+        patcher = mock.patch('labs.db_router.replica_set', self.replicas)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+        self.factory = RequestFactory()
+        self.token = str(AccessToken.for_user(User(pk=7, username='reader')))
+
+    def serve(self, method, status=200, fail=False):
+        """Run a request through the middleware and record where its reads went."""
+        reads = []
+
+        def view(request):
+            alias = ReplicaRouter().db_for_read(Lab)
+            reads.append(alias)
+            if fail and len(reads) == 1:
+                _routing.get().failed = True
+            return HttpResponse(status=status)
+
+        request = getattr(self.factory, method)('/api/labs/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = ReplicaRoutingMiddleware(view)(request)
+        return response, reads
+
+    def test_reads_outside_a_request_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Lab), 'default')
+        self.assertEqual(ReplicaRouter().db_for_write(Lab), 'default')
+
+    def test_safe_requests_read_from_replicas(self):
+        self.assertEqual(self.serve('get')[1], ['replica_1'])
+        self.assertEqual(self.serve('get')[1], ['replica_2'])
+
+    def test_writes_use_primary_and_pin_the_user(self):
+        self.assertEqual(self.serve('post', status=201)[1], ['default'])
+        self.assertEqual(self.serve('get')[1], ['default'])
+
+        # Another client is unaffected
+        self.token = str(AccessToken.for_user(User(pk=8, username='other')))
+        self.assertEqual(self.serve('get')[1], ['replica_1'])
+
+    def test_failed_write_does_not_pin(self):
+        self.serve('post', status=400)
+        self.assertEqual(self.serve('get')[1], ['replica_1'])
+
+    def test_replica_failure_retries_on_primary(self):
+        response, reads = self.serve('get', fail=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, ['replica_1', 'default'])
+        self.assertEqual(self.replicas.status()['replicas']['replica_1'], 'down')
+        self.assertEqual(self.serve('get')[1], ['replica_2'])
+
+    async def test_async_views_retry_on_primary(self):
+        reads = []
+
+        async def view(request):
+            reads.append(await sync_to_async(ReplicaRouter().db_for_read)(Lab))
+            if len(reads) == 1:
+                _routing.get().failed = True
+            return HttpResponse()
+
+        request = self.factory.get('/api/async/labs/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        response = await ReplicaRoutingMiddleware(view)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads, ['replica_1', 'default'])
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(ReplicaRouter().allow_migrate('replica_1', 'labs'))
+        self.assertIsNone(ReplicaRouter().allow_migrate('default', 'labs'))
+
+
+class SyncReplicasTests(TestCase):
+    def test_without_replicas(self):
+        out = StringIO()
+        with mock.patch('labs.management.commands.sync_replicas.replica_aliases', return_value=[]):
+            call_command('sync_replicas', stdout=out)
+        self.assertIn('No replicas configured', out.getvalue())
+
+    def test_unknown_replica(self):
+        with self.assertRaises(CommandError):
+            call_command('sync_replicas', replicas=['replica_9'], stdout=StringIO())
+
+
+# ------------------------------
+# SQLite production profile
+# ------------------------------
+class SqliteProductionBackendTests(SimpleTestCase):
+    def setUp(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        self.path = os.path.join(workdir, 'lms.sqlite3')
+
+    def wrapper(self, **options):
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'LMS.sqlite_backend',
+            'NAME': self.path,
+            'OPTIONS': {**production_options(), **options},
+        }
+        wrapper = load_backend('LMS.sqlite_backend').DatabaseWrapper(settings_dict, 'sqlite_profile')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_pragmas_and_transaction_mode(self):
+        wrapper = self.wrapper()
+        with wrapper.cursor() as cursor:
+            pragmas = {name: cursor.execute(f'PRAGMA {name}').fetchone()[0] for name in ('journal_mode', 'busy_timeout', 'synchronous')}
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'busy_timeout': 5000, 'synchronous': 1})
+        self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+
+    def hold_write_lock(self):
+        holder = sqlite3.connect(self.path, check_same_thread=False)
+        self.addCleanup(holder.close)
+        holder.execute('CREATE TABLE IF NOT EXISTS t (x)')
+        holder.execute('BEGIN IMMEDIATE')
+        return holder
+
+    def test_begin_gives_up_after_bounded_retries(self):
+        wrapper = self.wrapper(init_command='PRAGMA busy_timeout=10', begin_retries=2, begin_retry_delay=0.01)
+        wrapper.ensure_connection()
+        self.hold_write_lock()
+        before = lock_stats()
+        with self.assertRaisesMessage(OperationalError, 'locked'):
+            wrapper._start_transaction_under_autocommit()
+        after = lock_stats()
+        self.assertEqual(after['begin_retries'] - before['begin_retries'], 2)
+        self.assertEqual(after['begin_failures'] - before['begin_failures'], 1)
+
+    def test_begin_retry_outlasts_a_held_lock(self):
+        wrapper = self.wrapper(init_command='PRAGMA busy_timeout=10', begin_retries=6, begin_retry_delay=0.01)
+        wrapper.ensure_connection()
+        holder = self.hold_write_lock()
+        release = threading.Timer(0.05, holder.commit)
+        release.start()
+        self.addCleanup(release.cancel)
+        wrapper._start_transaction_under_autocommit()
+        wrapper.cursor().execute('INSERT INTO t VALUES (1)')
+        wrapper.connection.commit()
+
+
+class SqliteContentionBenchmarkTests(TransactionTestCase):
+    def test_production_profile_has_no_lock_errors(self):
+        Lab.objects.create(name='Lab A')
+        out = StringIO()
+        call_command(
+            'benchmark_sqlite_contention', writers=2, readers=1, duration=0.5, profiles=['production'], stdout=out,
+        )
+        profile = json.loads(out.getvalue())['profiles']['production']
+        self.assertGreater(profile['writes']['requests'], 0)
+        self.assertGreater(profile['reads']['requests'], 0)
+        self.assertEqual(profile['writes']['failed'], 0)
+        self.assertEqual(profile['reads']['failed'], 0)
+
+
+# ------------------------------
+# Status history
+# ------------------------------
+class StatusHistoryTests(TestCase):
+    def setUp(self):
+        self.lab = Lab.objects.create(name='Lab A')
+        self.other_lab = Lab.objects.create(name='Lab B')
+        self.user = User.objects.create_user(username='student', password='pass', role='student')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def statuses(self, kind, pk):
+        return list(StatusEvent.objects.filter(kind=kind, object_id=pk).order_by('id').values_list('status', flat=True))
+
+    def test_save_records_transitions_only(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='MOUSE', status='working')
+        item.brand = 'Logitech'
+        item.save()
+        item.status = 'under_repair'
+        item.save()
+        pc = PC.objects.create(lab=self.lab, name='A1', status='working')
+        pc.name = 'A1-renamed'
+        pc.save()
+        pc.lab = self.other_lab
+        pc.save()
+        pk, pc_pk = item.pk, pc.pk
+        item.delete()
+        pc.delete()
+
+        self.assertEqual(self.statuses(EQUIPMENT, pk), ['working', 'under_repair', REMOVED])
+        self.assertEqual(self.statuses(PCS, pc_pk), ['working', 'working', REMOVED])
+        self.assertEqual(
+            list(StatusEvent.objects.filter(kind=PCS).values_list('lab_id', flat=True)),
+            [self.lab.pk, self.other_lab.pk, self.other_lab.pk],
+        )
+
+    def test_bulk_writes_record_transitions(self):
+        items = Equipment.objects.bulk_create([
+            Equipment(lab=self.lab, equipment_type='MOUSE', serial_number=f'M{n}') for n in range(3)
+        ])
+        pc = PC.objects.create(lab=self.lab, name='A1', status='working')
+        Equipment.objects.filter(pk__in=[items[0].pk, items[1].pk]).update(status='not_working')
+        items[2].status = 'under_repair'
+        items[1].status = 'not_working'  # unchanged by this bulk_update
+        Equipment.objects.bulk_update(items[1:], ['status'])
+        PC.objects.filter(pk=pc.pk).update(status='not_working')
+        PC.objects.filter(pk=pc.pk).update(name='A1')
+        pc.status = 'working'
+        PC.objects.bulk_update([pc], ['status'])
+
+        self.assertEqual(self.statuses(EQUIPMENT, items[0].pk), ['working', 'not_working'])
+        self.assertEqual(self.statuses(EQUIPMENT, items[1].pk), ['working', 'not_working'])
+        self.assertEqual(self.statuses(EQUIPMENT, items[2].pk), ['working', 'under_repair'])
+        self.assertEqual(self.statuses(PCS, pc.pk), ['working', 'not_working', 'working'])
+
+    def test_events_are_append_only(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='MOUSE')
+        event = StatusEvent.objects.get(object_id=item.pk)
+        event.status = 'not_working'
+        with self.assertRaises(ValueError):
+            event.save()
+
+    def test_inventory_as_of_with_and_without_checkpoint(self):
+        items = [Equipment.objects.create(lab=self.lab, equipment_type='MONITOR') for _ in range(3)]
+        PC.objects.create(lab=self.lab, name='A1', status='working')
+        before = timezone.now()
+        items[0].status = 'under_repair'
+        items[0].save()
+        items[1].delete()
+        Equipment.objects.create(lab=self.other_lab, equipment_type='MOUSE')
+
+        past = inventory_at(before)
+        self.assertEqual(past['equipment'], [{
+            'lab': self.lab.pk, 'equipment_type': 'MONITOR',
+            'total_quantity': 3, 'working_quantity': 3, 'not_working_quantity': 0, 'under_repair_quantity': 0,
+        }])
+        self.assertEqual(past['pcs'][0]['total_quantity'], 1)
+        present = inventory_at(timezone.now(), lab_id=self.lab.pk)
+        self.assertEqual(present['equipment'][0]['total_quantity'], 2)
+        self.assertEqual(present['equipment'][0]['under_repair_quantity'], 1)
+
+        checkpoint, items_checkpointed, corrections = take_checkpoint(settle=datetime.timedelta(0))
+        self.assertEqual((items_checkpointed, corrections), (4, 0))
+        after = inventory_at(timezone.now(), lab_id=self.lab.pk)
+        self.assertEqual(after['checkpoint'], checkpoint.taken_at)
+        self.assertEqual(after['events_replayed'], 0)
+        self.assertEqual(after['equipment'], present['equipment'])
+        self.assertEqual(inventory_at(before)['equipment'], past['equipment'])
+
+    def test_uptime_over_a_range(self):
+        start = timezone.now() - datetime.timedelta(days=2)
+        end = start + datetime.timedelta(hours=12)
+        record(EQUIPMENT, {1: (self.lab.pk, 'MOUSE', 'working')}, at=start - datetime.timedelta(hours=10))
+        record(EQUIPMENT, {1: (self.lab.pk, 'MOUSE', 'not_working')}, at=start + datetime.timedelta(hours=6))
+        record(EQUIPMENT, {1: (self.lab.pk, 'MOUSE', 'working')}, at=start + datetime.timedelta(hours=9))
+        # Added halfway through the range, removed after it
+        record(EQUIPMENT, {2: (self.lab.pk, 'MOUSE', 'working')}, at=start + datetime.timedelta(hours=6))
+        record(EQUIPMENT, {2: (self.lab.pk, 'MOUSE', REMOVED)}, at=end + datetime.timedelta(hours=1))
+
+        rows = {row['id']: row for row in uptime(EQUIPMENT, start, end)}
+        self.assertEqual(rows[1], {
+            'id': 1, 'tracked_seconds': 12 * 3600, 'up_seconds': 9 * 3600, 'uptime_pct': 75.0, 'transitions': 2,
+        })
+        self.assertEqual(rows[2]['tracked_seconds'], 6 * 3600)
+        self.assertEqual(rows[2]['uptime_pct'], 100.0)
+        self.assertEqual(uptime(EQUIPMENT, start, end, lab_id=self.other_lab.pk), [])
+
+    def test_checkpoint_reconciles_writes_behind_the_orm(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='MOUSE')
+        Equipment._base_manager.filter(pk=item.pk).update(status='not_working')
+        now = timezone.now()
+        checkpoint, _, corrections = take_checkpoint(now=now, settle=datetime.timedelta(0))
+        self.assertEqual(corrections, 1)
+        self.assertEqual(self.statuses(EQUIPMENT, item.pk), ['working', 'not_working'])
+        self.assertEqual(take_checkpoint(now=now, settle=datetime.timedelta(0)), (None, 0, 0))
+
+        take_checkpoint(now=now + datetime.timedelta(seconds=1), settle=datetime.timedelta(0))
+        out = StringIO()
+        call_command('checkpoint_status_history', '--settle-seconds', '0', '--keep', '1', stdout=out)
+        self.assertIn('Pruned', out.getvalue())
+        self.assertLessEqual(StatusCheckpoint.objects.count(), 2)
+
+    def test_history_endpoints(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='MOUSE')
+        response = self.client.get(reverse('inventory-history'), {'at': timezone.localdate().isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['equipment'][0]['total_quantity'], 1)
+        yesterday = timezone.localdate() - datetime.timedelta(days=1)
+        response = self.client.get(reverse('inventory-history'), {'at': yesterday.isoformat()})
+        self.assertEqual(response.data['equipment'], [])
+
+        response = self.client.get(reverse('inventory-uptime'), {'lab': self.lab.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data['results']], [item.pk])
+        self.assertEqual(response.data['results'][0]['uptime_pct'], 100.0)
+
+        for url, params in (
+            ('inventory-history', {'at': 'yesterday'}),
+            ('inventory-history', {'lab': 'x'}),
+            ('inventory-uptime', {'kind': 'printer'}),
+            ('inventory-uptime', {'start': '2030-01-02', 'end': '2030-01-01'}),
+        ):
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.client.get(reverse(url), params).status_code, 400)
+
+
+# ------------------------------
+# Maintenance KPI rollups
+# ------------------------------
+class MaintenanceRollupTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='tech', password='pass', role='admin')
+        self.other = User.objects.create_user(username='tech2', password='pass', role='admin')
+        self.lab = Lab.objects.create(name='Lab A')
+        self.other_lab = Lab.objects.create(name='Lab B')
+        self.monitor = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR')
+        self.mouse = Equipment.objects.create(lab=self.other_lab, equipment_type='MOUSE')
+        self.day = datetime.date(2030, 1, 10)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def at(self, day_offset, hours=0):
+        moment = datetime.datetime.combine(self.day + datetime.timedelta(days=day_offset), datetime.time(9))
+        return timezone.make_aware(moment) + datetime.timedelta(hours=hours)
+
+    def log(self, equipment, reported_on, fixed_on=None, fixed_by=None):
+        log = MaintenanceLog.objects.create(equipment=equipment, reported_by=self.admin, status_before='not_working')
+        MaintenanceLog.objects.filter(pk=log.pk).update(
+            reported_on=reported_on, fixed_on=fixed_on, fixed_by=fixed_by,
+            status='fixed' if fixed_on else 'pending', updated_at=timezone.now(),
+        )
+        return MaintenanceLog.objects.get(pk=log.pk)
+
+    def stats(self, start_offset=0, end_offset=2, **kwargs):
+        return maintenance_stats(self.day + datetime.timedelta(days=start_offset),
+                                 self.day + datetime.timedelta(days=end_offset), **kwargs)
+
+    def test_full_build_and_range_stats(self):
+        self.log(self.monitor, self.at(-5))  # still open: backlog before the range
+        self.log(self.monitor, self.at(0), self.at(0, hours=2), self.admin)
+        self.log(self.monitor, self.at(0), self.at(1), self.admin)
+        self.log(self.mouse, self.at(1), self.at(1, hours=1), self.other)
+        self.log(self.mouse, self.at(2))
+        self.assertIsNone(build_maintenance_rollups())
+
+        stats = self.stats()
+        self.assertEqual(stats['totals']['incoming'], 4)
+        self.assertEqual(stats['totals']['resolved'], 3)
+        self.assertEqual(stats['totals']['backlog_start'], 1)
+        self.assertEqual(stats['totals']['backlog_end'], 2)
+        self.assertEqual(stats['totals']['mean_time_to_fix_seconds'], (2 + 24 + 1) * 3600 // 3)
+        self.assertEqual([row['backlog'] for row in stats['days']], [2, 1, 2])
+        self.assertEqual([row['incoming'] for row in stats['days']], [2, 1, 1])
+        self.assertEqual(
+            [(row['lab'], row['equipment_type'], row['resolved']) for row in stats['breakdown']],
+            [(self.lab.pk, 'MONITOR', 2), (self.other_lab.pk, 'MOUSE', 1)],
+        )
+        self.assertEqual(
+            [(row['username'], row['resolved']) for row in stats['technicians']], [('tech', 2), ('tech2', 1)],
+        )
+
+        monitors = self.stats(lab_id=self.lab.pk, equipment_type='MONITOR')
+        self.assertEqual(monitors['totals']['resolved'], 2)
+        self.assertEqual(monitors['totals']['backlog_end'], 1)
+        self.assertEqual([row['username'] for row in monitors['technicians']], ['tech'])
+        # Interpolated within the (12h, 1d] bucket, never above the slowest fix
+        self.assertTrue(12 * 3600 < monitors['totals']['p90_time_to_fix_seconds'] <= 24 * 3600)
+
+    @mock.patch('labs.rollups.WATERMARK_OVERLAP', datetime.timedelta(0))
+    def test_incremental_build_recomputes_changed_days_only(self):
+        first = self.log(self.monitor, self.at(0), self.at(1), self.admin)
+        build_maintenance_rollups()
+
+        self.log(self.mouse, self.at(2), self.at(2, hours=1), self.other)
+        self.assertEqual(build_maintenance_rollups(), {self.day + datetime.timedelta(days=2)})
+        self.assertEqual(self.stats()['totals']['resolved'], 2)
+
+        # Moving a fix to another day dirties the day it left
+        first.fixed_on = self.at(0, hours=3)
+        first.save()
+        self.assertEqual(build_maintenance_rollups(), {self.day, self.day + datetime.timedelta(days=1)})
+        stats = self.stats()
+        self.assertEqual([row['resolved'] for row in stats['days']], [1, 0, 1])
+
+        first.delete()
+        self.assertEqual(build_maintenance_rollups(), {self.day})
+        self.assertEqual(self.stats()['totals']['incoming'], 1)
+        self.assertEqual(build_maintenance_rollups(), set())
+
+    def test_late_commit_behind_watermark_is_picked_up(self):
+        self.log(self.monitor, self.at(0), self.at(0, hours=1), self.admin)
+        build_maintenance_rollups()
+        # Written by a transaction that started before the build but committed after it
+        late = self.log(self.mouse, self.at(1), self.at(1, hours=1), self.other)
+        watermark = RollupWatermark.objects.get(name=MAINTENANCE_KPIS).watermark
+        MaintenanceLog.objects.filter(pk=late.pk).update(updated_at=watermark - datetime.timedelta(seconds=5))
+        self.assertIn(self.day + datetime.timedelta(days=1), build_maintenance_rollups())
+        self.assertEqual(self.stats()['totals']['resolved'], 2)
+
+    def test_day_ranges_cover_runs_of_days(self):
+        days = [self.day + datetime.timedelta(days=n) for n in (0, 1, 2, 5)]
+        midnight = lambda n: timezone.make_aware(
+            datetime.datetime.combine(self.day + datetime.timedelta(days=n), datetime.time.min))
+        self.assertEqual(day_ranges(days), [(midnight(0), midnight(3)), (midnight(5), midnight(6))])
+        # Logs at either end of a day belong to it, the next midnight does not
+        self.log(self.monitor, midnight(5))
+        self.log(self.monitor, midnight(6) - datetime.timedelta(microseconds=1))
+        self.log(self.monitor, midnight(6))
+        self.log(self.monitor, midnight(3), midnight(4))
+        self.assertEqual(MaintenanceLog.objects.filter(reported_or_fixed_in(day_ranges(days[3:]))).count(), 2)
+
+    def test_resolve_endpoint_feeds_rollups(self):
+        log = MaintenanceLog.objects.create(equipment=self.monitor, reported_by=self.admin, status_before='not_working')
+        build_maintenance_rollups()
+        response = self.client.post(reverse('maintenance-resolve'), {'ids': [log.pk], 'status_after': 'working'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        build_maintenance_rollups()
+        today = timezone.localdate()
+        stats = maintenance_stats(today, today)
+        self.assertEqual((stats['totals']['incoming'], stats['totals']['resolved']), (1, 1))
+        self.assertEqual(stats['technicians'][0]['technician'], self.admin.pk)
+
+    def test_histogram_percentile(self):
+        histogram = [0] * (len(FIX_BUCKETS) + 1)
+        self.assertIsNone(histogram_percentile(histogram, 0, 0.9))
+        histogram[FIX_BUCKETS.index(3600)] = 10
+        self.assertEqual(histogram_percentile(histogram, 3600, 0.9), 1800 + 1800 * 9 // 10)
+        histogram[-1] = 1
+        self.assertEqual(histogram_percentile(histogram, 90 * 86400, 1.0), 90 * 86400)
+
+    def test_stats_endpoint(self):
+        self.log(self.monitor, self.at(0), self.at(0, hours=2), self.admin)
+        call_command('build_maintenance_rollups', stdout=StringIO())
+        url = reverse('maintenance-stats')
+        response = self.client.get(url, {'start': '2030-01-10', 'end': '2030-01-11', 'lab': self.lab.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['as_of'])
+        self.assertEqual(response.data['totals']['resolved'], 1)
+        self.assertEqual(len(response.data['days']), 2)
+
+        for params in (
+            {'start': '10/01/2030'},
+            {'start': '2030-01-12', 'end': '2030-01-11'},
+            {'start': '2000-01-01', 'end': '2030-01-11'},
+            {'lab': 'x'},
+            {'equipment_type': 'TOASTER'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+# ------------------------------
+# Global search
+# ------------------------------
+class SearchTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('search')
+        self.lab = Lab.objects.create(name='Physics Lab', location='Block B')
+        self.other = Lab.objects.create(name='Chemistry Lab')
+        self.pc = PC.objects.create(lab=self.lab, name='PC-01', brand='Lenovo', status='working')
+        self.monitor = Equipment.objects.create(
+            lab=self.lab, equipment_type='MONITOR', brand='Dell', model_name='P2419H', serial_number='DL-100',
+        )
+        Equipment.objects.create(lab=self.other, equipment_type='KEYBOARD', brand='Dell', serial_number='DL-200')
+        self.software = Software.objects.create(pc=self.pc, name='MATLAB', version='R2024a')
+
+    def test_ranked_typed_results(self):
+        response = self.client.get(self.url, {'q': 'dell p24'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row['type'], row['id'], row['lab']) for row in response.data['results']],
+            [('equipment', self.monitor.pk, self.lab.pk)],
+        )
+
+        results = self.client.get(self.url, {'q': 'lab'}).data['results']
+        self.assertEqual({row['type'] for row in results}, {'lab'})
+
+        results = self.client.get(self.url, {'q': 'dell', 'type': 'equipment', 'lab': self.other.pk}).data['results']
+        self.assertEqual([row['body'].split()[0] for row in results], ['DL-200'])
+
+    def test_validation(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'dell', 'type': 'toaster'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'q': 'dell', 'limit': '500'}).status_code, 400)
+        # FTS syntax in the query is treated as text
+        self.assertEqual(self.client.get(self.url, {'q': 'dell" OR NOT *'}).status_code, 200)
+
+    def test_index_follows_saves_moves_and_deletes(self):
+        self.software.name = 'Octave'
+        self.software.save()
+        self.assertEqual(self.client.get(self.url, {'q': 'matlab'}).data['results'], [])
+        self.assertEqual(len(self.client.get(self.url, {'q': 'octave'}).data['results']), 1)
+
+        self.pc.lab = self.other
+        self.pc.save()
+        results = self.client.get(self.url, {'q': 'octave', 'lab': self.other.pk}).data['results']
+        self.assertEqual([row['id'] for row in results], [self.software.pk])
+
+        self.monitor.delete()
+        self.assertEqual(self.client.get(self.url, {'q': 'p2419h'}).data['results'], [])
+
+    def test_bulk_updates_reindex(self):
+        Equipment.objects.filter(pk=self.monitor.pk).update(brand='Epson')
+        self.assertEqual(search('epson')[0]['id'], self.monitor.pk)
+
+        self.software.version = 'R2025b'
+        Software.objects.bulk_update([self.software], ['version'])
+        self.assertEqual(search('r2025b')[0]['id'], self.software.pk)
+
+        # Fields the documents do not use cost no extra queries
+        with CaptureQueriesContext(connection) as queries:
+            Equipment.objects.filter(pk=self.monitor.pk).update(price=10)
+        self.assertEqual(len(queries), 1)
+
+    def test_cascades_unindex_per_kind(self):
+        for n in range(5):
+            pc = PC.objects.create(lab=self.lab, name=f'PC-1{n}', status='working')
+            Software.objects.create(pc=pc, name='Python')
+        with CaptureQueriesContext(connection) as queries:
+            self.lab.delete()
+        deletes = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('DELETE FROM "labs_searchentry"')]
+        self.assertEqual(len(deletes), 4)  # software, equipment, pc, lab
+        self.assertFalse(SearchEntry.objects.exclude(lab_id=self.other.pk).exists())
+
+    def test_unindexed_models_keep_fast_deletes(self):
+        self.assertTrue(Collector(using='default').can_fast_delete(Inventory.objects.all()))
+
+    def test_pc_renames_reindex_software(self):
+        self.pc.name = 'Bench-7'
+        self.pc.save()
+        self.assertEqual([row['id'] for row in search('bench')], [self.pc.pk, self.software.pk])
+
+        PC.objects.filter(pk=self.pc.pk).update(name='Corner-3')
+        self.assertEqual([row['type'] for row in search('corner', kinds=['software'])], ['software'])
+
+    def test_migration_backfills_existing_rows(self):
+        backfill = import_module('labs.migrations.0014_backfill_search_index').backfill_search_index
+        SearchEntry.objects.all().delete()
+        self.assertEqual(search('dell'), [])
+        backfill(django_apps, None)
+        self.assertEqual(len(search('dell')), 2)
+        self.assertEqual(search('matlab')[0]['lab'], self.lab.pk)
+        self.assertEqual(SearchEntry.objects.count(), 6)
+
+    def test_imported_rows_are_indexed(self):
+        body = "equipment_type,brand,model_name,serial_number\nMOUSE,Epson,EB-X41,EP-1"
+        self.client.post(f'/api/import/equipment/?lab={self.lab.id}', data=body, content_type='text/csv')
+        results = self.client.get(self.url, {'q': 'epson'}).data['results']
+        self.assertEqual([row['type'] for row in results], ['equipment'])
+
+    def test_fallback_backend_and_rebuild(self):
+        results = search('dell', backend='fallback')
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]['id'], self.monitor.pk)
+
+        SearchEntry.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('2 equipment', out.getvalue())
+        self.assertEqual(len(search('dell')), 2)
+
+
+# ------------------------------
+# Query budgets
+# ------------------------------
+class QueryBudgetTests(TestCase):
+    """Every endpoint in settings.QUERY_BUDGETS must stay within budget at any data size."""
+    VARIANT_QUERIES = {
+        'expand': '?expand=pcs,pcs.software,equipment,open_maintenance',
+    }
+    # Endpoints that need parameters to do any work
+    DEFAULT_QUERIES = {
+        'search': '?q=lab',
+    }
+
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        token = LabsRefreshToken.for_user(self.admin).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        user_cache.clear()
+        self.scale = 0
+
+    def seed(self, n):
+        for _ in range(n):
+            self.scale += 1
+            lab = Lab.objects.create(name=f'Lab {self.scale}')
+            pc = PC.objects.create(lab=lab, name=f'PC {self.scale}', status='working')
+            Software.objects.create(pc=pc, name='MATLAB')
+            item = Equipment.objects.create(lab=lab, equipment_type='MONITOR')
+            MaintenanceLog.objects.create(equipment=item, reported_by=self.admin, status_before='working')
+            Ticket.objects.create(student=self.admin, pc=pc, issue_description='Broken')
+
+    def url_kwargs(self):
+        return {
+            'user-detail': {'pk': self.admin.pk},
+            'lab-detail': {'pk': Lab.objects.first().pk},
+            'lab-pc-list': {'lab_id': Lab.objects.first().pk},
+            'pc-detail': {'pk': PC.objects.first().pk},
+            'software-detail': {'pk': Software.objects.first().pk},
+            'equipment-detail': {'pk': Equipment.objects.first().pk},
+            'maintenance-log-detail': {'pk': MaintenanceLog.objects.first().pk},
+            'async-lab-detail': {'pk': Lab.objects.first().pk},
+            'async-pc-detail': {'pk': PC.objects.first().pk},
+            'async-equipment-detail': {'pk': Equipment.objects.first().pk},
+            'async-maintenance-log-detail': {'pk': MaintenanceLog.objects.first().pk},
+        }
+
+    def test_endpoints_stay_within_budget(self):
+        for n in (1, 10):
+            self.seed(n)
+            kwargs = self.url_kwargs()
+            # Load the admin into the JWT user cache
+            self.client.get(reverse('redirect-after-login'))
+            reset_request_metrics()
+            for name in settings.QUERY_BUDGETS:
+                cache.clear()
+                url_name, _, variant = name.partition(':')
+                query = self.VARIANT_QUERIES.get(variant) or self.DEFAULT_QUERIES.get(url_name, '')
+                url = reverse(url_name, kwargs=kwargs.get(url_name)) + query
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, name)
+            metrics = request_metrics()
+            for name, budget in settings.QUERY_BUDGETS.items():
+                with self.subTest(endpoint=name, scale=self.scale):
+                    self.assertLessEqual(metrics[name]['max_queries'], budget)
+
+    def test_writes_are_not_charged_to_read_budgets(self):
+        self.seed(1)
+        item = Equipment.objects.first()
+        reset_request_metrics()
+        with self.assertNoLogs('labs.instrumentation', 'WARNING'):
+            response = self.client.patch(reverse('equipment-detail', kwargs={'pk': item.pk}), {'status': 'not_working'})
+        self.assertEqual(response.status_code, 200)
+        metrics = request_metrics()
+        self.assertNotIn('equipment-detail', metrics)
+        self.assertIsNone(metrics['equipment-detail:PATCH']['query_budget'])
+        self.assertEqual(metrics['equipment-detail:PATCH']['over_budget'], 0)
+
+    def test_server_timing_labels_render_time(self):
+        self.seed(1)
+        reset_request_metrics()
+        with self.settings(DEBUG=True):
+            response = self.client.get(reverse('lab-list'))
+        timings = [part.split(';')[0].strip() for part in response['Server-Timing'].split(',')]
+        self.assertEqual(timings, ['db', 'render', 'total'])
+        self.assertIn('avg_render_ms', request_metrics()['lab-list'])
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        reset_throttles()
+        self.user = User.objects.create_user(username='student', password='pass', role='student')
+        self.url = reverse('redirect-after-login')
+
+    def get(self, token):
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_user_lookup_is_cached(self):
+        token = LabsRefreshToken.for_user(self.user).access_token
+        self.assertEqual(token['role'], 'student')
+        with CaptureQueriesContext(connection) as first:
+            self.assertEqual(self.get(token).status_code, 200)
+        with CaptureQueriesContext(connection) as second:
+            response = self.get(token)
+        self.assertEqual(response.data['redirect_to'], '/api/maintenance/')
+        self.assertEqual(len(first), 1)
+        self.assertEqual(len(second), 0)
+
+    def test_plain_tokens_still_hit_the_database(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.get(token)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get(token).status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+    def test_role_change_revokes_tokens(self):
+        token = LabsRefreshToken.for_user(self.user).access_token
+        self.get(token)
+        self.user.role = 'admin'
+        self.user.save()
+        self.assertEqual(self.get(token).status_code, 401)
+        new_token = LabsRefreshToken.for_user(self.user).access_token
+        self.assertEqual(self.get(new_token).data['redirect_to'], '/api/inventory/')
+
+    def test_password_change_and_deactivation_revoke_tokens(self):
+        token = LabsRefreshToken.for_user(self.user).access_token
+        self.get(token)
+        self.user.set_password('new-pass')
+        self.user.save()
+        self.assertEqual(self.get(token).status_code, 401)
+
+        token = LabsRefreshToken.for_user(self.user).access_token
+        self.get(token)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_changes_behind_signals_apply_after_ttl(self):
+        # queryset.update() (or another process) sends no signal; the entry lives until its TTL
+        token = LabsRefreshToken.for_user(self.user).access_token
+        self.get(token)
+        User.objects.filter(pk=self.user.pk).update(role='admin')
+        self.assertEqual(self.get(token).status_code, 200)
+        user_cache.clear()
+        self.assertEqual(self.get(token).status_code, 401)
+
+    def test_claims_mode_skips_the_database(self):
+        token = LabsRefreshToken.for_user(self.user).access_token
+        with self.settings(JWT_USER_RESOLUTION='claims'), CaptureQueriesContext(connection) as queries:
+            response = self.get(token)
+        self.assertEqual(response.data['redirect_to'], '/api/maintenance/')
+        self.assertEqual(len(queries), 0)
+
+    def test_login_endpoints_issue_claims(self):
+        for url in ('/api/login/', '/api/users/login/'):
+            response = self.client.post(url, {'username': 'student', 'password': 'pass'}, content_type='application/json')
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(AccessToken(response.data['access'])['role'], 'student')
+
+
+class SlidingWindowStoreTests(TestCase):
+    def test_window_slides_and_backoff_grows(self):
+        store = SlidingWindowStore()
+        hit = lambda now: store.hit('k', limit=2, window=10, backoff_max=100, max_keys=10, now=now)
+        self.assertEqual(hit(0), 0)
+        self.assertEqual(hit(5), 0)
+        self.assertEqual(hit(6), 10)       # third hit in the window: blocked for one window
+        self.assertEqual(hit(8), 8)        # still blocked
+        self.assertEqual(hit(16), 0)       # window is clean again
+        self.assertEqual(hit(17), 0)
+        self.assertEqual(hit(18), 20)      # second strike doubles the block
+        self.assertEqual(hit(38 + 100 + 1), 0)  # quiet for BACKOFF_MAX: strikes forgotten
+
+    def test_key_count_is_bounded(self):
+        store = SlidingWindowStore()
+        for n in range(50):
+            store.hit(f'k{n}', limit=1, window=10, backoff_max=100, max_keys=10, now=0)
+        self.assertEqual(store.snapshot()['tracked_keys'], 10)
+
+
+class LabExpandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.lab = Lab.objects.create(name='Lab A')
+        self.url = reverse('lab-detail', kwargs={'pk': self.lab.pk})
+
+    def add_pcs(self, n):
+        for i in range(n):
+            pc = PC.objects.create(lab=self.lab, name=f'PC {PC.objects.count()}', status='working')
+            Software.objects.create(pc=pc, name='MATLAB')
+            Software.objects.create(pc=pc, name='Python')
+            item = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR')
+            MaintenanceLog.objects.create(equipment=item, reported_by=self.admin, status_before='working')
+
+    def test_nested_document(self):
+        self.add_pcs(2)
+        MaintenanceLog.objects.filter(pk=MaintenanceLog.objects.first().pk).update(status='fixed')
+        response = self.client.get(self.url, {'expand': 'pcs.software,equipment,open_maintenance'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], 'Lab A')
+        self.assertEqual(len(response.data['pcs']), 2)
+        self.assertEqual([s['name'] for s in response.data['pcs'][0]['installed_software']], ['MATLAB', 'Python'])
+        self.assertEqual(len(response.data['equipment']), 2)
+        self.assertEqual(len(response.data['open_maintenance']), 1)
+        self.assertNotIn('ETag', response)
+
+    def test_only_requested_collections(self):
+        self.add_pcs(1)
+        response = self.client.get(self.url, {'expand': 'pcs'})
+        self.assertIn('pcs', response.data)
+        self.assertNotIn('installed_software', response.data['pcs'][0])
+        self.assertNotIn('equipment', response.data)
+        self.assertNotIn('open_maintenance', response.data)
+
+        plain = self.client.get(self.url)
+        self.assertNotIn('pcs', plain.data)
+        self.assertIn('ETag', plain)
+
+    def test_unknown_expansion_rejected(self):
+        response = self.client.get(self.url, {'expand': 'pcs,tickets'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_query_count_is_constant(self):
+        params = {'expand': 'pcs,pcs.software,equipment,open_maintenance'}
+        self.add_pcs(1)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url, params)
+        self.add_pcs(20)
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(self.url, params)
+        self.assertEqual(len(response.data['pcs']), 21)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(large), 5)
+
+
+class LicenseExpiryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='student', password='pass', role='student')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('software-expiring')
+        self.today = datetime.date.today()
+        self.lab_a = Lab.objects.create(name='Lab A')
+        self.lab_b = Lab.objects.create(name='Lab B')
+        self.pc_a = PC.objects.create(lab=self.lab_a, name='A1', status='working')
+        self.pc_b = PC.objects.create(lab=self.lab_b, name='B1', status='working')
+
+    def add(self, pc, name, days):
+        return Software.objects.create(pc=pc, name=name, expiry_date=self.today + datetime.timedelta(days=days))
+
+    def summary(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, {(row['lab'], row['name']): row['license_count'] for row in response.data['results']}
+
+    def test_live_until_digest_is_built(self):
+        self.add(self.pc_a, 'MATLAB', 5)
+        self.add(self.pc_a, 'MATLAB', 20)
+        self.add(self.pc_b, 'MATLAB', 60)
+        data, counts = self.summary(days=30)
+        self.assertEqual(data['source'], 'live')
+        self.assertEqual(counts, {(self.lab_a.pk, 'MATLAB'): 2})
+
+    def test_digest_grouped_by_lab_and_name(self):
+        self.add(self.pc_a, 'MATLAB', 5)
+        self.add(self.pc_a, 'MATLAB', 20)
+        self.add(self.pc_a, 'AutoCAD', 10)
+        self.add(self.pc_b, 'MATLAB', 1)
+        self.add(self.pc_b, 'MATLAB', -1)
+        build_license_expiry_digest()
+
+        data, counts = self.summary(days=30)
+        self.assertEqual(data['source'], 'digest')
+        self.assertEqual(counts, {
+            (self.lab_a.pk, 'MATLAB'): 2, (self.lab_a.pk, 'AutoCAD'): 1, (self.lab_b.pk, 'MATLAB'): 1,
+        })
+        _, counts = self.summary(days=30, lab=self.lab_b.pk)
+        self.assertEqual(counts, {(self.lab_b.pk, 'MATLAB'): 1})
+        self.assertEqual(self.summary(days=30, live='true')[1], counts | {
+            (self.lab_a.pk, 'MATLAB'): 2, (self.lab_a.pk, 'AutoCAD'): 1,
+        })
+
+    @mock.patch('labs.rollups.WATERMARK_OVERLAP', datetime.timedelta(0))
+    def test_incremental_build_only_touches_changed_labs(self):
+        self.add(self.pc_a, 'MATLAB', 5)
+        doomed = self.add(self.pc_b, 'MATLAB', 5)
+        build_license_expiry_digest()
+
+        self.assertEqual(build_license_expiry_digest(), set())
+        self.add(self.pc_a, 'MATLAB', 6)
+        self.assertEqual(build_license_expiry_digest(), {self.lab_a.pk})
+
+        doomed.delete()
+        self.assertEqual(build_license_expiry_digest(), {self.lab_b.pk})
+        self.assertFalse(LicenseExpiryDigest.objects.filter(lab=self.lab_b).exists())
+
+        self.pc_a.lab = self.lab_b
+        self.pc_a.save()
+        self.assertEqual(build_license_expiry_digest(), {self.lab_a.pk, self.lab_b.pk})
+        _, counts = self.summary(days=30)
+        self.assertEqual(counts, {(self.lab_b.pk, 'MATLAB'): 2})
+
+    @mock.patch('labs.rollups.WATERMARK_OVERLAP', datetime.timedelta(0))
+    def test_bulk_lab_moves_match_single_saves(self):
+        software = self.add(self.pc_a, 'MATLAB', 5)
+        build_license_expiry_digest()
+        PC.objects.filter(pk=self.pc_a.pk).update(lab=self.lab_b)
+        self.assertEqual(build_license_expiry_digest(), {self.lab_a.pk, self.lab_b.pk})
+        self.assertEqual(self.summary(days=30)[1], {(self.lab_b.pk, 'MATLAB'): 1})
+        self.assertEqual(search('matlab')[0]['lab'], self.lab_b.pk)
+
+        self.pc_a.lab = self.lab_a
+        PC.objects.bulk_update([self.pc_a], ['lab'])
+        self.assertEqual(build_license_expiry_digest(), {self.lab_a.pk, self.lab_b.pk})
+        self.assertEqual(SearchEntry.objects.get(kind='software', object_id=software.pk).lab_id, self.lab_a.pk)
+
+        # Status-only updates touch neither
+        PC.objects.filter(pk=self.pc_a.pk).update(status='not_working')
+        self.assertEqual(build_license_expiry_digest(), set())
+
+    def test_late_commit_behind_watermark_is_picked_up(self):
+        self.add(self.pc_a, 'MATLAB', 5)
+        build_license_expiry_digest()
+        # Written by a transaction that started before the build but committed after it
+        late = self.add(self.pc_b, 'MATLAB', 5)
+        watermark = RollupWatermark.objects.get(name=LICENSE_EXPIRY).watermark
+        Software.objects.filter(pk=late.pk).update(updated_at=watermark - datetime.timedelta(seconds=5))
+        self.assertEqual(build_license_expiry_digest(), {self.lab_a.pk, self.lab_b.pk})
+        self.assertEqual(self.summary(days=30)[1][self.lab_b.pk, 'MATLAB'], 1)
+
+    @mock.patch('labs.rollups.WATERMARK_OVERLAP', datetime.timedelta(0))
+    def test_command(self):
+        self.add(self.pc_a, 'MATLAB', 5)
+        out = StringIO()
+        call_command('build_expiry_digest', stdout=out)
+        self.assertIn('all labs', out.getvalue())
+        out = StringIO()
+        call_command('build_expiry_digest', stdout=out)
+        self.assertIn('0 lab(s)', out.getvalue())
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.url, {'days': 'soon'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'lab': 'x'}).status_code, 400)
+
+
+class MaintenanceResolveTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin', password='pass', role='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('maintenance-resolve')
+        self.lab = Lab.objects.create(name='Lab A')
+
+    def broken(self, n):
+        logs = []
+        for _ in range(n):
+            item = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR', status='not_working')
+            logs.append(MaintenanceLog.objects.create(equipment=item, reported_by=self.admin, status_before='not_working'))
+        return logs
+
+    def test_resolves_logs_and_equipment(self):
+        logs = self.broken(3)
+        response = self.client.post(self.url, {'ids': [log.pk for log in logs[:2]], 'remarks': 'Replaced cable'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'resolved': 2, 'already_fixed': [], 'equipment_updated': 2})
+
+        log = MaintenanceLog.objects.get(pk=logs[0].pk)
+        self.assertEqual((log.status, log.status_after, log.fixed_by, log.remarks), ('fixed', 'working', self.admin, 'Replaced cable'))
+        self.assertIsNotNone(log.fixed_on)
+        self.assertEqual(log.equipment.status, 'working')
+        self.assertEqual(MaintenanceLog.objects.get(pk=logs[2].pk).status, 'pending')
+
+        bucket = Inventory.objects.get(lab=self.lab, equipment_type='MONITOR')
+        self.assertEqual((bucket.working_quantity, bucket.not_working_quantity), (2, 1))
+
+        again = self.client.post(self.url, {'ids': [logs[0].pk]}, format='json')
+        self.assertEqual(again.data, {'resolved': 0, 'already_fixed': [logs[0].pk], 'equipment_updated': 0})
+
+    def test_unknown_ids_reject_whole_batch(self):
+        logs = self.broken(1)
+        response = self.client.post(self.url, {'ids': [logs[0].pk, 9999]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(MaintenanceLog.objects.get(pk=logs[0].pk).status, 'pending')
+
+    def test_admin_only(self):
+        student = User.objects.create_user(username='student', password='pass', role='student')
+        self.client.force_authenticate(student)
+        response = self.client.post(self.url, {'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_query_count_is_bounded(self):
+        small = [log.pk for log in self.broken(1)]
+        large = [log.pk for log in self.broken(40)]
+        with CaptureQueriesContext(connection) as one:
+            self.client.post(self.url, {'ids': small}, format='json')
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.post(self.url, {'ids': large}, format='json')
+        self.assertEqual(response.data['resolved'], 40)
+        self.assertEqual(len(one), len(many))
+
+    def test_save_fills_lab_without_loading_equipment(self):
+        item = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR')
+        log = MaintenanceLog(equipment_id=item.pk, status_before='working')
+        with CaptureQueriesContext(connection) as queries:
+            log.save()
+        self.assertEqual(log.lab_id, self.lab.pk)
+        self.assertFalse(any('"labs_lab"' in q['sql'] for q in queries.captured_queries))
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='root', password='pass', email='root@example.com')
+        self.client.force_login(self.admin)
+        self.lab = Lab.objects.create(name='Lab A')
+
+    def add_rows(self, n):
+        for _ in range(n):
+            pc = PC.objects.create(lab=self.lab, name='PC', status='working')
+            Software.objects.create(pc=pc, name='MATLAB')
+            item = Equipment.objects.create(lab=self.lab, equipment_type='MONITOR')
+            MaintenanceLog.objects.create(equipment=item, reported_by=self.admin, fixed_by=self.admin, status_before='working')
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = [f'/admin/labs/{name}/' for name in ('pc', 'equipment', 'software', 'maintenancelog', 'inventory')]
+        self.add_rows(1)
+        small = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            small[url] = len(queries)
+        self.add_rows(20)
+        for url in urls:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            self.assertEqual(len(queries), small[url], url)
+
+    def test_lab_filter_lists_only_labs_in_use(self):
+        self.add_rows(1)
+        self.lab = Lab.objects.create(name='Lab B')
+        self.add_rows(1)
+        Lab.objects.create(name='Empty Lab')
+        for name in ('pc', 'equipment', 'maintenancelog', 'inventory'):
+            response = self.client.get(f'/admin/labs/{name}/')
+            self.assertContains(response, f'lab__id__exact={self.lab.pk}', msg_prefix=name)
+            self.assertNotContains(response, 'Empty Lab', msg_prefix=name)
+
+    def test_search_fields_are_valid(self):
+        self.add_rows(1)
+        for name in ('pc', 'equipment', 'software', 'maintenancelog'):
+            response = self.client.get(f'/admin/labs/{name}/', {'q': 'MONITOR'})
+            self.assertEqual(response.status_code, 200, name)
+
+    def test_estimated_count_for_unfiltered_lists(self):
+        from .admin import EstimatedCountPaginator
+        self.add_rows(3)
+        MaintenanceLog.objects.filter(pk=MaintenanceLog.objects.first().pk).delete()
+
+        class Estimated(EstimatedCountPaginator):
+            exact_below = 0
+
+        with CaptureQueriesContext(connection) as queries:
+            estimate = Estimated(MaintenanceLog.objects.order_by('pk'), 50).count
+        self.assertEqual(estimate, MaintenanceLog.objects.order_by('-pk').first().pk)
+        self.assertNotIn('COUNT(', queries.captured_queries[0]['sql'])
+        self.assertEqual(Estimated(MaintenanceLog.objects.filter(status='pending').order_by('pk'), 50).count, 2)
+
+
+class SeedAndBenchmarkTests(TestCase):
+    def test_seed_data_scales_counts(self):
+        call_command('seed_data', scale=0.001, labs=3, seed=1, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Lab.objects.count(), 3)
+        self.assertEqual(PC.objects.count(), 5)
+        self.assertEqual(Equipment.objects.count(), 50)
+        self.assertEqual(MaintenanceLog.objects.count(), 500)
+        self.assertEqual(Ticket.objects.count(), 100)
+        self.assertEqual(Inventory.objects.aggregate(n=Sum('total_quantity'))['n'], 50)
+        # Generated timestamps are kept, not overwritten with now()
+        self.assertGreater(MaintenanceLog.objects.dates('reported_on', 'day').count(), 1)
+
+        out = StringIO()
+        call_command('rebuild_inventory', dry_run=True, stdout=out)
+        self.assertIn('in sync', out.getvalue())
+
+    def test_benchmark_report_and_compare(self):
+        call_command('seed_data', scale=0.001, seed=1, stdout=StringIO(), stderr=StringIO())
+        out = StringIO()
+        call_command(
+            'benchmark_api', iterations=2, warmup=0, endpoints=['lab-list', 'lab-detail'],
+            stdout=out, stderr=StringIO(),
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report['endpoints']), {'lab-list', 'lab-detail'})
+        for result in report['endpoints'].values():
+            self.assertEqual(result['status'], 200)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertGreater(result['queries'], 0)
+
+        slower = json.loads(out.getvalue())
+        slower['endpoints']['lab-list']['queries'] += 2
+        diff = compare_reports(report, slower)
+        self.assertEqual(diff['lab-list']['queries']['delta'], 2)
+        self.assertEqual(diff['lab-detail']['queries']['delta'], 0)
+
+    def test_payload_benchmark(self):
+        call_command('seed_data', scale=0.001, seed=1, stdout=StringIO(), stderr=StringIO())
+        out = StringIO()
+        call_command('benchmark_payload', iterations=2, warmup=0, endpoints=['maintenance-log-list'], stdout=out, stderr=StringIO())
+        result = json.loads(out.getvalue())['endpoints']['maintenance-log-list']
+        self.assertLess(result['compact']['bytes'], result['full']['bytes'])
+        self.assertGreater(result['bytes_saved_pct'], 0)
+
+
+# ------------------------------
+# Query plans for the hot filters
+# ------------------------------
+class QueryPlanAssertions:
+    """
+    EXPLAIN QUERY PLAN checks for SQLite. Every step must be an index
+    search/scan (no bare "SCAN <table>") and ORDER BY must not need a
+    temporary B-tree.
+    """
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, f"expected {index_name} in plan:\n{plan}")
+        table = queryset.model._meta.db_table
+        for line in plan.splitlines():
+            # Lines look like "<id> <parent> <notused> <detail>"
+            step = line.split(maxsplit=3)[-1].strip()
+            self.assertNotEqual(step, f'SCAN {table}', f"full table scan in plan:\n{plan}")
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', step, f"sort without index in plan:\n{plan}")
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class LabsQueryPlanTests(QueryPlanAssertions, TestCase):
+    def setUp(self):
+        self.lab = Lab.objects.create(name='Lab A')
+
+    def test_equipment_by_lab_type_status(self):
+        queryset = Equipment.objects.filter(lab=self.lab, equipment_type='PC', status='working')
+        self.assertUsesIndex(queryset, 'equipment_lab_type_status_idx')
+
+    def test_equipment_keyset_order(self):
+        queryset = Equipment.objects.order_by('added_on', 'id')[:50]
+        self.assertUsesIndex(queryset, 'equipment_added_on_idx')
+
+    def test_maintenance_by_status_and_date(self):
+        queryset = MaintenanceLog.objects.filter(status='pending').order_by('reported_on')
+        self.assertUsesIndex(queryset, 'mlog_status_reported_idx')
+
+    def test_maintenance_by_lab_and_status(self):
+        queryset = MaintenanceLog.objects.filter(lab=self.lab, status='pending')
+        self.assertUsesIndex(queryset, 'mlog_lab_status_idx')
+
+    def test_maintenance_rollup_days(self):
+        day = datetime.date(2030, 1, 10)
+        queryset = MaintenanceLog.objects.filter(reported_or_fixed_in(day_ranges([day])))
+        self.assertUsesIndex(queryset, 'mlog_fixed_on_idx')
+        self.assertUsesIndex(MaintenanceLog.objects.filter(updated_at__gte=timezone.now()), 'mlog_updated_at_idx')
+
+    def test_maintenance_keyset_order(self):
+        queryset = MaintenanceLog.objects.order_by('reported_on', 'id')[:50]
+        self.assertUsesIndex(queryset, 'mlog_reported_on_idx')
+
+    def test_license_digest_by_expiry_date(self):
+        today = datetime.date.today()
+        queryset = LicenseExpiryDigest.objects.filter(expiry_date__range=(today, today + datetime.timedelta(days=30)))
+        self.assertUsesIndex(queryset, 'license_digest_expiry_idx')
+
+    def test_software_by_expiry_date(self):
+        today = datetime.date.today()
+        queryset = Software.objects.filter(expiry_date__range=(today, today + datetime.timedelta(days=30)))
+        self.assertUsesIndex(queryset, 'software_expiry_date_idx')
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+DEFAULTS = {
+    'ENABLED': True,
+    # A whole lab logging in from one NAT address must still fit
+    'IP_LIMIT': 60,
+    'IP_WINDOW': 60,
+    'USERNAME_LIMIT': 5,
+    'USERNAME_WINDOW': 60,
+    'REGISTER_LIMIT': 10,
+    'REGISTER_WINDOW': 3600,
+    'BACKOFF_MAX': 900,
+    'MAX_KEYS': 100000,
+}
+
+
+def throttle_settings():
+    return {**DEFAULTS, **getattr(settings, 'LOGIN_THROTTLE', {})}
+
+
+# ------------------------------
+# Local-memory sliding windows
+# ------------------------------
+class SlidingWindowStore:
+    """
+    Per-key sliding windows of attempt timestamps with progressive backoff.
+    Each time a key goes over its limit it is blocked for window * 2^(strikes - 1)
+    seconds (capped at BACKOFF_MAX); strikes are forgotten once the key has
+    been quiet for BACKOFF_MAX. Everything lives in this process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = OrderedDict()  # key -> [deque of timestamps, blocked_until, strikes, last_seen]
+        self.stats = {}
+
+    def hit(self, key, limit, window, backoff_max, max_keys, now=None, record=True):
+        """
+        Record an attempt; return 0 if allowed, else the seconds to wait.
+        With record=False the key is only checked, not charged.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._keys.get(key)
+            if entry is None or now - entry[3] > backoff_max:
+                entry = [deque(), 0.0, 0, now]
+                self._keys[key] = entry
+            self._keys.move_to_end(key)
+            while len(self._keys) > max_keys:
+                self._keys.popitem(last=False)
+
+            hits, blocked_until, strikes, _ = entry
+            entry[3] = now
+            if blocked_until > now:
+                return blocked_until - now
+
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                strikes += 1
+                entry[2] = strikes
+                entry[1] = now + min(window * 2 ** (strikes - 1), backoff_max)
+                hits.clear()
+                return entry[1] - now
+            if record:
+                hits.append(now)
+            return 0
+
+    def forget(self, key):
+        with self._lock:
+            self._keys.pop(key, None)
+
+    def count(self, scope, outcome):
+        with self._lock:
+            bucket = self.stats.setdefault(scope, {'allowed': 0, 'rejected': 0})
+            bucket[outcome] += 1
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'scopes': {scope: dict(values) for scope, values in self.stats.items()},
+                'tracked_keys': len(self._keys),
+                'blocked_keys': sum(1 for entry in self._keys.values() if entry[1] > now),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._keys.clear()
+            self.stats.clear()
+
+
+store = SlidingWindowStore()
+
+
+def throttle_stats():
+    return store.snapshot()
+
+
+def reset_throttles():
+    store.reset()
+
+
+# ------------------------------
+# DRF throttles
+# ------------------------------
+class LoginThrottle(BaseThrottle):
+    """
+    Throttle for password logins, checked in APIView.initial() before the
+    view authenticates, so rejected attempts never reach PBKDF2. Every
+    attempt counts per client IP; only failed ones count per submitted
+    username (see LoginOutcomeMixin), so nobody can lock an account out
+    that keeps logging in successfully.
+    """
+    scope = 'login'
+
+    def get_rules(self, request, config):
+        return [(f'{self.scope}:ip:{self.get_ident(request)}', config['IP_LIMIT'], config['IP_WINDOW'])]
+
+    @classmethod
+    def get_username_rule(cls, request, config):
+        try:
+            username = request.data.get('username')
+        except AttributeError:
+            username = None
+        if isinstance(username, str) and username:
+            return f'{cls.scope}:user:{username.lower()}', config['USERNAME_LIMIT'], config['USERNAME_WINDOW']
+        return None
+
+    def allow_request(self, request, view):
+        config = throttle_settings()
+        if not config['ENABLED'] or request.method != 'POST':
+            return True
+        rules = [(rule, True) for rule in self.get_rules(request, config)]
+        username_rule = self.get_username_rule(request, config)
+        if username_rule:
+            rules.append((username_rule, False))
+        self.wait_seconds = 0
+        for (key, limit, window), record in rules:
+            wait = store.hit(key, limit, window, config['BACKOFF_MAX'], config['MAX_KEYS'], record=record)
+            self.wait_seconds = max(self.wait_seconds, wait)
+        store.count(self.scope, 'rejected' if self.wait_seconds else 'allowed')
+        return not self.wait_seconds
+
+    @classmethod
+    def record_result(cls, request, response):
+        """Charge a failed login to its username; a successful one clears the key."""
+        config = throttle_settings()
+        if not config['ENABLED'] or request.method != 'POST':
+            return
+        rule = cls.get_username_rule(request, config)
+        if rule is None:
+            return
+        key, limit, window = rule
+        if response.status_code == 401:
+            store.hit(key, limit, window, config['BACKOFF_MAX'], config['MAX_KEYS'])
+        elif 200 <= response.status_code < 300:
+            store.forget(key)
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginOutcomeMixin:
+    """Login views: report each attempt's outcome back to LoginThrottle."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        LoginThrottle.record_result(request, response)
+        return response
+
+
+class RegisterThrottle(LoginThrottle):
+    """Per-IP throttle for account creation (which also hashes a password)."""
+    scope = 'register'
+
+    def get_rules(self, request, config):
+        return [(f'{self.scope}:ip:{self.get_ident(request)}', config['REGISTER_LIMIT'], config['REGISTER_WINDOW'])]
+
+    @classmethod
+    def get_username_rule(cls, request, config):
+        return None
@@ -1,6 +1,6 @@
 from django.urls import path
 from django.urls import include  # not used here; keep only if needed
-from . import views
+from . import async_views, events, views
 
 urlpatterns = [
     path('users/', views.UserList.as_view(), name='user-list'),
@@ -11,13 +11,40 @@ urlpatterns = [
     path('pcs/', views.PCList.as_view(), name='pc-list'),
     path('pcs/<int:pk>/', views.PCDetail.as_view(), name='pc-detail'),
     path('software/', views.SoftwareList.as_view(), name='software-list'),
+    path('software/expiring/', views.ExpiringSoftware.as_view(), name='software-expiring'),
     path('software/<int:pk>/', views.SoftwareDetail.as_view(), name='software-detail'),
     path('equipment/', views.EquipmentList.as_view(), name='equipment-list'),
+    path('equipment/export/', views.EquipmentExport.as_view(), name='equipment-export'),
     path('equipment/<int:pk>/', views.EquipmentDetail.as_view(), name='equipment-detail'),
     path('maintenance/', views.MaintenanceLogList.as_view(), name='maintenance-log-list'),
+    path('maintenance/resolve/', views.MaintenanceResolve.as_view(), name='maintenance-resolve'),
+    path('maintenance/export/', views.MaintenanceLogExport.as_view(), name='maintenance-log-export'),
+    path('maintenance/stats/', views.MaintenanceStats.as_view(), name='maintenance-stats'),
     path('maintenance/<int:pk>/', views.MaintenanceLogDetail.as_view(), name='maintenance-log-detail'),
     path('inventory/', views.InventoryList.as_view(), name='inventory-list'),
+    path('inventory/history/', views.InventoryHistory.as_view(), name='inventory-history'),
+    path('inventory/uptime/', views.StatusUptime.as_view(), name='inventory-uptime'),
     path('inventory/<int:pk>/', views.InventoryDetail.as_view(), name='inventory-detail'),
+    path('search/', views.Search.as_view(), name='search'),
+    path('events/', events.event_stream, name='event-stream'),
+    path('cache/stats/', views.CacheStats.as_view(), name='cache-stats'),
+    path('metrics/', views.RequestMetrics.as_view(), name='request-metrics'),
+    path('dashboard/summary/', views.DashboardSummary.as_view(), name='dashboard-summary'),
+    path('import/<str:kind>/', views.BulkImportView.as_view(), name='bulk-import'),
     path('redirect-after-login/', views.redirect_after_login, name='redirect-after-login'),
 
+    # Async read endpoints for the ASGI stack (labs.async_views). Replica
+    # routing and its retry on the primary apply; the response cache,
+    # ETags/304s, sparse fieldsets, ?expand= and cursor pages do not.
+    path('async/labs/', async_views.LabList.as_view(), name='async-lab-list'),
+    path('async/labs/<int:pk>/', async_views.LabDetail.as_view(), name='async-lab-detail'),
+    path('async/pcs/', async_views.PCList.as_view(), name='async-pc-list'),
+    path('async/pcs/<int:pk>/', async_views.PCDetail.as_view(), name='async-pc-detail'),
+    path('async/equipment/', async_views.EquipmentList.as_view(), name='async-equipment-list'),
+    path('async/equipment/<int:pk>/', async_views.EquipmentDetail.as_view(), name='async-equipment-detail'),
+    path('async/maintenance/', async_views.MaintenanceLogList.as_view(), name='async-maintenance-log-list'),
+    path('async/maintenance/<int:pk>/', async_views.MaintenanceLogDetail.as_view(), name='async-maintenance-log-detail'),
+    path('async/tickets/', async_views.TicketList.as_view(), name='async-ticket-list'),
+    path('async/inventory/', async_views.InventoryList.as_view(), name='async-inventory-list'),
+
 ]
@@ -1,8 +1,28 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 from rest_framework import generics
 from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
 from .models import User, Lab, PC, Software, Equipment, MaintenanceLog, Inventory
-from .serializers import UserSerializer, LabSerializer, PCSerializer, SoftwareSerializer, EquipmentSerializer, MaintenanceLogSerializer, InventorySerializer
-from .permissions import IsAdminOrReadOnly, AllowAuthenticatedReadAndCreateElseAdmin
+from .serializers import UserSerializer, LabSerializer, LabExpandedSerializer, PCSerializer, SoftwareSerializer, EquipmentSerializer, MaintenanceLogSerializer, MaintenanceResolveSerializer, InventorySerializer
+from .permissions import IsAdminOrReadOnly, IsAdminUser, AllowAuthenticatedReadAndCreateElseAdmin
+from .inventory import inventory_queryset, inventory_row
+from .importers import IMPORTERS, row_reader
+from .exports import ExportView, parse_bound
+from .history import EQUIPMENT, MODELS, inventory_at, uptime
+from .cache import CachedListMixin, cache_stats
+from .conditional import ConditionalGetMixin
+from .db_router import replica_status
+from .fieldsets import SparseFieldsetMixin
+from .instrumentation import request_metrics
+from .throttling import throttle_stats
+from .events import event_stats, publish_on_commit
+from .rollups import LICENSE_EXPIRY, MAINTENANCE_KPIS, expiring_licenses, get_watermark, maintenance_stats
+from .search import MAX_RESULTS, SOURCES, search
+from tickets.models import Ticket
 
 class UserList(generics.ListCreateAPIView):
     queryset = User.objects.all()
@@ -16,29 +36,85 @@ class UserDetail(generics.RetrieveUpdateDestroyAPIView):
 
 from rest_framework.permissions import IsAuthenticated
 
-class LabList(generics.ListCreateAPIView):
+class LabList(SparseFieldsetMixin, ConditionalGetMixin, CachedListMixin, generics.ListCreateAPIView):
     queryset = Lab.objects.all()
     serializer_class = LabSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = (Lab,)
 
-class LabDetail(generics.RetrieveUpdateDestroyAPIView):
+class LabDetail(SparseFieldsetMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    """
+    GET ?expand=pcs,pcs.software,equipment,open_maintenance returns the lab
+    as one nested document, loaded with one prefetch query per collection
+    however many PCs or packages the lab has.
+    """
     queryset = Lab.objects.all()
     serializer_class = LabSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class PCList(generics.ListCreateAPIView):
+    def get_expand(self):
+        if self.request.method != 'GET':
+            return set()
+        raw = self.request.query_params.get('expand', '')
+        expand = {part.strip() for part in raw.split(',') if part.strip()}
+        unknown = expand - set(LabExpandedSerializer.EXPANDABLE)
+        if unknown:
+            raise ValidationError({'expand': f"Unknown expansion(s): {', '.join(sorted(unknown))}."})
+        if 'pcs.software' in expand:
+            expand.add('pcs')
+        return expand
+
+    def conditional_enabled(self):
+        # The validator only covers the lab row, not the nested collections
+        return not self.get_expand()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        expand = self.get_expand()
+        if 'pcs.software' in expand:
+            queryset = queryset.prefetch_related(
+                Prefetch('pcs', queryset=PC.objects.order_by('id')),
+                Prefetch('pcs__installed_software', queryset=Software.objects.order_by('id')),
+            )
+        elif 'pcs' in expand:
+            queryset = queryset.prefetch_related(Prefetch('pcs', queryset=PC.objects.order_by('id')))
+        if 'equipment' in expand:
+            queryset = queryset.prefetch_related(Prefetch('equipments', queryset=Equipment.objects.order_by('id')))
+        if 'open_maintenance' in expand:
+            queryset = queryset.prefetch_related(Prefetch(
+                'maintenance_logs',
+                queryset=MaintenanceLog.objects.filter(status='pending').order_by('-reported_on', '-id'),
+                to_attr='open_maintenance',
+            ))
+        return queryset
+
+    def get_serializer_class(self):
+        return LabExpandedSerializer if self.get_expand() else LabSerializer
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'expand': self.get_expand()}
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.get_expand():
+            # Budgeted separately from the plain detail (settings.QUERY_BUDGETS)
+            request._request.metrics_name = 'lab-detail:expand'
+        return super().retrieve(request, *args, **kwargs)
+
+class PCList(SparseFieldsetMixin, ConditionalGetMixin, CachedListMixin, generics.ListCreateAPIView):
     queryset = PC.objects.all()
     serializer_class = PCSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = (PC,)
 
-class PCDetail(generics.RetrieveUpdateDestroyAPIView):
+class PCDetail(SparseFieldsetMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = PC.objects.all()
     serializer_class = PCSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class LabPCList(generics.ListCreateAPIView):
+class LabPCList(SparseFieldsetMixin, ConditionalGetMixin, CachedListMixin, generics.ListCreateAPIView):
     serializer_class = PCSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = (PC,)
 
     def get_queryset(self):
         lab_id = self.kwargs['lab_id']
@@ -53,29 +129,67 @@ class LabPCList(generics.ListCreateAPIView):
         except Lab.DoesNotExist:
             raise ValidationError({'lab': 'Lab not found'})
 
-class SoftwareList(generics.ListCreateAPIView):
+class SoftwareList(SparseFieldsetMixin, ConditionalGetMixin, CachedListMixin, generics.ListCreateAPIView):
     queryset = Software.objects.all()
     serializer_class = SoftwareSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = (Software,)
 
-class SoftwareDetail(generics.RetrieveUpdateDestroyAPIView):
+class SoftwareDetail(SparseFieldsetMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Software.objects.all()
     serializer_class = SoftwareSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class EquipmentList(generics.ListCreateAPIView):
+class ExpiringSoftware(APIView):
+    """
+    GET /api/software/expiring/?days=30&lab=<id>
+
+    Licenses expiring within the next ``days`` (default 30, max 3650)
+    grouped by lab and software name. Reads the precomputed digest built by
+    `build_expiry_digest`; ?live=true (or a digest that was never built)
+    queries Software directly through the expiry_date index instead.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request):
+        days = request.query_params.get('days', '30')
+        if not days.isdigit() or int(days) > 3650:
+            raise ValidationError({'days': 'Days must be an integer between 0 and 3650'})
+        lab_id = request.query_params.get('lab')
+        if lab_id:
+            if not lab_id.isdigit():
+                raise ValidationError({'lab': 'Lab must be an integer id'})
+            lab_id = int(lab_id)
+        else:
+            lab_id = None
+
+        as_of = get_watermark(LICENSE_EXPIRY)
+        live = request.query_params.get('live') == 'true' or as_of is None
+        today = timezone.localdate()
+        end = today + datetime.timedelta(days=int(days))
+        return Response({
+            'days': int(days),
+            'source': 'live' if live else 'digest',
+            'as_of': None if live else as_of,
+            'results': expiring_licenses(today, end, lab_id=lab_id, live=live),
+        })
+
+class EquipmentList(SparseFieldsetMixin, ConditionalGetMixin, CachedListMixin, generics.ListCreateAPIView):
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = (Equipment,)
+    keyset_ordering = ('added_on', 'id')
 
-class EquipmentDetail(generics.RetrieveUpdateDestroyAPIView):
+class EquipmentDetail(SparseFieldsetMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class MaintenanceLogList(generics.ListCreateAPIView):
+class MaintenanceLogList(SparseFieldsetMixin, ConditionalGetMixin, generics.ListCreateAPIView):
     serializer_class = MaintenanceLogSerializer
     permission_classes = [AllowAuthenticatedReadAndCreateElseAdmin]
+    keyset_ordering = ('reported_on', 'id')
 
     def get_queryset(self):
         user = self.request.user
@@ -98,14 +212,116 @@ class MaintenanceLogList(generics.ListCreateAPIView):
         )
 
 
-class MaintenanceLogDetail(generics.RetrieveUpdateDestroyAPIView):
+class MaintenanceLogDetail(SparseFieldsetMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = MaintenanceLog.objects.all()
     serializer_class = MaintenanceLogSerializer
     permission_classes = [AllowAuthenticatedReadAndCreateElseAdmin]
 
+
+class MaintenanceStats(APIView):
+    """
+    GET /api/maintenance/stats/?start=YYYY-MM-DD&end=YYYY-MM-DD&lab=<id>&equipment_type=<type>
+
+    Incoming and resolved logs, open backlog, mean and p90 time-to-fix and
+    per-technician throughput for any range of days (default the last 30,
+    at most 3660), read from the rollups kept by `build_maintenance_rollups`.
+    ``as_of`` is when they were last built.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request):
+        today = timezone.localdate()
+        dates = {}
+        for name, default in (('end', today), ('start', None)):
+            value = request.query_params.get(name)
+            try:
+                dates[name] = datetime.date.fromisoformat(value) if value else default
+            except ValueError:
+                raise ValidationError({name: 'Use an ISO date (YYYY-MM-DD).'})
+        end = dates['end']
+        start = dates['start'] or end - datetime.timedelta(days=29)
+        if start > end:
+            raise ValidationError({'start': 'Start must not be after end'})
+        if (end - start).days >= 3660:
+            raise ValidationError({'start': 'Ranges are limited to 3660 days'})
+        lab_id = request.query_params.get('lab')
+        if lab_id and not lab_id.isdigit():
+            raise ValidationError({'lab': 'Lab must be an integer id'})
+        equipment_type = request.query_params.get('equipment_type') or None
+        if equipment_type is not None and equipment_type not in dict(Equipment.EQUIPMENT_TYPES):
+            raise ValidationError({'equipment_type': 'Unknown equipment type'})
+
+        return Response({
+            'start': start,
+            'end': end,
+            'as_of': get_watermark(MAINTENANCE_KPIS),
+            **maintenance_stats(start, end, lab_id=int(lab_id) if lab_id else None, equipment_type=equipment_type),
+        })
+
+
+class MaintenanceResolve(APIView):
+    """
+    POST /api/maintenance/resolve/ {"ids": [...], "status_after": "working", "remarks": "..."}
+
+    Close a batch of pending maintenance logs and set their equipment's
+    status in one transaction. The query count does not grow with the
+    number of logs: one locking read and one UPDATE for the logs, one read
+    and one bulk_update for the equipment, plus the inventory refresh for
+    the affected (lab, type) buckets. Logs that are already fixed are
+    skipped and reported; unknown ids reject the whole batch.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = MaintenanceResolveSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data['ids'])
+        status_after = serializer.validated_data['status_after']
+        now = timezone.now()
+
+        with transaction.atomic():
+            logs = list(
+                MaintenanceLog.objects.select_for_update()
+                .filter(pk__in=ids).values_list('id', 'equipment_id', 'status')
+            )
+            missing = ids - {log_id for log_id, _, _ in logs}
+            if missing:
+                raise ValidationError({'ids': f"Maintenance log(s) not found: {', '.join(map(str, sorted(missing)))}"})
+
+            pending = [log_id for log_id, _, log_status in logs if log_status == 'pending']
+            already_fixed = sorted(log_id for log_id, _, log_status in logs if log_status != 'pending')
+            changes = {
+                'status': 'fixed',
+                'status_after': status_after,
+                'fixed_by': request.user,
+                'fixed_on': now,
+                'updated_at': now,
+            }
+            if 'remarks' in serializer.validated_data:
+                changes['remarks'] = serializer.validated_data['remarks']
+            resolved = MaintenanceLog.objects.filter(pk__in=pending).update(**changes)
+            # update() sends no post_save; publish what the signal would have
+            for log in MaintenanceLog.objects.filter(pk__in=pending):
+                publish_on_commit('maintenance', 'updated', log.lab_id, MaintenanceLogSerializer(log).data)
+
+            equipment_ids = {equipment_id for _, equipment_id, log_status in logs if log_status == 'pending'}
+            equipment = list(
+                Equipment.objects.filter(pk__in=equipment_ids).exclude(status=status_after)
+                .only('id', 'lab_id', 'equipment_type', 'status')
+            )
+            for item in equipment:
+                item.status = status_after
+            Equipment.objects.bulk_update(equipment, ['status'], batch_size=500)
+
+        return Response({
+            'resolved': resolved,
+            'already_fixed': already_fixed,
+            'equipment_updated': len(equipment),
+        })
+
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 
@@ -126,33 +342,11 @@ class InventoryList(generics.ListAPIView):
     permission_classes = [IsAdminOrReadOnly]
 
     def get_queryset(self):
-        # This method won't be used, but required by ListAPIView
-        return Inventory.objects.none()
+        # Read the materialized rollup: one row per (lab, equipment_type)
+        return inventory_queryset(self.request.query_params)
 
     def list(self, request, *args, **kwargs):
-        # Calculate inventory dynamically from Equipment table
-        labs = Lab.objects.all()
-        inventory_data = []
-
-        for lab in labs:
-            # Get all equipment types for this lab
-            equipment_in_lab = Equipment.objects.filter(lab=lab)
-            equipment_types = equipment_in_lab.values_list('equipment_type', flat=True).distinct()
-
-            for eq_type in equipment_types:
-                eq_of_type = equipment_in_lab.filter(equipment_type=eq_type)
-
-                inventory_data.append({
-                    'id': f"{lab.id}_{eq_type}",  # Composite key
-                    'lab': lab.id,
-                    'equipment_type': eq_type,
-                    'total_quantity': eq_of_type.count(),
-                    'working_quantity': eq_of_type.filter(status='working').count(),
-                    'not_working_quantity': eq_of_type.filter(status='not_working').count(),
-                    'under_repair_quantity': eq_of_type.filter(status='under_repair').count(),
-                })
-
-        # If no data, return empty list instead of old Inventory table data
+        inventory_data = [inventory_row(row) for row in self.get_queryset()]
         serializer = self.get_serializer(inventory_data, many=True)
         return Response(serializer.data)
 
@@ -160,3 +354,227 @@ class InventoryDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
     permission_classes = [IsAdminOrReadOnly]
+
+
+def history_params(request, name, default):
+    """A moment from ?<name>= (ISO date: the end of that day), the lab filter, or ``default``."""
+    value = request.query_params.get(name)
+    if value:
+        moment, lookup = parse_bound(value, name, end=True)
+        if lookup == 'lt':
+            moment -= datetime.timedelta(microseconds=1)
+    else:
+        moment = default
+    lab_id = request.query_params.get('lab')
+    if lab_id and not lab_id.isdigit():
+        raise ValidationError({'lab': 'Lab must be an integer id'})
+    return moment, int(lab_id) if lab_id else None
+
+
+class InventoryHistory(APIView):
+    """
+    GET /api/inventory/history/?at=<date|datetime>&lab=<id>
+
+    Equipment per (lab, equipment_type) and PCs per lab as they stood at
+    ``at`` (default now), rebuilt from the latest status checkpoint before
+    it plus the status events since (see labs.history).
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request):
+        at, lab_id = history_params(request, 'at', timezone.now())
+        return Response(inventory_at(at, lab_id=lab_id))
+
+
+class StatusUptime(APIView):
+    """
+    GET /api/inventory/uptime/?start=&end=&kind=equipment|pc&lab=<id>
+
+    Per item, the share of [start, end] it spent "working", from the
+    status history. Defaults to the last 30 days of equipment; an end in
+    the future is clipped to now.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request):
+        now = timezone.now()
+        end, lab_id = history_params(request, 'end', now)
+        end = min(end, now)
+        value = request.query_params.get('start')
+        start = parse_bound(value, 'start')[0] if value else end - datetime.timedelta(days=30)
+        if start >= end:
+            raise ValidationError({'start': 'Start must be before end'})
+        kind = request.query_params.get('kind', EQUIPMENT)
+        if kind not in MODELS:
+            raise ValidationError({'kind': f"Kind must be one of {', '.join(MODELS)}"})
+        return Response({
+            'kind': kind,
+            'start': start,
+            'end': end,
+            'results': uptime(kind, start, end, lab_id=lab_id),
+        })
+
+
+class BulkImportView(APIView):
+    """
+    Bulk import equipment, PCs or software from a CSV (text/csv) or NDJSON
+    (application/x-ndjson) request body. Rows are validated as they are
+    read, serial numbers are deduplicated per chunk, and valid rows are
+    inserted with chunked bulk_create in one transaction.
+
+    Optional query params: ?lab= / ?pc= default for rows without one,
+    ?dry_run=true to validate without saving.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, kind):
+        if kind not in IMPORTERS:
+            return Response({'error': f"Unknown import type '{kind}'"}, status=status.HTTP_404_NOT_FOUND)
+
+        rows = row_reader(request.content_type, request.stream)
+        if rows is None:
+            return Response(
+                {'error': 'Send a text/csv or application/x-ndjson body'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        defaults = {name: request.query_params[name] for name in ('lab', 'pc') if name in request.query_params}
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        report = IMPORTERS[kind](defaults).run(rows, dry_run=dry_run)
+        return Response(report)
+
+
+class EquipmentExport(ExportView):
+    queryset = Equipment.objects.all()
+    fields = (
+        'id', 'lab', 'equipment_type', 'brand', 'model_name', 'serial_number',
+        'location_in_lab', 'price', 'status', 'added_on', 'updated_at',
+    )
+    date_field = 'added_on'
+    lab_field = 'lab'
+    filename = 'equipment'
+
+
+class MaintenanceLogExport(ExportView):
+    queryset = MaintenanceLog.objects.all()
+    fields = (
+        'id', 'lab', 'equipment', 'equipment__serial_number', 'reported_by__username',
+        'fixed_by__username', 'issue_description', 'status_before', 'status_after',
+        'status', 'reported_on', 'fixed_on', 'remarks',
+    )
+    date_field = 'reported_on'
+    lab_field = 'lab'
+    filename = 'maintenance_logs'
+
+
+RECENT_ACTIVITY_LIMIT = 10
+
+
+class DashboardSummary(APIView):
+    """
+    All dashboard counters in one response, each computed with a grouped
+    aggregate (constant number of queries). Optional ?lab= scope.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        lab_id = request.query_params.get('lab')
+        if lab_id and not lab_id.isdigit():
+            raise ValidationError({'lab': 'Lab must be an integer id'})
+
+        labs = Lab.objects.all()
+        inventory = Inventory.objects.all()
+        maintenance = MaintenanceLog.objects.all()
+        tickets = Ticket.objects.exclude(status='resolved')
+        if request.user.role != 'admin':
+            tickets = tickets.filter(student=request.user)
+        if lab_id:
+            labs = labs.filter(id=lab_id)
+            inventory = inventory.filter(lab_id=lab_id)
+            maintenance = maintenance.filter(lab_id=lab_id)
+            tickets = tickets.filter(pc__lab_id=lab_id)
+
+        equipment = inventory.aggregate(
+            total=Sum('total_quantity', default=0),
+            working=Sum('working_quantity', default=0),
+            not_working=Sum('not_working_quantity', default=0),
+            under_repair=Sum('under_repair_quantity', default=0),
+        )
+        maintenance_counts = maintenance.aggregate(
+            pending=Count('id', filter=Q(status='pending')),
+            fixed=Count('id', filter=Q(status='fixed')),
+        )
+        recent_activity = list(
+            maintenance.order_by('-reported_on', '-id').values(
+                'id', 'lab', 'equipment', 'equipment__equipment_type', 'status', 'reported_on', 'fixed_on',
+            )[:RECENT_ACTIVITY_LIMIT]
+        )
+
+        return Response({
+            'labs': labs.count(),
+            'equipment': equipment,
+            'maintenance': maintenance_counts,
+            'open_tickets': tickets.count(),
+            'recent_activity': recent_activity,
+        })
+
+
+class Search(APIView):
+    """
+    GET /api/search/?q=dell monitor&type=equipment,pc&lab=<id>&limit=20
+
+    Ranked, typed matches from the search index (FTS5 on SQLite, FULLTEXT
+    on MySQL). Every term must match; the last one also matches as a
+    prefix. At most 8 terms and 50 results are used, which keeps the query
+    to one index lookup with a bounded result set.
+    """
+    permission_classes = [IsAdminOrReadOnly]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'A search query is required'})
+        if len(query) > 200:
+            raise ValidationError({'q': 'Query is too long'})
+
+        kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind]
+        unknown = set(kinds) - set(SOURCES)
+        if unknown:
+            raise ValidationError({'type': f"Unknown type(s): {', '.join(sorted(unknown))}"})
+
+        lab_id = request.query_params.get('lab')
+        if lab_id:
+            if not lab_id.isdigit():
+                raise ValidationError({'lab': 'Lab must be an integer id'})
+            lab_id = int(lab_id)
+        else:
+            lab_id = None
+
+        limit = request.query_params.get('limit', '20')
+        if not limit.isdigit() or not 1 <= int(limit) <= MAX_RESULTS:
+            raise ValidationError({'limit': f'Limit must be between 1 and {MAX_RESULTS}'})
+
+        results = search(query, kinds=kinds or None, lab_id=lab_id, limit=int(limit))
+        return Response({'query': query, 'count': len(results), 'results': results})
+
+
+class CacheStats(APIView):
+    """Hit/miss counters of the response cache in this process."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+
+class RequestMetrics(APIView):
+    """Per-endpoint query count, DB/render time and payload size for this process."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'endpoints': request_metrics(),
+            'cache': cache_stats(),
+            'throttle': throttle_stats(),
+            'events': event_stats(),
+            'replicas': replica_status(),
+        })
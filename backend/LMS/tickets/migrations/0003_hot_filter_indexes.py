@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-17 00:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0005_hot_filter_indexes'),
+        ('tickets', '0002_remove_ticket_pc_number_ticket_pc_ticket_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['student', 'created_at'], name='ticket_student_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status'], name='ticket_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_at', 'id'], name='ticket_created_at_idx'),
+        ),
+    ]
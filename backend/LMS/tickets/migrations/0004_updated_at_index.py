@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labs', '0011_change_marker_indexes'),
+        ('tickets', '0003_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['updated_at'], name='ticket_updated_at_idx'),
+        ),
+    ]
@@ -9,6 +9,15 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['student', 'created_at'], name='ticket_student_created_idx'),
+            models.Index(fields=['status'], name='ticket_status_idx'),
+            # Keyset pagination order
+            models.Index(fields=['created_at', 'id'], name='ticket_created_at_idx'),
+            # Change marker for the ETag aggregate
+            models.Index(fields=['updated_at'], name='ticket_updated_at_idx'),
+        ]
 
     def __str__(self):
         return f"Ticket #{self.id} - {self.pc.name} - {self.status}"
@@ -1,3 +1,26 @@
+from unittest import skipUnless
+
+from django.db import connection
 from django.test import TestCase
 
-# Create your tests here.
+from labs.models import User
+from labs.tests import QueryPlanAssertions
+from .models import Ticket
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class TicketQueryPlanTests(QueryPlanAssertions, TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(username='student', password='pass')
+
+    def test_tickets_by_student(self):
+        queryset = Ticket.objects.filter(student=self.student).order_by('created_at')
+        self.assertUsesIndex(queryset, 'ticket_student_created_idx')
+
+    def test_tickets_by_status(self):
+        queryset = Ticket.objects.filter(status='open')
+        self.assertUsesIndex(queryset, 'ticket_status_idx')
+
+    def test_ticket_keyset_order(self):
+        queryset = Ticket.objects.order_by('created_at', 'id')[:50]
+        self.assertUsesIndex(queryset, 'ticket_created_at_idx')
@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import TicketCreateView, TicketListView
+from .views import TicketCreateView, TicketListView, TicketExportView
 
 urlpatterns = [
     path('create/', TicketCreateView.as_view(), name='ticket-create'),
     path('my/', TicketListView.as_view(), name='ticket-list'),
+    path('export/', TicketExportView.as_view(), name='ticket-export'),
 ]
@@ -1,4 +1,6 @@
 from rest_framework import generics, permissions
+from labs.conditional import ConditionalGetMixin
+from labs.exports import ExportView
 from .models import Ticket
 from .serializers import TicketSerializer
 
@@ -11,11 +13,20 @@ class TicketCreateView(generics.CreateAPIView):
             raise PermissionError("Only students can raise tickets")
         serializer.save(student=self.request.user)
 
-class TicketListView(generics.ListAPIView):
+class TicketListView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = TicketSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('created_at', 'id')
 
     def get_queryset(self):
         if self.request.user.role == 'admin':
             return Ticket.objects.all()
         return Ticket.objects.filter(student=self.request.user)
+
+
+class TicketExportView(ExportView):
+    queryset = Ticket.objects.all()
+    fields = ('id', 'student', 'student__username', 'pc', 'pc__lab', 'issue_description', 'status', 'created_at', 'updated_at')
+    date_field = 'created_at'
+    lab_field = 'pc__lab'
+    filename = 'tickets'
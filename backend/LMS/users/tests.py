@@ -1,3 +1,81 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+
+from labs.models import User
+from labs.throttling import reset_throttles, throttle_settings, throttle_stats
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        reset_throttles()
+        User.objects.create_user(username='student', password='pass', role='student')
+
+    def login(self, url='/api/users/login/', username='student', password='wrong', ip='10.0.0.1'):
+        return self.client.post(
+            url, {'username': username, 'password': password},
+            content_type='application/json', REMOTE_ADDR=ip,
+        )
+
+    def test_username_limit_rejects_before_hashing(self):
+        limit = throttle_settings()['USERNAME_LIMIT']
+        for _ in range(limit):
+            self.assertEqual(self.login().status_code, 401)
+        with mock.patch('users.views.authenticate') as authenticate:
+            response = self.login(password='pass', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        authenticate.assert_not_called()
+        # Other accounts are unaffected
+        self.assertEqual(self.login(username='someone-else').status_code, 401)
+
+        stats = throttle_stats()
+        self.assertEqual(stats['scopes']['login'], {'allowed': limit + 1, 'rejected': 1})
+        self.assertEqual(stats['blocked_keys'], 1)
+
+    def test_successful_logins_do_not_lock_the_account(self):
+        limit = throttle_settings()['USERNAME_LIMIT']
+        for url in ('/api/users/login/', '/api/login/'):
+            for n in range(limit + 1):
+                self.assertEqual(self.login(url, password='pass', ip=f'10.0.1.{n}').status_code, 200, url)
+
+    def test_success_clears_failed_attempts(self):
+        limit = throttle_settings()['USERNAME_LIMIT']
+        for url in ('/api/users/login/', '/api/login/'):
+            for _ in range(limit - 1):
+                self.assertEqual(self.login(url).status_code, 401)
+            self.assertEqual(self.login(url, password='pass').status_code, 200)
+            for _ in range(limit - 1):
+                self.assertEqual(self.login(url).status_code, 401)
+            self.assertEqual(self.login(url, password='pass').status_code, 200)
+
+    def test_token_endpoint_counts_failures_per_username(self):
+        limit = throttle_settings()['USERNAME_LIMIT']
+        for n in range(limit):
+            self.assertEqual(self.login('/api/login/', ip=f'10.0.1.{n}').status_code, 401)
+        self.assertEqual(self.login('/api/login/', password='pass', ip='10.0.2.1').status_code, 429)
+
+    def test_token_endpoint_is_throttled_per_ip(self):
+        with override_settings(LOGIN_THROTTLE={'IP_LIMIT': 3, 'USERNAME_LIMIT': 100}):
+            for n in range(3):
+                self.assertEqual(self.login('/api/login/', username=f'user{n}').status_code, 401)
+            self.assertEqual(self.login('/api/login/', username='user9').status_code, 429)
+            self.assertEqual(self.login('/api/login/', username='user9', ip='10.0.0.9').status_code, 401)
+
+    def test_registration_is_throttled_per_ip(self):
+        with override_settings(LOGIN_THROTTLE={'REGISTER_LIMIT': 2}):
+            for n in range(2):
+                response = self.client.post('/api/users/register/', {
+                    'username': f'new{n}', 'email': f'new{n}@example.com', 'password': 'pass',
+                }, content_type='application/json')
+                self.assertEqual(response.status_code, 201)
+            # Both registration endpoints share the per-IP window
+            response = self.client.post('/api/register/', {
+                'username': 'new9', 'email': 'new9@example.com', 'password': 'pass',
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 429)
+
+    def test_disabled(self):
+        with override_settings(LOGIN_THROTTLE={'ENABLED': False}):
+            for _ in range(throttle_settings()['USERNAME_LIMIT'] + 1):
+                self.assertEqual(self.login().status_code, 401)
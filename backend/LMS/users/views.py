@@ -1,8 +1,9 @@
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework import generics, status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
+from labs.authentication import LabsRefreshToken
+from labs.throttling import LoginOutcomeMixin, LoginThrottle, RegisterThrottle
 from .models import User
 from .serializers import RegisterSerializer, LoginSerializer
 
@@ -10,10 +11,12 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterThrottle]
 
 
-class LoginView(generics.GenericAPIView):
+class LoginView(LoginOutcomeMixin, generics.GenericAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginThrottle]
     serializer_class = LoginSerializer
 
     def post(self, request):
@@ -21,7 +24,7 @@ class LoginView(generics.GenericAPIView):
         password = request.data.get("password")
         user = authenticate(username=username, password=password)
         if user:
-            refresh = RefreshToken.for_user(user)
+            refresh = LabsRefreshToken.for_user(user)
             return Response({
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),
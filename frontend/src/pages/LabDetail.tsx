@@ -52,14 +52,10 @@ const LabDetail: React.FC = () => {
     try {
       setLoading(true);
       setError('');
-      const [labData, pcData] = await Promise.all([
-        labsAPI.getById(labId),
-        pcsAPI.getByLab(labId),
-      ]);
+      // Lab and all of its PCs in a single request
+      const { pcs: labPcs = [], ...labData } = await labsAPI.getExpanded(labId, ['pcs']);
       setLab(labData);
-      // Extract results from paginated response if needed
-      const pcsArray = Array.isArray(pcData?.results) ? pcData.results : Array.isArray(pcData) ? pcData : [];
-      setPcs(pcsArray);
+      setPcs(labPcs);
     } catch (e: any) {
       console.error('Failed to load lab or PCs:', e);
       setError(e?.response?.data?.detail || 'Failed to load lab details. Please check your connection and try again.');
@@ -1,7 +1,8 @@
 import axios from 'axios';
 import type { 
   User, Lab, PC, Equipment, Software, MaintenanceLog, Inventory,
-  LoginRequest, RegisterRequest, AuthResponse 
+  LoginRequest, RegisterRequest, AuthResponse, DashboardSummary,
+  LabExpanded, LabExpansion
 } from '../types';
 
 const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8001/api';
@@ -30,6 +31,14 @@ export const navigationAPI = {
   },
 };
 
+// Dashboard API
+export const dashboardAPI = {
+  summary: async (labId?: number): Promise<DashboardSummary> => {
+    const response = await api.get('/dashboard/summary/', { params: labId ? { lab: labId } : undefined });
+    return response.data;
+  },
+};
+
 // Tickets API
 export const ticketsAPI = {
   create: async (payload: { title: string; description?: string }): Promise<{ id: number; title: string; description?: string; status: string; created_at: string }> => {
@@ -120,6 +129,12 @@ export const labsAPI = {
     const response = await api.get(`/labs/${id}/`);
     return response.data;
   },
+
+  // One request for the lab and its nested collections, e.g. ['pcs', 'pcs.software']
+  getExpanded: async (id: number, expand: LabExpansion[]): Promise<LabExpanded> => {
+    const response = await api.get(`/labs/${id}/`, { params: { expand: expand.join(',') } });
+    return response.data;
+  },
   
   create: async (data: Omit<Lab, 'id' | 'created_at' | 'updated_at'>): Promise<Lab> => {
     const response = await api.post('/labs/', data);
@@ -244,6 +259,16 @@ export const maintenanceAPI = {
   },
 };
 
+// Live events API (Server-Sent Events; EventSource resumes with Last-Event-ID on its own)
+export const eventsAPI = {
+  open: (options: { topics?: ('maintenance' | 'ticket')[]; lab?: number } = {}): EventSource => {
+    const params = new URLSearchParams({ token: getToken() || '' });
+    if (options.topics?.length) params.set('topics', options.topics.join(','));
+    if (options.lab) params.set('lab', String(options.lab));
+    return new EventSource(`${API_BASE_URL}/events/?${params.toString()}`);
+  },
+};
+
 // Inventory API
 export const inventoryAPI = {
   getAll: async (): Promise<Inventory[]> => {
@@ -21,6 +21,7 @@ export interface PC {
   status: string;
   brand?: string;
   serial_number?: string;
+  installed_software?: Software[];
 }
 
 export interface Equipment {
@@ -70,6 +71,38 @@ export interface Inventory {
   under_repair_quantity: number;
   lab: number;
 }
+export type LabExpansion = 'pcs' | 'pcs.software' | 'equipment' | 'open_maintenance';
+
+export interface LabExpanded extends Lab {
+  pcs?: PC[];
+  equipment?: Equipment[];
+  open_maintenance?: MaintenanceLog[];
+}
+
+export interface DashboardSummary {
+  labs: number;
+  equipment: {
+    total: number;
+    working: number;
+    not_working: number;
+    under_repair: number;
+  };
+  maintenance: {
+    pending: number;
+    fixed: number;
+  };
+  open_tickets: number;
+  recent_activity: Array<{
+    id: number;
+    lab?: number;
+    equipment: number;
+    equipment__equipment_type: Equipment['equipment_type'];
+    status: MaintenanceLog['status'];
+    reported_on: string;
+    fixed_on?: string;
+  }>;
+}
+
 export interface LoginRequest {
   username: string;
   password: string;